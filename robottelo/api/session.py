@@ -0,0 +1,185 @@
+# -*- encoding: utf-8 -*-
+"""Persistent HTTP session used for the requests sent to the Satellite API.
+
+NailGun sends each request with the ``requests`` module functions, so every
+call opens a new connection and pays the TLS handshake again. This module
+keeps one keep-alive :class:`requests.Session` per process, with a sized
+connection pool and retries of the idempotent requests answered with a 502
+or 503 status.
+
+:func:`install_nailgun_session` makes ``nailgun.client`` send its requests
+through that session, it is called when the settings are configured. Direct
+calls to the API should use the session too::
+
+    from robottelo.api.session import get_session
+
+    response = get_session().delete(url, auth=auth, verify=False)
+
+The session does not keep the cookies set by the server, so a request made
+with some credentials is never authenticated by a cookie set by the answer
+to a request made with other credentials.
+"""
+import logging
+import os
+import threading
+
+import requests
+
+from nailgun import client
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from six.moves import http_cookiejar
+
+LOGGER = logging.getLogger(__name__)
+
+#: Default maximum number of connections kept alive for each host
+POOL_SIZE = 10
+#: Default number of retries of an idempotent request answered with one of
+#: :data:`RETRY_STATUSES`
+RETRIES = 3
+#: Default backoff factor between retries, in seconds. The retries wait 0,
+#: 2 * factor, 4 * factor... seconds.
+BACKOFF_FACTOR = 0.5
+#: HTTP status codes of the answers which are retried
+RETRY_STATUSES = (502, 503)
+
+_lock = threading.Lock()
+_options = {
+    'pool_size': POOL_SIZE,
+    'retries': RETRIES,
+    'backoff_factor': BACKOFF_FACTOR,
+}
+# The session and the id of the process which created it
+_session = None
+_session_pid = None
+
+
+def make_session(pool_size=POOL_SIZE, retries=RETRIES,
+                 backoff_factor=BACKOFF_FACTOR):
+    """Return a new session with a sized connection pool and retries.
+
+    :param int pool_size: The maximum number of connections kept alive for
+        each host.
+    :param int retries: The number of retries of the idempotent requests
+        answered with one of :data:`RETRY_STATUSES`, 0 disables them.
+    :param float backoff_factor: The backoff factor between retries.
+    :return: A ``requests.Session``.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.cookies.set_policy(
+        http_cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def configure(pool_size=None, retries=None, backoff_factor=None):
+    """Set the options of the session returned by :func:`get_session`.
+
+    The current session is closed, a new one is created with the new options
+    when it is needed. ``None`` keeps the current value of an option.
+    """
+    global _session
+    options = {
+        'pool_size': pool_size,
+        'retries': retries,
+        'backoff_factor': backoff_factor,
+    }
+    with _lock:
+        _options.update(
+            (key, value) for key, value in options.items()
+            if value is not None
+        )
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def get_session():
+    """Return the session of this process, creating it if needed.
+
+    A process forked after the session was created gets its own session, so
+    connections are never shared between processes.
+    """
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = make_session(**_options)
+            _session_pid = os.getpid()
+            LOGGER.debug(
+                u'Created HTTP session with pool size %s and %s retries',
+                _options['pool_size'], _options['retries'])
+        return _session
+
+
+def close_session():
+    """Close the connections of the session of this process."""
+    global _session
+    with _lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+class SessionRequests(object):
+    """Stand-in for the ``requests`` module which sends the requests through
+    the session returned by :func:`get_session`.
+
+    The request functions take the same arguments as the ``requests``
+    module ones, any other attribute is the ``requests`` module one.
+    """
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    def request(self, method, url, **kwargs):
+        return get_session().request(method, url, **kwargs)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault('allow_redirects', False)
+        return get_session().request('HEAD', url, **kwargs)
+
+    def get(self, url, params=None, **kwargs):
+        kwargs.setdefault('allow_redirects', True)
+        return get_session().request('GET', url, params=params, **kwargs)
+
+    def options(self, url, **kwargs):
+        kwargs.setdefault('allow_redirects', True)
+        return get_session().request('OPTIONS', url, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return get_session().request(
+            'POST', url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return get_session().request('PUT', url, data=data, **kwargs)
+
+    def patch(self, url, data=None, **kwargs):
+        return get_session().request('PATCH', url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return get_session().request('DELETE', url, **kwargs)
+
+
+def install_nailgun_session():
+    """Make ``nailgun.client`` send its requests through the session.
+
+    NailGun's ``ServerConfig`` only holds the url, credentials and TLS
+    options of the server, the requests are sent by ``nailgun.client``
+    which calls the ``requests`` module functions. Those calls are sent to
+    :class:`SessionRequests` instead, whatever ``ServerConfig`` is used.
+    Calling it again has no effect.
+    """
+    if not isinstance(client.requests, SessionRequests):
+        client.requests = SessionRequests()
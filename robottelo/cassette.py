@@ -0,0 +1,383 @@
+# -*- encoding: utf-8 -*-
+"""Record and replay of the commands run over ssh.
+
+While recording, each command run by :func:`robottelo.ssh.execute_command` or
+:func:`robottelo.ssh.execute_batch` is appended to a cassette file together
+with its output, return code, time to first byte and total time. While
+replaying, the commands are answered from the cassette and no connection is
+opened, which allows running the CLI helpers, parsers and caches quickly and
+without a server.
+
+The cassette is a file with one JSON object per line. When loaded the
+commands are indexed by host and normalized command, so the outputs of a
+command are served in the order they were recorded, the last one being served
+again when the command is run more times than it was recorded.
+
+Commands are normalized so that runs of the same code give the same command:
+the hammer passwords are masked, whitespaces are collapsed and the random
+``ROBOTTELO-*`` markers written by batches and single trip creates are
+replaced by placeholders, which are replaced back by the markers of the
+replayed command in its output.
+
+The names, labels and other values generated by ``fauxfactory`` and the CLI
+factory come from the ``random`` module. A recorded cassette starts with the
+seed ``random`` was seeded with when the cassette was inserted, and replaying
+seeds it again, so the same code generates the same values and runs the same
+commands. This only holds when the random values are generated in the same
+order: steps of a :class:`robottelo.cli.factory.SetupPlan` running in
+parallel, or tests scheduled differently between xdist workers, generate them
+in another order and their commands can not be replayed.
+
+A cassette is used for all the commands run inside a :func:`use_cassette`
+block::
+
+    with cassette.use_cassette('organizations.jsonl', mode='record'):
+        make_org()
+
+Or for the whole test session when the ``cassette`` setting is set.
+"""
+import glob
+import io
+import json
+import logging
+import os
+import random
+import re
+import six
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+
+from robottelo.config import settings
+
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# hammer -v -u <user> -p <password> ...
+_HAMMER_PASSWORD_REGEX = re.compile(r'(\bhammer\b[^\n]*?\s-p\s+)(\S+)')
+# Random markers of ssh.execute_batch and Base._create_in_single_trip
+_MARKER_REGEX = re.compile(r'ROBOTTELO-(?:BATCH-)?[0-9a-f]{32}')
+_PLACEHOLDER = u'ROBOTTELO-MARKER-{0}'
+_PLACEHOLDER_REGEX = re.compile(r'ROBOTTELO-MARKER-(\d+)')
+
+
+class CassetteError(Exception):
+    """Indicates that a command can not be replayed."""
+
+
+def _to_text(data):
+    """Decode the raw output of a command."""
+    if isinstance(data, six.binary_type):
+        return data.decode('utf-8', 'replace')
+    return data or u''
+
+
+def _find_markers(text):
+    """Return the distinct markers of ``text`` in order of appearance."""
+    markers = []
+    for marker in _MARKER_REGEX.findall(text):
+        if marker not in markers:
+            markers.append(marker)
+    return markers
+
+
+def _hide_markers(text, markers):
+    """Replace each marker of ``text`` by its placeholder."""
+    for index, marker in enumerate(markers):
+        text = text.replace(marker, _PLACEHOLDER.format(index))
+    return text
+
+
+def _show_markers(text, markers):
+    """Replace each placeholder of ``text`` by its marker."""
+    return _PLACEHOLDER_REGEX.sub(
+        lambda match: markers[int(match.group(1))], text)
+
+
+def normalize_command(cmd):
+    """Normalize a command so that runs of the same code give the same
+    command.
+
+    :param cmd: The command, as text or bytes.
+    :return: A tuple with the normalized command and the list of markers
+        replaced by placeholders.
+    """
+    cmd = _to_text(cmd)
+    markers = _find_markers(cmd)
+    cmd = _hide_markers(cmd, markers)
+    cmd = _HAMMER_PASSWORD_REGEX.sub(r'\1********', cmd)
+    return u' '.join(cmd.split()), markers
+
+
+class Cassette(object):
+    """Commands and outputs recorded to, or replayed from, cassette files.
+
+    :param path: The cassette file. In replay mode a list of files can be
+        given, their commands are all loaded.
+    :param str mode: ``record`` to run the commands and write them to the
+        file, which is overwritten, or ``replay`` to answer the commands from
+        the file.
+    :param bool latency: When replaying, wait for the recorded time of each
+        command before returning its output.
+    :raises ValueError: If ``mode`` is unknown.
+
+    The :attr:`seed` of a recorded cassette is written first to its file, a
+    replayed cassette gets the seed of its first file having one.
+    """
+
+    def __init__(self, path, mode=REPLAY, latency=False):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(
+                u'Unknown cassette mode {0!r}, expected {1} or {2}'.format(
+                    mode, RECORD, REPLAY))
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._file = None
+        self._index = {}
+        #: The seed of the ``random`` module when the cassette is inserted,
+        #: ``None`` when replaying a file recorded without a seed.
+        self.seed = None
+        if self.recording:
+            self.seed = random.SystemRandom().randint(0, 2 ** 32 - 1)
+            self._file = io.open(path, 'w', encoding='utf-8')
+            self._file.write(
+                six.text_type(json.dumps({'seed': self.seed})) + u'\n')
+            self._file.flush()
+        else:
+            paths = [path] if isinstance(path, six.string_types) else path
+            for cassette_path in paths:
+                self._load(cassette_path)
+
+    @property
+    def recording(self):
+        """Whether the commands are recorded."""
+        return self.mode == RECORD
+
+    @property
+    def replaying(self):
+        """Whether the commands are replayed."""
+        return self.mode == REPLAY
+
+    def __len__(self):
+        """Return the number of commands which can be replayed."""
+        return len(self._index)
+
+    def _load(self, path):
+        """Index the interactions of a cassette file."""
+        with io.open(path, encoding='utf-8') as handler:
+            for line in handler:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                if 'command' not in interaction:
+                    if self.seed is None:
+                        self.seed = interaction.get('seed')
+                    continue
+                key = (interaction['host'], interaction['command'])
+                self._index.setdefault(key, deque()).append(interaction)
+        logger.debug('Loaded cassette %s', path)
+
+    def record(self, cmd, host, stdout, stderr, return_code, first_byte,
+               elapsed):
+        """Append a command run to the cassette file.
+
+        :param cmd: The command run.
+        :param str host: The host the command run on, ``None`` for the
+            default server.
+        :param stdout: The raw ``stdout`` of the command.
+        :param stderr: The raw ``stderr`` of the command.
+        :param int return_code: The exit status of the command.
+        :param float first_byte: Seconds until the first byte of output.
+        :param float elapsed: Seconds until the command returned.
+        """
+        cmd, markers = normalize_command(cmd)
+        line = json.dumps({
+            'host': host,
+            'command': cmd,
+            'stdout': _hide_markers(_to_text(stdout), markers),
+            'stderr': _hide_markers(_to_text(stderr), markers),
+            'return_code': return_code,
+            'first_byte': round(first_byte, 6),
+            'elapsed': round(elapsed, 6),
+        }, sort_keys=True)
+        with self._lock:
+            if self._file is None:
+                logger.debug('Cassette %s is closed, not recording', self.path)
+                return
+            self._file.write(six.text_type(line) + u'\n')
+            self._file.flush()
+
+    def play(self, cmd, host):
+        """Return the recorded output of a command.
+
+        :param cmd: The command to replay.
+        :param str host: The host the command runs on, ``None`` for the
+            default server.
+        :return: A tuple with the ``stdout`` and ``stderr`` bytes and the
+            return code.
+        :raises robottelo.cassette.CassetteError: If the command was not
+            recorded.
+        """
+        normalized, markers = normalize_command(cmd)
+        with self._lock:
+            interactions = self._index.get((host, normalized))
+            if not interactions:
+                raise CassetteError(
+                    u'No recorded output for {0!r} on {1}'.format(
+                        normalized, host or u'the default server'))
+            # keep the last output to answer further runs
+            if len(interactions) > 1:
+                interaction = interactions.popleft()
+            else:
+                interaction = interactions[0]
+        if self.latency:
+            time.sleep(interaction['elapsed'])
+        return (
+            _show_markers(interaction['stdout'], markers).encode('utf-8'),
+            _show_markers(interaction['stderr'], markers).encode('utf-8'),
+            interaction['return_code'],
+        )
+
+    def close(self):
+        """Close the cassette file being recorded."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ReplayClient(object):
+    """Stands for a ssh connection while replaying a cassette.
+
+    Only the commands run by :func:`robottelo.ssh.execute_command` and
+    :func:`robottelo.ssh.execute_batch` can be replayed, opening channels or
+    SFTP sessions raises ``CassetteError``.
+    """
+
+    def __init__(self, cassette, hostname):
+        self.cassette = cassette
+        self._hostname = hostname
+        self._id = u'replay-{0}'.format(hex(id(self)))
+
+    def get_transport(self):
+        """The client is its own transport."""
+        return self
+
+    def is_active(self):
+        """Pooled clients are dropped once their cassette is ejected."""
+        return current() is self.cassette
+
+    def set_keepalive(self, interval):
+        """Nothing to keep alive."""
+
+    def close(self):
+        """Nothing to close."""
+
+    def _unsupported(self, *args, **kwargs):
+        raise CassetteError(
+            u'Only commands run by execute_command and execute_batch can be '
+            u'replayed'
+        )
+
+    exec_command = open_session = open_sftp = _unsupported
+
+
+_current = None
+_settings_loaded = False
+_lock = threading.Lock()
+
+
+def _settings_paths(path, mode):
+    """Return the cassette files of the ``cassette`` setting.
+
+    When running with xdist each worker records its own file and replay
+    loads the files of all the workers, the file of the worker first so the
+    worker replays with its seed.
+    """
+    root, ext = os.path.splitext(path)
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    worker_path = u'{0}.{1}{2}'.format(root, worker, ext)
+    if mode == RECORD:
+        return worker_path if worker else path
+    paths = sorted(glob.glob(u'{0}.gw*{1}'.format(root, ext)))
+    if os.path.exists(path) or not paths:
+        paths.insert(0, path)
+    if worker and worker_path in paths:
+        paths.remove(worker_path)
+        paths.insert(0, worker_path)
+    return paths
+
+
+def current():
+    """Return the cassette in use, if any.
+
+    The cassette of the ``cassette`` setting is loaded on first use once the
+    settings are configured.
+    """
+    global _current, _settings_loaded
+    if _current is None and not _settings_loaded and settings.configured:
+        with _lock:
+            if not _settings_loaded:
+                _settings_loaded = True
+                if settings.cassette:
+                    _current = Cassette(
+                        _settings_paths(
+                            settings.cassette, settings.cassette_mode),
+                        settings.cassette_mode,
+                        settings.cassette_latency,
+                    )
+                    _seed(_current)
+    return _current
+
+
+def _seed(cassette):
+    """Seed the ``random`` module with the seed of ``cassette``, if any."""
+    if cassette is not None and cassette.seed is not None:
+        random.seed(cassette.seed)
+
+
+def insert(cassette):
+    """Use ``cassette`` for the next commands, replacing the cassette in use.
+
+    The ``random`` module is seeded with the seed of ``cassette``.
+
+    :return: The cassette previously in use.
+    """
+    global _current
+    with _lock:
+        previous, _current = _current, cassette
+        _seed(cassette)
+    return previous
+
+
+def eject():
+    """Stop using the current cassette and close it."""
+    cassette = insert(None)
+    if cassette is not None:
+        cassette.close()
+
+
+@contextmanager
+def use_cassette(path, mode=REPLAY, latency=False):
+    """Record or replay the commands run in a ``with`` block.
+
+    The arguments are the same as :class:`Cassette`. The state of the
+    ``random`` module is restored when the block ends.
+
+    :return: The ``Cassette``.
+    """
+    cassette = Cassette(path, mode, latency)
+    state = random.getstate()
+    previous = insert(cassette)
+    try:
+        yield cassette
+    finally:
+        insert(previous)
+        random.setstate(state)
+        cassette.close()
@@ -34,6 +34,21 @@ def org_cleanup(org_id=None):
     entities.Organization(id=org_id).delete()
 
 
+def cached_entity_cleanup(factory_name, entity):
+    """Deletes the organizations and locations leaving the CLI factory
+    entity cache, the other cached entities are deleted with their
+    organization.
+
+    :param str factory_name: The name of the factory function which created
+        the entity, e.g. ``make_org``.
+    :param dict entity: The entity as returned by the factory function.
+    """
+    if factory_name == 'make_org':
+        org_cleanup(entity['id'])
+    elif factory_name == 'make_location':
+        location_cleanup(entity['id'])
+
+
 def vm_cleanup(vm):
     """Destroys virtual machine
 
@@ -2,10 +2,24 @@
 """Generic base class for cli hammer commands."""
 import logging
 import re
-
-from robottelo import ssh
-from robottelo.cli import hammer
+import six
+import threading
+import time
+import uuid
+import weakref
+
+from cachetools import TTLCache
+from copy import deepcopy
+from multiprocessing.pool import ThreadPool
+from robottelo import cassette, metrics, ssh
+from robottelo.cli import command_index, hammer, hammer_shell
 from robottelo.config import settings
+from six import text_type
+
+
+# Id of a foreman task in messages like "Task 2a8b... running"
+_TASK_ID_REGEX = re.compile(
+    r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
 
 
 class CLIError(Exception):
@@ -61,6 +75,158 @@ class CLIDataBaseError(CLIBaseError):
     """
 
 
+class HammerCommand(text_type):
+    """A hammer command line which keeps track of the hammer command and
+    subcommand it was built for.
+
+    Instances are built by :meth:`Base._construct_command` and behave like the
+    command string, they are immutable so the same command can be safely
+    handed between threads.
+    """
+
+    def __new__(cls, command, command_base=None, command_sub=None):
+        obj = super(HammerCommand, cls).__new__(cls, command)
+        obj.command_base = command_base
+        obj.command_sub = command_sub
+        return obj
+
+
+class ReadCache(object):
+    """A cache of the ``info`` and ``list`` results of the CLI classes.
+
+    It is used when the ``hammer_read_cache`` setting is enabled. Entries are
+    kept at most ``hammer_read_cache_ttl`` seconds and the least recently used
+    ones are dropped when there are more than ``hammer_read_cache_size``.
+
+    Every command which is not a read of a hammer command (``create``,
+    ``update``, ``delete``, ``set-parameter``, ...) invalidates the cached
+    results of that hammer command. Entities changed by commands of another
+    hammer command, like the hosts count of an organization, are only
+    refreshed when their entry expires.
+    """
+
+    #: Subcommands whose results are cached and which do not invalidate it
+    READ_SUBCOMMANDS = frozenset(('info', 'list'))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = None
+        self._generations = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def enabled():
+        """Tell whether the ``hammer_read_cache`` setting is enabled."""
+        return bool(settings.hammer_read_cache)
+
+    def _get_cache(self):
+        """Return the cache, creating it from the settings if needed."""
+        if self._cache is None:
+            self._cache = TTLCache(
+                settings.hammer_read_cache_size,
+                settings.hammer_read_cache_ttl,
+            )
+        return self._cache
+
+    def make_key(self, command_base, command_sub, options, user,
+                 output_format):
+        """Build the key of a command result.
+
+        Options which are not passed to hammer, the ``None`` and ``False``
+        values, are ignored and the others are compared as text, so
+        ``{'id': 1}`` and ``{'id': '1'}`` share the same entry.
+        """
+        normalized = tuple(sorted(
+            (key, u'{0}'.format(value))
+            for key, value in (options or {}).items()
+            if value is not None and value is not False
+        ))
+        with self._lock:
+            generation = self._generations.get(command_base, 0)
+        return (
+            command_base, generation, command_sub, normalized, user,
+            output_format,
+        )
+
+    def get(self, key):
+        """Return a copy of the cached result of ``key`` or ``None``."""
+        with self._lock:
+            try:
+                result = self._get_cache()[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return deepcopy(result)
+
+    def set(self, key, result):
+        """Cache a copy of the result of ``key``."""
+        result = deepcopy(result)
+        with self._lock:
+            self._get_cache()[key] = result
+
+    def invalidate(self, command_base):
+        """Forget the cached results of a hammer command."""
+        with self._lock:
+            self._generations[command_base] = (
+                self._generations.get(command_base, 0) + 1)
+
+    def clear(self):
+        """Forget all the cached results and reset the counters."""
+        with self._lock:
+            self._cache = None
+            self._generations.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Return the ``hits``, ``misses`` and ``size`` of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': 0 if self._cache is None else len(self._cache),
+            }
+
+
+#: The cache used by the ``info`` and ``list`` methods of the CLI classes
+read_cache = ReadCache()
+
+
+class _CommandMeta(type):
+    """Metaclass keeping the ``command_sub`` of the CLI classes per thread.
+
+    CLI methods set ``cls.command_sub`` and then call
+    ``cls._construct_command``. Storing ``command_sub`` per thread avoids a
+    thread building a command with the subcommand set by another thread
+    running a different method of the same class.
+    """
+    _local = threading.local()
+
+    def _thread_values(cls):
+        """Return the ``command_sub`` values set in the current thread."""
+        values = getattr(_CommandMeta._local, 'values', None)
+        if values is None:
+            values = _CommandMeta._local.values = weakref.WeakKeyDictionary()
+        return values
+
+    @property
+    def command_sub(cls):
+        """Subcommand of the current thread, like: create, update, etc."""
+        values = cls._thread_values()
+        for klass in cls.__mro__:
+            if klass in values:
+                return values[klass]
+            if 'command_sub' in vars(klass):
+                return vars(klass)['command_sub']
+        return None
+
+    @command_sub.setter
+    def command_sub(cls, value):
+        cls._thread_values()[cls] = value
+
+
+@six.add_metaclass(_CommandMeta)
 class Base(object):
     """
     @param command_base: base command of hammer.
@@ -126,6 +292,10 @@ class Base(object):
     command_base = None  # each inherited instance should define this
     command_sub = None  # specific to instance, like: create, update, etc
     command_requires_org = False  # True when command requires organization-id
+    # False when create and info can not be chained in a single ssh command
+    single_trip_create = True
+    # False when the list command does not accept --page and --per-page
+    paginated_list = True
 
     logger = logging.getLogger('robottelo')
     _db_error_regex = re.compile(
@@ -133,7 +303,7 @@ class Base(object):
     )
 
     @classmethod
-    def _handle_response(cls, response, ignore_stderr=None):
+    def _handle_response(cls, response, ignore_stderr=None, command=None):
         """Verify ``return_code`` of the CLI command.
 
         Check for a non-zero return code or any stderr contents.
@@ -142,6 +312,9 @@ class Base(object):
             :mod:`robottelo.ssh.command`.
         :param ignore_stderr: indicates whether to throw a warning in logs if
             ``stderr`` is not empty.
+        :param command: the ``HammerCommand`` which got the response. If not
+            provided the class ``command_base`` and ``command_sub`` are used
+            in the error message.
         :returns: contents of ``stdout``.
         :raises robottelo.cli.base.CLIReturnCodeError: If return code is
             different from zero.
@@ -150,8 +323,8 @@ class Base(object):
             full_msg = (
                 u'Command "{0} {1}" finished with return_code {2}\n'
                 'stderr contains following message:\n{3}'.format(
-                    cls.command_base,
-                    cls.command_sub,
+                    getattr(command, 'command_base', cls.command_base),
+                    getattr(command, 'command_sub', cls.command_sub),
                     response.return_code,
                     response.stderr
                 )
@@ -191,6 +364,9 @@ class Base(object):
         if options is None:
             options = {}
 
+        if cls._can_create_in_single_trip(options):
+            return cls._create_in_single_trip(options)
+
         result = cls.execute(
             cls._construct_command(options), output_format='csv')
 
@@ -214,6 +390,110 @@ class Base(object):
 
         return result
 
+    @classmethod
+    def _can_create_in_single_trip(cls, options):
+        """Tell whether ``create`` can run the create and info commands in a
+        single ssh command.
+
+        It is enabled by the ``hammer_single_trip_create`` setting and is not
+        used by classes which override ``info`` or set ``single_trip_create``
+        to ``False``, by hammer shell sessions and when timing hammer.
+        """
+        if not settings.hammer_single_trip_create or settings.hammer_shell:
+            return False
+        if settings.performance and settings.performance.time_hammer:
+            return False
+        if not cls.single_trip_create:
+            return False
+        if any('info' in vars(klass)
+               for klass in cls.__mro__[:cls.__mro__.index(Base)]):
+            return False
+        # let the regular path report the missing organization-id
+        return not (
+            cls.command_requires_org and 'organization-id' not in options)
+
+    @classmethod
+    def _create_in_single_trip(cls, options):
+        """Create a new record and fetch it in a single ssh command.
+
+        The create command output is written to ``stdout`` followed by a
+        marker line with its exit status, and a marker line is written to
+        ``stderr``. If the record was created, the id is read from the first
+        row of the create CSV output, written on its own line, and the info
+        command is run right away with it.
+
+        That shell extraction does not understand quoted CSV values, so the
+        create output is parsed again with ``hammer.parse_csv`` and, if it
+        finds another id, the info output is dropped and the info command is
+        run again with the right id.
+        """
+        user, password = cls._get_username_password()
+        create_command = cls._construct_command(options, 'create')
+        info_options = {u'id': u'$id'}
+        if cls.command_requires_org:
+            info_options[u'organization-id'] = options[u'organization-id']
+        info_command = cls._construct_command(info_options, 'info')
+        marker = u'ROBOTTELO-{0}'.format(uuid.uuid4().hex)
+        script = (
+            u'out=$({create}); rc=$?; printf "%s\\n" "$out"; '
+            u'printf "\\n{marker} %s\\n" $rc; '
+            u'printf "\\n{marker}\\n" >&2; '
+            u'[ $rc -eq 0 ] || exit $rc; '
+            u'id=$(printf "%s\\n" "$out" | awk -F, '
+            u'\'NR == 1 {{for (i = 1; i <= NF; i++) if ($i == "Id") col = i}} '
+            u'NR == 2 && col {{print $col}}\'); '
+            u'printf "%s\\n" "$id"; [ -n "$id" ] || exit 0; {info}'
+        ).format(
+            create=cls._hammer_command_line(
+                create_command, user, password, output_format='csv'),
+            info=cls._hammer_command_line(info_command, user, password),
+            marker=marker,
+        )
+        start = time.time()
+        try:
+            response = ssh.command(
+                script.encode('utf-8'), output_format='plain', timeout=None)
+        finally:
+            if read_cache.enabled():
+                read_cache.invalidate(cls.command_base)
+        metrics.HAMMER_COMMAND_SECONDS.observe(
+            time.time() - start,
+            command=u'{0} create+info'.format(cls.command_base),
+        )
+        stdout = response.stdout or u''
+        stderr = response.stderr or u''
+        create_stdout, found, info_stdout = stdout.partition(
+            u'\n{0} '.format(marker))
+        if not found:
+            # the script failed before the create command finished
+            return cls._handle_response(response, command=create_command)
+        create_code, _, info_stdout = info_stdout.partition(u'\n')
+        info_id, _, info_stdout = info_stdout.partition(u'\n')
+        create_stderr, _, info_stderr = stderr.partition(
+            u'\n{0}\n'.format(marker))
+        result = cls._handle_response(
+            ssh.build_command_result(
+                create_stdout, create_stderr, int(create_code), 'csv'),
+            command=create_command,
+        )
+        if len(result) > 0 and 'id' in result[0]:
+            if result[0]['id'] != info_id:
+                cls.logger.debug(
+                    u'Single trip create read id %r instead of %r, fetching '
+                    u'the record again', info_id, result[0]['id'])
+                info_options = dict(info_options, id=result[0]['id'])
+                new_obj = cls.info(info_options)
+            else:
+                new_obj = hammer.parse_info(cls._handle_response(
+                    ssh.build_command_result(
+                        info_stdout, info_stderr, response.return_code),
+                    command=info_command,
+                ))
+            # stdout should be a dictionary containing the object
+            if len(new_obj) > 0:
+                result = new_obj
+        return result
+
     @classmethod
     def delete(cls, options=None):
         """Deletes existing record."""
@@ -274,16 +554,11 @@ class Base(object):
         return (username, password)
 
     @classmethod
-    def execute(cls, command, user=None, password=None, output_format=None,
-                timeout=None, ignore_stderr=None, return_raw_response=None):
-        """Executes the cli ``command`` on the server via ssh"""
-        user, password = cls._get_username_password(user, password)
-        time_hammer = False
-        if settings.performance:
-            time_hammer = settings.performance.time_hammer
-
+    def _hammer_command_line(cls, command, user, password,
+                             output_format=None, time_hammer=False):
+        """Build the shell command line which runs a hammer ``command``."""
         # add time to measure hammer performance
-        cmd = u'LANG={0} {1} hammer -v -u {2} -p {3} {4} {5}'.format(
+        return u'LANG={0} {1} hammer -v -u {2} -p {3} {4} {5}'.format(
             settings.locale,
             u'time -p' if time_hammer else '',
             user,
@@ -291,10 +566,59 @@ class Base(object):
             u'--output={0}'.format(output_format) if output_format else u'',
             command,
         )
-        response = ssh.command(
-            cmd.encode('utf-8'),
-            output_format=output_format,
-            timeout=timeout,
+
+    @classmethod
+    def execute(cls, command, user=None, password=None, output_format=None,
+                timeout=None, ignore_stderr=None, return_raw_response=None,
+                lazy_json=False):
+        """Executes the cli ``command`` on the server via ssh
+
+        When the ``hammer_shell`` setting is enabled the command is run by a
+        persistent ``hammer shell`` session instead of a new ``hammer``
+        process. Commands timed with ``time_hammer`` always use a new process,
+        as do the commands run while a cassette is recorded or replayed.
+
+        With ``lazy_json`` the JSON output is returned as the read-only views
+        of :func:`robottelo.cli.hammer.parse_json` instead of dicts and lists.
+        """
+        user, password = cls._get_username_password(user, password)
+        time_hammer = False
+        if settings.performance:
+            time_hammer = settings.performance.time_hammer
+
+        command_base = getattr(command, 'command_base', cls.command_base)
+        command_sub = getattr(command, 'command_sub', cls.command_sub)
+        # Only asked for when wanted, the default is parsing into dicts
+        parse_options = {u'lazy_json': True} if lazy_json else {}
+        start = time.time()
+        try:
+            if (settings.hammer_shell and not time_hammer and
+                    cassette.current() is None):
+                response = hammer_shell.command(
+                    command,
+                    user,
+                    password,
+                    output_format=output_format,
+                    timeout=timeout,
+                    **parse_options
+                )
+            else:
+                cmd = cls._hammer_command_line(
+                    command, user, password, output_format, time_hammer)
+                response = ssh.command(
+                    cmd.encode('utf-8'),
+                    output_format=output_format,
+                    timeout=timeout,
+                    **parse_options
+                )
+        finally:
+            if (read_cache.enabled() and
+                    command_sub not in read_cache.READ_SUBCOMMANDS):
+                read_cache.invalidate(command_base)
+        metrics.HAMMER_COMMAND_SECONDS.observe(
+            time.time() - start,
+            command=u' '.join(
+                part for part in (command_base, command_sub) if part),
         )
         if return_raw_response:
             return response
@@ -302,8 +626,41 @@ class Base(object):
             return cls._handle_response(
                 response,
                 ignore_stderr=ignore_stderr,
+                command=command,
             )
 
+    @classmethod
+    def _start_task(cls, options=None, timeout=None):
+        """Run the current subcommand with ``--async`` so it returns as soon
+        as the server started its foreman task.
+
+        :param dict options: The options of the subcommand.
+        :param int timeout: Seconds to wait for the command to return.
+        :return: The id of the foreman task, which can be waited for with
+            :meth:`robottelo.cli.task.Task.wait_many`.
+        :raises robottelo.cli.base.CLIError: If no task id is found in the
+            command output.
+        """
+        options = dict(options or {})
+        options[u'async'] = True
+        result = cls.execute(
+            cls._construct_command(options),
+            output_format='csv',
+            timeout=timeout,
+            ignore_stderr=True,
+        )
+        for row in result:
+            if row.get('id'):
+                return row['id']
+            for value in row.values():
+                match = _TASK_ID_REGEX.search(value or u'')
+                if match is not None:
+                    return match.group(0)
+        raise CLIError(
+            u'No task id found in the output of {0} {1}: {2!r}'.format(
+                cls.command_base, cls.command_sub, result)
+        )
+
     @classmethod
     def exists(cls, options=None, search=None):
         """Search for an entity using the query ``search[0]="search[1]"``
@@ -324,11 +681,16 @@ class Base(object):
                 u'search': u'{0}=\\"{1}\\"'.format(search[0], search[1])
             })
 
-        result = cls.list(options)
-        if result:
-            result = result[0]
+        if not cls.paginated_list:
+            result = cls.list(options)
+            if result:
+                result = result[0]
+            return result
 
-        return result
+        for result in cls.iter_list(options, page_size=1):
+            return result
+
+        return []
 
     @classmethod
     def info(cls, options=None, output_format=None):
@@ -345,19 +707,26 @@ class Base(object):
                 )
             )
 
-        result = cls.execute(
-            command=cls._construct_command(options),
-            output_format=output_format
-        )
-        if output_format != 'json':
-            result = hammer.parse_info(result)
-        return result
+        def read():
+            result = cls.execute(
+                command=cls._construct_command(options),
+                output_format=output_format
+            )
+            if output_format != 'json':
+                result = hammer.parse_info(result)
+            return result
+
+        return cls._cached_read(options, output_format, read)
 
     @classmethod
     def list(cls, options=None, per_page=True):
         """
         List information.
         @param options: ID (sometimes name works as well) to retrieve info.
+
+        The output is read as JSON when the ``hammer_json_list`` setting is
+        enabled, CSV otherwise. The JSON rows are the read-only views of
+        :func:`robottelo.cli.hammer.parse_json`.
         """
 
         cls.command_sub = 'list'
@@ -375,11 +744,92 @@ class Base(object):
                 )
             )
 
-        result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+        output_format = 'json' if settings.hammer_json_list else 'csv'
+        return cls._cached_read(
+            options,
+            output_format,
+            lambda: cls.execute(
+                cls._construct_command(options),
+                output_format=output_format,
+                lazy_json=settings.hammer_json_list,
+            ),
+        )
+
+    @classmethod
+    def _cached_read(cls, options, output_format, read):
+        """Return the result of the read command ``read`` from the read
+        cache when the ``hammer_read_cache`` setting is enabled.
 
+        :param dict options: The options of the command.
+        :param str output_format: The output format of the command.
+        :param read: A callable running the command and returning its result.
+        """
+        if not read_cache.enabled():
+            return read()
+        key = read_cache.make_key(
+            cls.command_base,
+            cls.command_sub,
+            options,
+            cls._get_username_password()[0],
+            output_format,
+        )
+        result = read_cache.get(key)
+        if result is None:
+            result = read()
+            read_cache.set(key, result)
         return result
 
+    @classmethod
+    def iter_list(cls, options=None, page_size=100, prefetch=False):
+        """Iterate over the listed entities, fetching them page by page.
+
+        Pages are only requested when the previous one has been consumed, so
+        stopping the iteration early avoids fetching the remaining entities.
+
+        :param dict options: The options of the ``list`` command. ``page`` and
+            ``per-page`` are set for each request. When the ``list`` command
+            is not paginated, see ``paginated_list``, all the entities are
+            fetched by a single request.
+        :param int page_size: The number of entities to fetch per request.
+        :param bool prefetch: Whether to fetch the next page in a background
+            thread while the current one is being consumed.
+        :return: A generator of the listed entities.
+        """
+        if options is None:
+            options = {}
+        if not cls.paginated_list:
+            for row in cls.list(options):
+                yield row
+            return
+        pool = ThreadPool(1) if prefetch else None
+
+        def fetch(page):
+            page_options = dict(options)
+            page_options.update({u'page': page, u'per-page': page_size})
+            return cls.list(page_options)
+
+        try:
+            page = 1
+            pending = None
+            while True:
+                if pending is not None:
+                    rows = pending.get()
+                else:
+                    rows = fetch(page)
+                page += 1
+                last_page = len(rows) < page_size
+                pending = None
+                if pool is not None and not last_page:
+                    pending = pool.apply_async(fetch, (page,))
+                for row in rows:
+                    yield row
+                if last_page:
+                    break
+        finally:
+            if pool is not None:
+                # Do not wait for a prefetched page nobody will consume
+                pool.close()
+
     @classmethod
     def puppetclasses(cls, options=None):
         """
@@ -464,13 +914,37 @@ class Base(object):
         return Wrapper
 
     @classmethod
-    def _construct_command(cls, options=None):
-        """Build a hammer cli command based on the options passed"""
+    def _construct_command(cls, options=None, command_sub=None):
+        """Build a hammer cli command based on the options passed
+
+        :param options: a dictionary mapping the command options to their
+            values.
+        :param command_sub: the subcommand to build the command for. If not
+            provided ``cls.command_sub`` is used.
+        :returns: a ``HammerCommand`` instance.
+        :raises robottelo.cli.base.CLIError: If the ``hammer_validate_options``
+            setting is enabled and an option is not accepted by the command
+            according to the hammer commands index.
+        """
+        if command_sub is None:
+            command_sub = cls.command_sub
         tail = u''
 
         if options is None:
             options = {}
 
+        if settings.hammer_validate_options:
+            unknown = command_index.get_index().unknown_options(
+                u'{0} {1}'.format(cls.command_base, command_sub), options)
+            if unknown:
+                raise CLIError(
+                    u'Option(s) {0} not supported by hammer {1} {2}'.format(
+                        u', '.join(sorted(unknown)),
+                        cls.command_base,
+                        command_sub,
+                    )
+                )
+
         for key, val in options.items():
             if val is None:
                 continue
@@ -482,8 +956,8 @@ class Base(object):
                 tail += u' --{0}="{1}"'.format(key, val)
         cmd = u'{0} {1} {2}'.format(
             cls.command_base,
-            cls.command_sub,
+            command_sub,
             tail.strip()
         )
 
-        return cmd
+        return HammerCommand(cmd, cls.command_base, command_sub)
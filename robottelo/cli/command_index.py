@@ -0,0 +1,180 @@
+# -*- encoding: utf-8 -*-
+"""Index of the hammer commands and their options.
+
+``tests/foreman/data/hammer_commands.json`` holds the help of every hammer
+command, as generated by ``scripts/hammer_command_tree.py``. This module turns
+it into a trie where each node maps the subcommand names to their nodes and
+holds the set of option names accepted by the command, which is enough to
+tell whether an option is known without walking the whole help tree.
+
+Parsing the JSON file takes a while, so the index is pickled in the temporary
+directory the first time it is built and loaded from there by the next
+processes, for example the other xdist workers. It is only loaded when first
+used.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from six.moves import cPickle as pickle
+
+logger = logging.getLogger(__name__)
+
+#: The hammer command tree the index is built from
+COMMANDS_FILE = 'hammer_commands.json'
+# Readable by Python 2 and 3
+_PICKLE_PROTOCOL = 2
+
+
+class CommandNode(object):
+    """A hammer command of the index.
+
+    :param options: The names and short names of the command options.
+    :param dict subcommands: The subcommand nodes by name.
+    """
+    __slots__ = ('options', 'subcommands')
+
+    def __init__(self, options, subcommands):
+        self.options = options
+        self.subcommands = subcommands
+
+    def __getstate__(self):
+        return self.options, self.subcommands
+
+    def __setstate__(self, state):
+        self.options, self.subcommands = state
+
+
+def build_node(tree):
+    """Build the index node of a command of the hammer command tree.
+
+    :param dict tree: A command as generated by
+        ``scripts/hammer_command_tree.py``.
+    :return: A ``CommandNode``.
+    """
+    options = set()
+    for option in tree.get('options') or ():
+        options.add(option['name'])
+        if option.get('shortname'):
+            options.add(option['shortname'])
+    return CommandNode(
+        frozenset(options),
+        {
+            subcommand['name']: build_node(subcommand)
+            for subcommand in tree.get('subcommands') or ()
+        },
+    )
+
+
+class CommandIndex(object):
+    """The hammer commands and their options.
+
+    :param root: The ``CommandNode`` of the ``hammer`` command.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def find(self, command):
+        """Return the node of a command or ``None`` if it is not indexed.
+
+        :param str command: The command without ``hammer``, e.g.
+            ``content-view version promote``.
+        """
+        node = self.root
+        for name in command.split():
+            node = node.subcommands.get(name)
+            if node is None:
+                return None
+        return node
+
+    def options(self, command):
+        """Return the option names of a command or ``None`` if it is not
+        indexed.
+        """
+        node = self.find(command)
+        return None if node is None else node.options
+
+    def unknown_options(self, command, options):
+        """Return the options that a command does not accept.
+
+        :param str command: The command without ``hammer``.
+        :param options: The option names, or a dict of options where the
+            ``None`` and ``False`` values, which are not passed to hammer,
+            are ignored.
+        :return: A set of option names, empty if all options are accepted or
+            if the command is not indexed.
+        """
+        known = self.options(command)
+        if known is None:
+            return set()
+        if isinstance(options, dict):
+            options = [
+                name for name, value in options.items()
+                if value is not None and value is not False
+            ]
+        return set(options).difference(known)
+
+
+def _cache_path(commands_path):
+    """Return the path of the pickled index of a hammer commands file.
+
+    The file size and modification time are part of the name so an updated
+    commands file gets a new index.
+    """
+    stat = os.stat(commands_path)
+    return os.path.join(
+        tempfile.gettempdir(),
+        'robottelo-hammer-index-{0}-{1}.pickle'.format(
+            stat.st_size, int(stat.st_mtime)),
+    )
+
+
+def load_index(commands_path):
+    """Load the index of a hammer commands file, building and caching it if
+    needed.
+
+    :param str commands_path: The path of a hammer commands JSON file.
+    :return: A ``CommandIndex``.
+    """
+    cache_path = _cache_path(commands_path)
+    try:
+        with open(cache_path, 'rb') as handler:
+            return CommandIndex(pickle.load(handler))
+    except (IOError, OSError, EOFError, pickle.UnpicklingError) as err:
+        logger.debug('Building the hammer commands index: %s', err)
+    with open(commands_path) as handler:
+        root = build_node(json.load(handler))
+    # Write to a temporary file first so concurrent processes never read a
+    # partial index
+    temp_path = u'{0}.{1}'.format(cache_path, os.getpid())
+    try:
+        with open(temp_path, 'wb') as handler:
+            pickle.dump(root, handler, _PICKLE_PROTOCOL)
+        os.rename(temp_path, cache_path)
+    except (IOError, OSError) as err:  # pragma: no cover
+        logger.debug('Could not cache the hammer commands index: %s', err)
+    return CommandIndex(root)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the index of ``tests/foreman/data/hammer_commands.json``,
+    loading it on first use.
+
+    :raises robottelo.helpers.DataFileError: If the commands file is not
+        found.
+    """
+    global _index
+    if _index is None:
+        # robottelo.helpers imports robottelo.cli modules
+        from robottelo.helpers import get_data_file
+        with _index_lock:
+            if _index is None:
+                _index = load_index(get_data_file(COMMANDS_FILE))
+    return _index
@@ -42,6 +42,7 @@ class ContentViewFilterRule(Base):
     """Manipulates content view filter rules."""
 
     command_base = 'content-view filter rule'
+    paginated_list = False
 
     @classmethod
     def create(cls, options=None):
@@ -112,9 +113,15 @@ class ContentView(Base):
             cls._construct_command(options), output_format='csv')
 
     @classmethod
-    def publish(cls, options, timeout=None):
-        """Publishes a new version of content-view."""
+    def publish(cls, options, timeout=None, async_=False):
+        """Publishes a new version of content-view.
+
+        With ``async_`` the id of the publish task is returned without waiting
+        for it to finish.
+        """
         cls.command_sub = 'publish'
+        if async_:
+            return cls._start_task(options)
         # Publishing can take a while so try to wait a bit longer
         if timeout is None:
             timeout = 120
@@ -135,11 +142,17 @@ class ContentView(Base):
         return hammer.parse_info(cls.execute(cls._construct_command(options)))
 
     @classmethod
-    def version_incremental_update(cls, options):
-        """Performs incremental update of the content-view's version"""
+    def version_incremental_update(cls, options, async_=False):
+        """Performs incremental update of the content-view's version
+
+        With ``async_`` the id of the update task is returned without waiting
+        for it to finish.
+        """
         cls.command_sub = 'version incremental-update'
         if options is None:
             options = {}
+        if async_:
+            return cls._start_task(options)
         return cls.execute(
             cls._construct_command(options), output_format='csv')
 
@@ -174,9 +187,15 @@ class ContentView(Base):
             cls._construct_command(options), output_format='csv')
 
     @classmethod
-    def version_promote(cls, options):
-        """Promotes content-view version to next env."""
+    def version_promote(cls, options, async_=False):
+        """Promotes content-view version to next env.
+
+        With ``async_`` the id of the promotion task is returned without
+        waiting for it to finish.
+        """
         cls.command_sub = 'version promote'
+        if async_:
+            return cls._start_task(options)
         return cls.execute(
             cls._construct_command(options),
             ignore_stderr=True,
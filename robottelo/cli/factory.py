@@ -8,7 +8,11 @@ import json
 import logging
 import os
 import random
+import six
+import threading
+import time
 
+from collections import OrderedDict
 from fauxfactory import (
     gen_alphanumeric,
     gen_integer,
@@ -17,11 +21,13 @@ from fauxfactory import (
     gen_netmask,
     gen_string,
 )
+from multiprocessing.pool import ThreadPool
 from os import chmod
-from robottelo import manifests, ssh
+from robottelo import manifests, metrics, ssh
 from robottelo.cli.activationkey import ActivationKey
 from robottelo.cli.architecture import Architecture
-from robottelo.cli.base import CLIReturnCodeError
+from robottelo.cli import command_index
+from robottelo.cli.base import Base, CLIReturnCodeError
 from robottelo.cli.computeresource import ComputeResource
 from robottelo.cli.contentview import (
     ContentView,
@@ -78,9 +84,13 @@ from robottelo.constants import (
 )
 from robottelo.decorators import bz_bug_is_open, cacheable
 from robottelo.helpers import (
-    update_dictionary, default_url_on_new_port, get_available_capsule_port
+    DataFileError,
+    update_dictionary,
+    default_url_on_new_port,
+    get_available_capsule_port,
 )
 from robottelo.ssh import upload_file
+from six.moves import queue
 from tempfile import mkstemp
 from time import sleep
 
@@ -89,12 +99,227 @@ logger = logging.getLogger(__name__)
 ORG_KEYS = ['organization', 'organization-id', 'organization-label']
 CONTENT_VIEW_KEYS = ['content-view', 'content-view-id']
 LIFECYCLE_KEYS = ['lifecycle-environment', 'lifecycle-environment-id']
+#: Default maximum number of steps of a :class:`SetupPlan` running at the
+#: same time
+SETUP_MAX_WORKERS = 4
+#: Default maximum number of entities created at the same time by
+#: :func:`make_many`
+MAKE_MANY_WORKERS = 8
 
 
 class CLIFactoryError(Exception):
     """Indicates an error occurred while creating an entity using hammer"""
 
 
+class SetupStepError(CLIFactoryError):
+    """Indicates a step of a :class:`SetupPlan` failed.
+
+    :param str plan: The name of the plan.
+    :param str step: The name of the failed step.
+    :param error: The exception raised by the step.
+    :param list cancelled: The names of the steps which were not run because
+        of the failure.
+
+    """
+
+    def __init__(self, plan, step, error, cancelled):
+        self.plan = plan
+        self.step = step
+        self.error = error
+        self.cancelled = cancelled
+        msg = u'Step "{0}" of {1} failed: {2}'.format(
+            step, plan, getattr(error, 'msg', None) or error)
+        if cancelled:
+            msg += u'\nCancelled steps: {0}'.format(u', '.join(cancelled))
+        super(SetupStepError, self).__init__(msg)
+
+
+class SetupPlan(object):
+    """A chain of setup steps run in the order of their dependencies.
+
+    Each step is a function called with the results of the steps it
+    ``requires``, in the same order. Steps whose dependencies are done run at
+    the same time, at most ``max_workers`` of them. When a step fails no
+    other step is started, the running ones are waited for and
+    :class:`SetupStepError` is raised.
+
+    The start time and duration of each step are kept in :attr:`trace`,
+    logged when the plan finishes and recorded in the
+    ``robottelo_setup_step_seconds`` metric. Example::
+
+        plan = SetupPlan(u'my setup')
+        plan.add('org', lambda: make_org()['id'])
+        plan.add(
+            'lce',
+            lambda org_id: make_lifecycle_environment(
+                {u'organization-id': org_id}),
+            requires=['org'],
+        )
+        plan.add(
+            'product',
+            lambda org_id: make_product({u'organization-id': org_id}),
+            requires=['org'],
+        )
+        results = plan.run()
+        results['product']['id']
+
+    :param str name: The name of the plan, used in errors and logs.
+    :param int max_workers: The maximum number of steps running at the same
+        time. Defaults to the ``setup_workers`` setting.
+
+    """
+
+    def __init__(self, name, max_workers=None):
+        self.name = name
+        self.max_workers = max_workers
+        #: A list of dicts with the ``step`` name, its ``status`` (done,
+        #: failed or cancelled), its ``start`` time in seconds since the
+        #: start of the plan and its ``elapsed`` time, filled by :meth:`run`.
+        self.trace = []
+        self._steps = OrderedDict()
+        self._values = {}
+
+    def _check_name(self, name):
+        """Make sure no step was added yet with the given name."""
+        if name in self._steps or name in self._values:
+            raise ValueError(
+                u'Step "{0}" already added to {1}'.format(name, self.name))
+
+    def add(self, name, function, requires=(), after=()):
+        """Add a step to the plan.
+
+        :param str name: The name of the step, its result is available under
+            this name to the steps requiring it.
+        :param function: The function run by the step.
+        :param requires: The names of the steps whose results are passed to
+            ``function``.
+        :param after: The names of the steps which must be done before this
+            one starts, without passing their results to ``function``.
+        :raise ValueError: If the name is already used or a dependency was
+            not added yet, steps must be added after their dependencies so a
+            plan can't have cycles.
+        """
+        self._check_name(name)
+        requires = tuple(requires)
+        after = tuple(after)
+        unknown = [
+            dependency for dependency in requires + after
+            if dependency not in self._steps and
+            dependency not in self._values
+        ]
+        if unknown:
+            raise ValueError(u'Step "{0}" of {1} depends on unknown steps {2}'
+                             .format(name, self.name, u', '.join(unknown)))
+        self._steps[name] = (function, requires, requires + after)
+
+    def provide(self, name, value):
+        """Add a step whose result is already known, for example an entity
+        given by the caller instead of being created.
+        """
+        self._check_name(name)
+        self._values[name] = value
+
+    @staticmethod
+    def _run_step(name, function, args, done):
+        """Run a step function and put its outcome in the ``done`` queue.
+
+        Exceptions which are not an ``Exception``, like ``KeyboardInterrupt``
+        or the pytest skip and fail outcomes, are put in the queue too so
+        :meth:`run` does not wait forever for the step.
+        """
+        start = time.time()
+        try:
+            result, error = function(*args), None
+        except BaseException as err:
+            result, error = None, err
+        done.put((name, result, error, start, time.time()))
+
+    def run(self):
+        """Run all the steps of the plan.
+
+        :return: A dict mapping each step name to its result.
+        :raise SetupStepError: If a step raised an exception.
+
+        A step raising an exception which is not an ``Exception``, like
+        ``KeyboardInterrupt`` or a pytest skip, cancels the pending steps too
+        but the exception is raised as is.
+        """
+        results = dict(self._values)
+        pending = OrderedDict(self._steps)
+        running = set()
+        done = queue.Queue()
+        failure = None
+        del self.trace[:]
+        workers = (
+            self.max_workers or settings.setup_workers or SETUP_MAX_WORKERS)
+        pool = ThreadPool(max(1, min(workers, len(pending))))
+        plan_start = time.time()
+        try:
+            while pending or running:
+                if failure is None:
+                    for name, step in list(pending.items()):
+                        function, requires, dependencies = step
+                        if all(dep in results for dep in dependencies):
+                            del pending[name]
+                            running.add(name)
+                            pool.apply_async(self._run_step, (
+                                name,
+                                function,
+                                [results[dep] for dep in requires],
+                                done,
+                            ))
+                if not running:
+                    break
+                name, result, error, start, end = done.get()
+                running.discard(name)
+                metrics.SETUP_STEP_SECONDS.observe(
+                    end - start, plan=self.name, step=name)
+                self.trace.append({
+                    'step': name,
+                    'status': 'done' if error is None else 'failed',
+                    'start': start - plan_start,
+                    'elapsed': end - start,
+                })
+                if error is None:
+                    results[name] = result
+                elif failure is None or (
+                        isinstance(failure[1], Exception) and
+                        not isinstance(error, Exception)):
+                    failure = (name, error)
+        finally:
+            pool.close()
+            pool.join()
+        for name in pending:
+            self.trace.append({
+                'step': name,
+                'status': 'cancelled',
+                'start': None,
+                'elapsed': None,
+            })
+        logger.info(
+            u'%s took %.2fs:\n%s',
+            self.name,
+            time.time() - plan_start,
+            u'\n'.join(
+                u'  {0}: {1}'.format(entry['step'], entry['status'])
+                if entry['start'] is None else
+                u'  {0}: {1} at {2:.2f}s in {3:.2f}s'.format(
+                    entry['step'],
+                    entry['status'],
+                    entry['start'],
+                    entry['elapsed'],
+                )
+                for entry in self.trace
+            )
+        )
+        if failure is not None:
+            if not isinstance(failure[1], Exception):
+                raise failure[1]
+            raise SetupStepError(
+                self.name, failure[0], failure[1], list(pending))
+        return results
+
+
 def create_object(cli_object, options, values):
     """
     Creates <object> with dictionary of arguments.
@@ -102,7 +327,11 @@ def create_object(cli_object, options, values):
     :param cli_object: A valid CLI object.
     :param dict options: The default options accepted by the cli_object
         create
-    :param dict values: Custom values to override default ones.
+    :param dict values: Custom values to override default ones. They are
+        checked against ``options``, or against the options of the create
+        command found in the hammer commands index when the
+        ``hammer_validate_options`` setting is enabled and the command is
+        indexed.
     :raise robottelo.cli.factory.CLIFactoryError: Raise an exception if object
         cannot be created.
     :rtype: dict
@@ -110,7 +339,16 @@ def create_object(cli_object, options, values):
 
     """
     if values:
-        diff = set(values.keys()).difference(set(options.keys()))
+        supported = None
+        if settings.hammer_validate_options:
+            try:
+                supported = command_index.get_index().options(
+                    u'{0} create'.format(cli_object.command_base))
+            except DataFileError:
+                pass
+        if supported is None:
+            supported = options.keys()
+        diff = set(values.keys()).difference(supported)
         if diff:
             logger.debug(
                 "Option(s) {0} not supported by CLI factory. Please check for "
@@ -1337,62 +1575,234 @@ def make_host(options=None):
     return create_object(Host, args, options)
 
 
-@cacheable
-def make_fake_host(options=None):
-    """Wrapper function for make_host to pass all required options for creation
-    of a fake host
+#: Options of make_fake_host telling which default entities are used
+FAKE_HOST_DEFAULT_KEYS = (
+    'architecture',
+    'architecture-id',
+    'domain',
+    'domain-id',
+    'location',
+    'location-id',
+    'medium',
+    'medium-id',
+    'operatingsystem',
+    'operatingsystem-id',
+    'organization',
+    'organization-id',
+    'partition-table',
+    'partition-table-id',
+)
+
+
+class DefaultEntities(object):
+    """The default Satellite entities used by the CLI factory functions,
+    looked up once and remembered.
+
+    The organization, location, domain, architecture and RHEL operating
+    system are looked up together in a single ssh command the first time an
+    entity is needed. The partition table is looked up when it is first
+    needed. An entity which is not found is created.
+
+    Entities are the dicts returned by hammer, which all have an ``id``. The
+    operating system and partition table are rows of a list command: the
+    operating system has a ``title`` but no ``name``. Call
+    :meth:`invalidate` after changing or deleting one of them. Use the
+    :data:`default_entities` instance::
+
+        org_id = default_entities.get('organization')['id']
+
     """
-    if options is None:
-        options = {}
 
-    # Try to use default Satellite entities, otherwise create them if they were
-    # not passed or defined previously
-    if not options.get('organization') and not options.get('organization-id'):
+    #: The names of the entities
+    NAMES = (
+        'organization',
+        'location',
+        'domain',
+        'architecture',
+        'operatingsystem',
+        'partition-table',
+    )
+
+    def __init__(self):
+        # Resolving an entity may need other entities, so the lock is
+        # re-entrant
+        self._lock = threading.RLock()
+        self._entities = {}
+        self._warmed = False
+
+    @staticmethod
+    def _searches():
+        """Return the CLI class and search of the entities looked up
+        together, by entity name.
+        """
+        return OrderedDict((
+            ('organization', (Org, u'name="{0}"'.format(DEFAULT_ORG))),
+            ('location', (Location, u'name="{0}"'.format(DEFAULT_LOC))),
+            ('domain', (Domain, u'name="{0}"'.format(
+                settings.server.hostname.partition('.')[-1]))),
+            ('architecture', (Architecture, u'name="{0}"'.format(
+                DEFAULT_ARCHITECTURE))),
+            ('operatingsystem', (
+                OperatingSys,
+                u'name="RedHat" AND major="{0}" OR major="{1}"'.format(
+                    RHEL_6_MAJOR_VERSION, RHEL_7_MAJOR_VERSION),
+            )),
+        ))
+
+    def warm(self):
+        """Look up the organization, location, domain, architecture and
+        operating system in a single ssh command.
+
+        Entities which are not found, or whose list command failed, are
+        looked up again or created when they are needed. Errors running the
+        ssh command are raised, and the look up is tried again by the next
+        call.
+        """
+        with self._lock:
+            searches = [
+                (name, cli, search)
+                for name, (cli, search) in self._searches().items()
+                if name not in self._entities
+            ]
+            if not searches:
+                self._warmed = True
+                return
+            user, password = Base._get_username_password()
+            commands = [
+                cli._construct_command({u'search': search}, 'list')
+                for _, cli, search in searches
+            ]
+            responses = ssh.command_batch(
+                [
+                    cli._hammer_command_line(
+                        command, user, password, output_format='csv')
+                    for (_, cli, _), command in zip(searches, commands)
+                ],
+                output_format='csv',
+                timeout=None,
+            )
+            self._warmed = True
+            for (name, cli, _), command, response in zip(
+                    searches, commands, responses):
+                try:
+                    rows = cli._handle_response(response, command=command)
+                except CLIReturnCodeError as err:
+                    logger.warning(
+                        u'Failed to look up the default %s: %s', name, err)
+                    continue
+                if rows:
+                    self._entities[name] = rows[0]
+
+    def get(self, name):
+        """Return the default entity called ``name``, one of :attr:`NAMES`,
+        looking it up or creating it if needed.
+        """
+        if name not in self.NAMES:
+            raise ValueError(u'Unknown default entity {0}'.format(name))
+        with self._lock:
+            if not self._warmed:
+                self.warm()
+            if name not in self._entities:
+                self._entities[name] = getattr(
+                    self, '_resolve_' + name.replace('-', '_'))()
+            return self._entities[name]
+
+    def invalidate(self, *names):
+        """Forget the given entities, or all of them, so they are looked up
+        again when needed.
+        """
+        with self._lock:
+            if not names:
+                self._entities.clear()
+                self._warmed = False
+            for name in names:
+                self._entities.pop(name, None)
+
+    def _resolve_organization(self):
         try:
-            options['organization-id'] = Org.info({'name': DEFAULT_ORG})['id']
+            return Org.info({'name': DEFAULT_ORG})
         except CLIReturnCodeError:
-            options['organization-id'] = make_org()['id']
-    if not options.get('location') and not options.get('location-id'):
+            return make_org()
+
+    def _resolve_location(self):
         try:
-            options['location-id'] = Location.info({'name': DEFAULT_LOC})['id']
+            return Location.info({'name': DEFAULT_LOC})
         except CLIReturnCodeError:
-            options['location-id'] = make_location()['id']
-    if not options.get('domain') and not options.get('domain-id'):
+            return make_location()
+
+    def _resolve_domain(self):
         try:
-            options['domain-id'] = Domain.info({
-                'name': settings.server.hostname.partition('.')[-1]})['id']
+            return Domain.info({
+                'name': settings.server.hostname.partition('.')[-1]})
         except CLIReturnCodeError:
-            options['domain-id'] = make_domain({
-                'location-ids': options.get('location-id'),
-                'locations': options.get('location'),
-                'organization-ids': options.get('organization-id'),
-                'organizations': options.get('organization'),
-            })['id']
-    if not options.get('architecture') and not options.get('architecture-id'):
+            return make_domain({
+                'location-ids': self.get('location')['id'],
+                'organization-ids': self.get('organization')['id'],
+            })
+
+    def _resolve_architecture(self):
         try:
-            options['architecture-id'] = Architecture.info({
-                'name': DEFAULT_ARCHITECTURE})['id']
+            return Architecture.info({'name': DEFAULT_ARCHITECTURE})
         except CLIReturnCodeError:
-            options['architecture-id'] = make_architecture()['id']
-    if (not options.get('operatingsystem') and
-            not options.get('operatingsystem-id')):
+            return make_architecture()
+
+    def _resolve_operatingsystem(self):
         try:
-            options['operatingsystem-id'] = OperatingSys.list({
-                    'search': 'name="RedHat" AND major="{0}" OR major="{1}"'
-                              .format(
-                                   RHEL_6_MAJOR_VERSION,
-                                   RHEL_7_MAJOR_VERSION
-                              )
-            })[0]['id']
+            return OperatingSys.list({
+                'search': 'name="RedHat" AND major="{0}" OR major="{1}"'
+                          .format(RHEL_6_MAJOR_VERSION, RHEL_7_MAJOR_VERSION)
+            })[0]
         except IndexError:
-            options['operatingsystem-id'] = make_os({
-                'architecture-ids': options.get('architecture-id'),
-                'architectures': options.get('architecture'),
-                'partition-table-ids': options.get('partition-table-id'),
-                'partition-tables': options.get('partition-table'),
-            })['id']
-    if (not options.get('partition-table') and
-            not options.get('partition-table-id')):
+            return make_os({
+                'architecture-ids': self.get('architecture')['id'],
+            })
+
+    def _resolve_partition_table(self):
+        try:
+            return PartitionTable.list({
+                'operatingsystem-id': self.get('operatingsystem')['id'],
+            })[0]
+        except IndexError:
+            return make_partition_table({
+                'location-ids': self.get('location')['id'],
+                'operatingsystem-ids': self.get('operatingsystem')['id'],
+                'organization-ids': self.get('organization')['id'],
+            })
+
+
+#: The default entities of the test session
+default_entities = DefaultEntities()
+
+
+def _fake_host_defaults(options):
+    """Add to ``options`` the ids of the entities a fake host needs and
+    which are not given, using the default Satellite entities.
+
+    A new medium is created unless one is given, so a test changing or
+    deleting the medium of its host does not affect other hosts.
+
+    :return: The updated ``options``.
+    """
+    given = dict(
+        (key, options[key]) for key in FAKE_HOST_DEFAULT_KEYS
+        if options.get(key)
+    )
+    for name in (
+            'organization',
+            'location',
+            'domain',
+            'architecture',
+            'operatingsystem'):
+        if name not in given and u'{0}-id'.format(name) not in given:
+            options[u'{0}-id'.format(name)] = default_entities.get(name)['id']
+    ptable_given = 'partition-table' in given or 'partition-table-id' in given
+    os_given = 'operatingsystem' in given or 'operatingsystem-id' in given
+    if not ptable_given and not os_given:
+        options['partition-table-id'] = default_entities.get(
+            'partition-table')['id']
+    elif not ptable_given:
+        # The default partition table may not be used by the given operating
+        # system
         try:
             options['partition-table-id'] = PartitionTable.list({
                 'operatingsystem': options.get('operatingsystem'),
@@ -1406,19 +1816,27 @@ def make_fake_host(options=None):
                 'organization-ids': options.get('organization-id'),
                 'organizations': options.get('organization'),
             })['id']
+    if 'medium' in given or 'medium-id' in given:
+        return options
+    options['medium-id'] = make_medium({
+        'location-ids': options.get('location-id'),
+        'locations': options.get('location'),
+        'operatingsystems': options.get('operatingsystem'),
+        'operatingsystem-ids': options.get('operatingsystem-id'),
+        'organization-ids': options.get('organization-id'),
+        'organizations': options.get('organization'),
+    })['id']
+    return options
 
-    # Finally, create a new medium (if none was passed)
-    if not options.get('medium') and not options.get('medium-id'):
-        options['medium-id'] = make_medium({
-            'location-ids': options.get('location-id'),
-            'locations': options.get('location'),
-            'operatingsystems': options.get('operatingsystem'),
-            'operatingsystem-ids': options.get('operatingsystem-id'),
-            'organization-ids': options.get('organization-id'),
-            'organizations': options.get('organization'),
-        })['id']
 
-    return make_host(options)
+@cacheable
+def make_fake_host(options=None):
+    """Wrapper function for make_host to pass all required options for creation
+    of a fake host
+    """
+    if options is None:
+        options = {}
+    return make_host(_fake_host_defaults(options))
 
 
 @cacheable
@@ -2333,6 +2751,122 @@ def make_smart_variable(options=None):
     return create_object(SmartVariable, args, options)
 
 
+class MakeManyError(CLIFactoryError):
+    """Indicates some of the entities of :func:`make_many` could not be
+    created.
+
+    :param str factory: The name of the factory function.
+    :param list results: The created entities, in the order they were
+        requested, ``None`` for the entities which could not be created.
+    :param dict errors: The exception raised for each entity which could not
+        be created, by its index in ``results``.
+
+    """
+
+    def __init__(self, factory, results, errors):
+        self.factory = factory
+        self.results = results
+        self.errors = errors
+        msg = u'Failed to create {0} of {1} entities with {2}:\n{3}'.format(
+            len(errors),
+            len(results),
+            factory,
+            u'\n'.join(
+                u'{0}: {1}'.format(
+                    index, getattr(errors[index], 'msg', None) or
+                    errors[index])
+                for index in sorted(errors)
+            ),
+        )
+        super(MakeManyError, self).__init__(msg)
+
+
+#: The option names and the function filling the options shared by the
+#: entities of :func:`make_many`, for the factory functions which look up
+#: other entities before creating theirs
+_MAKE_MANY_SHARED_OPTIONS = {
+    'make_fake_host': (FAKE_HOST_DEFAULT_KEYS, _fake_host_defaults),
+}
+
+
+def make_many(factory, count, options_fn=None, workers=None):
+    """Create many entities with a factory function.
+
+    The entities are created at the same time over pooled ssh connections,
+    at most ``workers`` of them. Running all the creations in a single
+    remote script would start their hammer processes one after another,
+    which takes most of the time of a creation.
+
+    The default entities looked up by ``make_fake_host`` are resolved once
+    for all the hosts using the same organization, location, domain,
+    architecture, operating system, partition table and medium options,
+    and the hosts share the medium created for them.
+
+    Example::
+
+        users = make_many(make_user, 100, lambda index: {
+            u'login': u'user{0}'.format(index)})
+
+    :param factory: A factory function, e.g. ``make_user``.
+    :param int count: The number of entities to create.
+    :param options_fn: A function called with the index of each entity and
+        returning the options given to ``factory``. Entities are created
+        with the default options if it is not given.
+    :param int workers: The maximum number of entities created at the same
+        time, :data:`MAKE_MANY_WORKERS` by default.
+    :return: A list of the created entities, in the order of their index.
+    :raise MakeManyError: If some entities could not be created. The
+        entities which were created are in its ``results``.
+
+    """
+    if count <= 0:
+        return []
+    options_list = [
+        options_fn(index) if options_fn is not None else None
+        for index in range(count)
+    ]
+    shared = _MAKE_MANY_SHARED_OPTIONS.get(factory.__name__)
+    if shared is not None:
+        keys, resolve = shared
+        resolved = {}
+        for index, options in enumerate(options_list):
+            options = dict(options or {})
+            group = dict(
+                (key, options[key]) for key in keys if options.get(key))
+            group_key = json.dumps(
+                group, default=six.text_type, sort_keys=True)
+            if group_key not in resolved:
+                resolved[group_key] = resolve(group)
+            options.update(resolved[group_key])
+            options_list[index] = options
+
+    def create(index):
+        try:
+            return index, factory(options_list[index]), None
+        except Exception as err:
+            return index, None, err
+
+    results = [None] * count
+    errors = {}
+    start = time.time()
+    pool = ThreadPool(max(1, min(workers or MAKE_MANY_WORKERS, count)))
+    try:
+        for index, result, error in pool.imap_unordered(create, range(count)):
+            if error is None:
+                results[index] = result
+            else:
+                errors[index] = error
+    finally:
+        pool.close()
+        pool.join()
+    logger.info(
+        u'Created %d of %d entities with %s in %.2fs',
+        count - len(errors), count, factory.__name__, time.time() - start)
+    if errors:
+        raise MakeManyError(factory.__name__, results, errors)
+    return results
+
+
 def activationkey_add_subscription_to_repo(options=None):
     """
     Adds subscription to activation key.
@@ -2384,6 +2918,134 @@ def activationkey_add_subscription_to_repo(options=None):
                 )
 
 
+def _add_org_and_environment_steps(plan, options):
+    """Add the ``org`` and ``lce`` steps of the org setup helpers to a plan,
+    creating the organization and lifecycle environment only if their ids
+    are not in ``options``.
+    """
+    if options.get('organization-id') is None:
+        plan.add('org', lambda: make_org()['id'])
+    else:
+        plan.provide('org', options['organization-id'])
+    if options.get('lifecycle-environment-id') is None:
+        plan.add(
+            'lce',
+            lambda org_id: make_lifecycle_environment(
+                {u'organization-id': org_id})['id'],
+            requires=['org'],
+        )
+    else:
+        plan.provide('lce', options['lifecycle-environment-id'])
+
+
+def _add_content_view_steps(plan, options, repository_step, after=()):
+    """Add the steps of the org setup helpers which create the content view
+    if needed, add the repository to it, publish it, promote it to the
+    lifecycle environment and associate the activation key with it.
+
+    The ``content-view`` and ``activation-key`` steps return the id of the
+    content view and activation key.
+    """
+    if options.get('content-view-id') is None:
+        plan.add(
+            'content-view',
+            lambda org_id: make_content_view(
+                {u'organization-id': org_id})['id'],
+            requires=['org'],
+        )
+    else:
+        plan.provide('content-view', options['content-view-id'])
+
+    def add_repository(cv_id, org_id, repository):
+        try:
+            ContentView.add_repository({
+                u'id': cv_id,
+                u'organization-id': org_id,
+                u'repository-id': repository['id'],
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to add repository to content view\n{0}'
+                .format(err.msg)
+            )
+
+    def publish(cv_id):
+        try:
+            ContentView.publish({u'id': cv_id})
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to publish new version of content view\n{0}'
+                .format(err.msg)
+            )
+
+    def promote(cv_id, org_id, env_id):
+        # Get the version id
+        try:
+            cvv = ContentView.info({u'id': cv_id})['versions'][-1]
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to fetch content view info\n{0}'.format(err.msg))
+        # Promote version to next env
+        try:
+            ContentView.version_promote({
+                u'id': cvv['id'],
+                u'organization-id': org_id,
+                u'to-lifecycle-environment-id': env_id,
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to promote version to next environment\n{0}'
+                .format(err.msg)
+            )
+
+    def activation_key(cv_id, org_id, env_id):
+        if options.get('activationkey-id') is None:
+            return make_activation_key({
+                u'content-view-id': cv_id,
+                u'lifecycle-environment-id': env_id,
+                u'organization-id': org_id,
+            })['id']
+        # Given activation key may have no (or different) CV associated.
+        # Associate activation key with CV just to be sure
+        try:
+            ActivationKey.update({
+                u'content-view-id': cv_id,
+                u'id': options['activationkey-id'],
+                u'organization-id': org_id,
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to associate activation-key with CV\n{0}'
+                .format(err.msg)
+            )
+        return options['activationkey-id']
+
+    plan.add(
+        'add-repository',
+        add_repository,
+        requires=['content-view', 'org', repository_step],
+        after=after,
+    )
+    plan.add(
+        'publish',
+        publish,
+        requires=['content-view'],
+        after=['add-repository'],
+    )
+    plan.add(
+        'promote',
+        promote,
+        requires=['content-view', 'org', 'lce'],
+        after=['publish'],
+    )
+    plan.add(
+        'activation-key',
+        activation_key,
+        requires=['content-view', 'org', 'lce'],
+        after=['promote'],
+    )
+
+
 def setup_org_for_a_custom_repo(options=None):
     """Sets up Org for the given custom repo by:
 
@@ -2398,6 +3060,10 @@ def setup_org_for_a_custom_repo(options=None):
         associates it with the content view.
     5. Adds the custom repo subscription to the activation key
 
+    Steps which don't depend on each other, like creating the lifecycle
+    environment and the product, run at the same time, see
+    :class:`SetupPlan`.
+
     Options::
 
         url - URL to custom repository
@@ -2418,99 +3084,57 @@ def setup_org_for_a_custom_repo(options=None):
             not options or
             not options.get('url')):
         raise CLIFactoryError('Please provide valid custom repo URL.')
+    plan = SetupPlan(u'setup_org_for_a_custom_repo')
     # Create new organization and lifecycle environment if needed
-    if options.get('organization-id') is None:
-        org_id = make_org()['id']
-    else:
-        org_id = options['organization-id']
-    if options.get('lifecycle-environment-id') is None:
-        env_id = make_lifecycle_environment({u'organization-id': org_id})['id']
-    else:
-        env_id = options['lifecycle-environment-id']
+    _add_org_and_environment_steps(plan, options)
     # Create custom product and repository
-    custom_product = make_product({u'organization-id': org_id})
-    custom_repo = make_repository({
-        u'content-type': 'yum',
-        u'product-id': custom_product['id'],
-        u'url': options.get('url'),
-    })
+    plan.add(
+        'product',
+        lambda org_id: make_product({u'organization-id': org_id}),
+        requires=['org'],
+    )
+    plan.add(
+        'repository',
+        lambda product: make_repository({
+            u'content-type': 'yum',
+            u'product-id': product['id'],
+            u'url': options.get('url'),
+        }),
+        requires=['product'],
+    )
+
     # Synchronize custom repository
-    try:
-        Repository.synchronize({'id': custom_repo['id']})
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to synchronize repository\n{0}'.format(err.msg))
-    # Create CV if needed and associate repo with it
-    if options.get('content-view-id') is None:
-        cv_id = make_content_view({u'organization-id': org_id})['id']
-    else:
-        cv_id = options['content-view-id']
-    try:
-        ContentView.add_repository({
-            u'id': cv_id,
-            u'organization-id': org_id,
-            u'repository-id': custom_repo['id'],
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to add repository to content view\n{0}'.format(err.msg))
-    # Publish a new version of CV
-    try:
-        ContentView.publish({u'id': cv_id})
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to publish new version of content view\n{0}'
-            .format(err.msg)
-        )
-    # Get the version id
-    cvv = ContentView.info({u'id': cv_id})['versions'][-1]
-    # Promote version to next env
-    try:
-        ContentView.version_promote({
-            u'id': cvv['id'],
-            u'organization-id': org_id,
-            u'to-lifecycle-environment-id': env_id,
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to promote version to next environment\n{0}'
-            .format(err.msg)
-        )
-    # Create activation key if needed and associate content view with it
-    if options.get('activationkey-id') is None:
-        activationkey_id = make_activation_key({
-            u'content-view-id': cv_id,
-            u'lifecycle-environment-id': env_id,
-            u'organization-id': org_id,
-        })['id']
-    else:
-        activationkey_id = options['activationkey-id']
-        # Given activation key may have no (or different) CV associated.
-        # Associate activation key with CV just to be sure
+    def synchronize(repository):
         try:
-            ActivationKey.update({
-                u'content-view-id': cv_id,
-                u'id': activationkey_id,
-                u'organization-id': org_id,
-            })
+            Repository.synchronize({'id': repository['id']})
         except CLIReturnCodeError as err:
             raise CLIFactoryError(
-                u'Failed to associate activation-key with CV\n{0}'
-                .format(err.msg)
-            )
+                u'Failed to synchronize repository\n{0}'.format(err.msg))
+
+    plan.add('sync', synchronize, requires=['repository'])
+    # Create CV if needed, associate repo with it, publish, promote and
+    # associate the activation key
+    _add_content_view_steps(plan, options, 'repository', after=['sync'])
     # Add subscription to activation-key
-    activationkey_add_subscription_to_repo({
-        u'activationkey-id': activationkey_id,
-        u'organization-id': org_id,
-        u'subscription': custom_product['name'],
-    })
+    plan.add(
+        'subscription',
+        lambda activationkey_id, org_id, product: (
+            activationkey_add_subscription_to_repo({
+                u'activationkey-id': activationkey_id,
+                u'organization-id': org_id,
+                u'subscription': product['name'],
+            })
+        ),
+        requires=['activation-key', 'org', 'product'],
+    )
+    results = plan.run()
     return {
-        u'activationkey-id': activationkey_id,
-        u'content-view-id': cv_id,
-        u'lifecycle-environment-id': env_id,
-        u'organization-id': org_id,
-        u'product-id': custom_product['id'],
-        u'repository-id': custom_repo['id'],
+        u'activationkey-id': results['activation-key'],
+        u'content-view-id': results['content-view'],
+        u'lifecycle-environment-id': results['lce'],
+        u'organization-id': results['org'],
+        u'product-id': results['product']['id'],
+        u'repository-id': results['repository']['id'],
     }
 
 
@@ -2529,6 +3153,10 @@ def setup_org_for_a_rh_repo(options=None):
         associates it with the content view.
     6. Adds the RH repo subscription to the activation key
 
+    Steps which don't depend on each other, like creating the lifecycle
+    environment and uploading the manifest, run at the same time, see
+    :class:`SetupPlan`.
+
     Options::
 
         product - RH product name
@@ -2556,132 +3184,87 @@ def setup_org_for_a_rh_repo(options=None):
             not options.get('repository')):
         raise CLIFactoryError(
             'Please provide valid product, repository-set and repo.')
+    plan = SetupPlan(u'setup_org_for_a_rh_repo')
     # Create new organization and lifecycle environment if needed
-    if options.get('organization-id') is None:
-        org_id = make_org()['id']
-    else:
-        org_id = options['organization-id']
-    if options.get('lifecycle-environment-id') is None:
-        env_id = make_lifecycle_environment({u'organization-id': org_id})['id']
-    else:
-        env_id = options['lifecycle-environment-id']
+    _add_org_and_environment_steps(plan, options)
+
     # Clone manifest and upload it
-    with manifests.clone() as manifest:
-        upload_file(manifest.content, manifest.filename)
-    try:
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org_id,
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to upload manifest\n{0}'.format(err.msg))
+    def upload_manifest(org_id):
+        with manifests.clone() as manifest:
+            upload_file(manifest.content, manifest.filename)
+        try:
+            Subscription.upload({
+                u'file': manifest.filename,
+                u'organization-id': org_id,
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to upload manifest\n{0}'.format(err.msg))
+
     # Enable repo from Repository Set
-    try:
-        RepositorySet.enable({
-            u'basearch': 'x86_64',
-            u'name': options['repository-set'],
-            u'organization-id': org_id,
-            u'product': options['product'],
-            u'releasever': options.get('releasever'),
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to enable repository set\n{0}'.format(err.msg))
+    def enable(org_id):
+        try:
+            RepositorySet.enable({
+                u'basearch': 'x86_64',
+                u'name': options['repository-set'],
+                u'organization-id': org_id,
+                u'product': options['product'],
+                u'releasever': options.get('releasever'),
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to enable repository set\n{0}'.format(err.msg))
+
     # Fetch repository info
-    try:
-        rhel_repo = Repository.info({
-            u'name': options['repository'],
-            u'organization-id': org_id,
-            u'product': options['product'],
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to fetch repository info\n{0}'.format(err.msg))
+    def repository_info(org_id):
+        try:
+            return Repository.info({
+                u'name': options['repository'],
+                u'organization-id': org_id,
+                u'product': options['product'],
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to fetch repository info\n{0}'.format(err.msg))
+
     # Synchronize the RH repository
-    try:
-        Repository.synchronize({
-            u'name': options['repository'],
-            u'organization-id': org_id,
-            u'product': options['product'],
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to synchronize repository\n{0}'.format(err.msg))
-    # Create CV if needed and associate repo with it
-    if options.get('content-view-id') is None:
-        cv_id = make_content_view({u'organization-id': org_id})['id']
-    else:
-        cv_id = options['content-view-id']
-    try:
-        ContentView.add_repository({
-            u'id': cv_id,
-            u'organization-id': org_id,
-            u'repository-id': rhel_repo['id'],
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to add repository to content view\n{0}'.format(err.msg))
-    # Publish a new version of CV
-    try:
-        ContentView.publish({u'id': cv_id})
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to publish new version of content view\n{0}'
-            .format(err.msg)
-        )
-    # Get the version id
-    try:
-        cvv = ContentView.info({u'id': cv_id})['versions'][-1]
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to fetch content view info\n{0}'.format(err.msg))
-    # Promote version1 to next env
-    try:
-        ContentView.version_promote({
-            u'id': cvv['id'],
-            u'organization-id': org_id,
-            u'to-lifecycle-environment-id': env_id,
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to promote version to next environment\n{0}'
-            .format(err.msg)
-        )
-    # Create activation key if needed and associate content view with it
-    if options.get('activationkey-id') is None:
-        activationkey_id = make_activation_key({
-            u'content-view-id': cv_id,
-            u'lifecycle-environment-id': env_id,
-            u'organization-id': org_id,
-        })['id']
-    else:
-        activationkey_id = options['activationkey-id']
-        # Given activation key may have no (or different) CV associated.
-        # Associate activation key with CV just to be sure
+    def synchronize(org_id):
         try:
-            ActivationKey.update({
-                u'id': activationkey_id,
+            Repository.synchronize({
+                u'name': options['repository'],
                 u'organization-id': org_id,
-                u'content-view-id': cv_id,
+                u'product': options['product'],
             })
         except CLIReturnCodeError as err:
             raise CLIFactoryError(
-                u'Failed to associate activation-key with CV\n{0}'
-                .format(err.msg)
-            )
+                u'Failed to synchronize repository\n{0}'.format(err.msg))
+
+    plan.add('manifest', upload_manifest, requires=['org'])
+    plan.add('enable', enable, requires=['org'], after=['manifest'])
+    plan.add('repository', repository_info, requires=['org'], after=['enable'])
+    plan.add('sync', synchronize, requires=['org'], after=['enable'])
+    # Create CV if needed, associate repo with it, publish, promote and
+    # associate the activation key
+    _add_content_view_steps(plan, options, 'repository', after=['sync'])
     # Add subscription to activation-key
-    activationkey_add_subscription_to_repo({
-        u'organization-id': org_id,
-        u'activationkey-id': activationkey_id,
-        u'subscription': DEFAULT_SUBSCRIPTION_NAME,
-    })
+    plan.add(
+        'subscription',
+        lambda activationkey_id, org_id: (
+            activationkey_add_subscription_to_repo({
+                u'organization-id': org_id,
+                u'activationkey-id': activationkey_id,
+                u'subscription': DEFAULT_SUBSCRIPTION_NAME,
+            })
+        ),
+        requires=['activation-key', 'org'],
+    )
+    results = plan.run()
     return {
-        u'activationkey-id': activationkey_id,
-        u'content-view-id': cv_id,
-        u'lifecycle-environment-id': env_id,
-        u'organization-id': org_id,
-        u'repository-id': rhel_repo['id'],
+        u'activationkey-id': results['activation-key'],
+        u'content-view-id': results['content-view'],
+        u'lifecycle-environment-id': results['lce'],
+        u'organization-id': results['org'],
+        u'repository-id': results['repository']['id'],
     }
 
 
@@ -2691,6 +3274,9 @@ def configure_env_for_provision(org=None, loc=None):
     previously created entities and create a hostgroup using all mentioned
     entities.
 
+    Steps which don't depend on each other, like the content setup and the
+    network setup, run at the same time, see :class:`SetupPlan`.
+
     :param org: Default Organization that should be used in both host
         discovering and host provisioning procedures
     :param loc: Default Location that should be used in both host
@@ -2698,224 +3284,304 @@ def configure_env_for_provision(org=None, loc=None):
     :return: List of created entities that can be re-used further in
         provisioning or validation procedure (e.g. hostgroup or subnet)
     """
+    plan = SetupPlan(u'configure_env_for_provision')
     # Create new organization and location in case they were not passed
     if org is None:
-        org = make_org()
+        plan.add('org', make_org)
+    else:
+        plan.provide('org', org)
     if loc is None:
-        loc = make_location()
+        plan.add('loc', make_location)
+    else:
+        plan.provide('loc', loc)
 
     # Create a new Lifecycle environment
-    lce = make_lifecycle_environment({'organization-id': org['id']})
+    plan.add(
+        'lce',
+        lambda org: make_lifecycle_environment({'organization-id': org['id']}),
+        requires=['org'],
+    )
 
     # Create a Product, Repository for custom content and sync it
-    new_product = make_product({'organization-id': org['id']})
-    new_repo = make_repository({
-        'product-id': new_product['id'],
-        'url': settings.rhel7_os,
-    })
-    Repository.synchronize({'id': new_repo['id']})
+    plan.add(
+        'product',
+        lambda org: make_product({'organization-id': org['id']}),
+        requires=['org'],
+    )
+    plan.add(
+        'repository',
+        lambda product: make_repository({
+            'product-id': product['id'],
+            'url': settings.rhel7_os,
+        }),
+        requires=['product'],
+    )
+    plan.add(
+        'sync',
+        lambda repo: Repository.synchronize({'id': repo['id']}),
+        requires=['repository'],
+    )
 
     # Content View should be promoted to be used with LC Env
-    cv = make_content_view({'organization-id': org['id']})
-    ContentView.add_repository({
-        'id': cv['id'],
-        'organization-id': org['id'],
-        'repository-id': new_repo['id'],
-    })
-    ContentView.publish({'id': cv['id']})
-    cv = ContentView.info({'id': cv['id']})
-    ContentView.version_promote({
-        'id': cv['versions'][0]['id'],
-        'to-lifecycle-environment-id': lce['id'],
-    })
+    def content_view(org, repo, lce):
+        cv = make_content_view({'organization-id': org['id']})
+        ContentView.add_repository({
+            'id': cv['id'],
+            'organization-id': org['id'],
+            'repository-id': repo['id'],
+        })
+        ContentView.publish({'id': cv['id']})
+        cv = ContentView.info({'id': cv['id']})
+        ContentView.version_promote({
+            'id': cv['versions'][0]['id'],
+            'to-lifecycle-environment-id': lce['id'],
+        })
+        return cv
+
+    plan.add(
+        'content-view',
+        content_view,
+        requires=['org', 'repository', 'lce'],
+        after=['sync'],
+    )
 
     # Create puppet environment and associate organization and location
-    env = make_environment({
-        'location-ids': loc['id'],
-        'organization-ids': org['id'],
-    })
+    plan.add(
+        'environment',
+        lambda org, loc: make_environment({
+            'location-ids': loc['id'],
+            'organization-ids': org['id'],
+        }),
+        requires=['org', 'loc'],
+    )
 
     # Search for SmartProxy, and associate location
-    puppet_proxy = Proxy.info({'id': Proxy.list()[0]['id']})
-    Proxy.update({
-        'id': puppet_proxy['id'],
-        'locations': list(set(puppet_proxy['locations']) | {loc['name']}),
-    })
+    def proxy(loc):
+        puppet_proxy = Proxy.info({'id': Proxy.list()[0]['id']})
+        Proxy.update({
+            'id': puppet_proxy['id'],
+            'locations': list(set(puppet_proxy['locations']) | {loc['name']}),
+        })
+        return puppet_proxy
+
+    plan.add('proxy', proxy, requires=['loc'])
 
     # Network
     # Search for existing domain or create new otherwise. Associate org,
     # location and dns to it
-    _, _, domain_name = settings.server.hostname.partition('.')
-    domain = Domain.list({'search': 'name={0}'.format(domain_name)})
-    if len(domain) == 1:
-        domain = Domain.info({'id': domain[0]['id']})
-        Domain.update({
-            'name': domain_name,
-            'locations': list(set(domain['locations']) | {loc['name']}),
-            'organizations': list(
-                set(domain['organizations']) | {org['name']}),
-            'dns-id': puppet_proxy['id'],
-        })
-    else:
-        # Create new domain
-        domain = make_domain({
-            'name': domain_name,
-            'location-ids': loc['id'],
-            'organization-ids': org['id'],
-            'dns-id': puppet_proxy['id'],
-        })
+    def domain(org, loc, puppet_proxy):
+        _, _, domain_name = settings.server.hostname.partition('.')
+        domain = Domain.list({'search': 'name={0}'.format(domain_name)})
+        if len(domain) == 1:
+            domain = Domain.info({'id': domain[0]['id']})
+            Domain.update({
+                'name': domain_name,
+                'locations': list(set(domain['locations']) | {loc['name']}),
+                'organizations': list(
+                    set(domain['organizations']) | {org['name']}),
+                'dns-id': puppet_proxy['id'],
+            })
+        else:
+            # Create new domain
+            domain = make_domain({
+                'name': domain_name,
+                'location-ids': loc['id'],
+                'organization-ids': org['id'],
+                'dns-id': puppet_proxy['id'],
+            })
+        return domain
+
+    plan.add('domain', domain, requires=['org', 'loc', 'proxy'])
+
     # Search if subnet is defined with given network. If so, just update its
     # relevant fields otherwise create new subnet
-    network = settings.vlan_networking.subnet
-    subnet = Subnet.list({'search': 'network={0}'.format(network)})
-    if len(subnet) == 1:
-        subnet = Subnet.info({'id': subnet[0]['id']})
-        Subnet.update({
-            'name': subnet['name'],
-            'domains': list(set(subnet['domains']) | {domain['name']}),
-            'locations': list(set(subnet['locations']) | {loc['name']}),
-            'organizations': list(
-                set(subnet['organizations']) | {org['name']}),
-            'dhcp-id': puppet_proxy['id'],
-            'dns-id': puppet_proxy['id'],
-            'tftp-id': puppet_proxy['id'],
-        })
-    else:
-        # Create new subnet
-        subnet = make_subnet({
-            'name': gen_string('alpha'),
-            'network': network,
-            'mask': settings.vlan_networking.netmask,
-            'domain-ids': domain['id'],
-            'location-ids': loc['id'],
-            'organization-ids': org['id'],
-            'dhcp-id': puppet_proxy['id'],
-            'dns-id': puppet_proxy['id'],
-            'tftp-id': puppet_proxy['id'],
-        })
+    def subnet(org, loc, puppet_proxy, domain):
+        network = settings.vlan_networking.subnet
+        subnet = Subnet.list({'search': 'network={0}'.format(network)})
+        if len(subnet) == 1:
+            subnet = Subnet.info({'id': subnet[0]['id']})
+            Subnet.update({
+                'name': subnet['name'],
+                'domains': list(set(subnet['domains']) | {domain['name']}),
+                'locations': list(set(subnet['locations']) | {loc['name']}),
+                'organizations': list(
+                    set(subnet['organizations']) | {org['name']}),
+                'dhcp-id': puppet_proxy['id'],
+                'dns-id': puppet_proxy['id'],
+                'tftp-id': puppet_proxy['id'],
+            })
+        else:
+            # Create new subnet
+            subnet = make_subnet({
+                'name': gen_string('alpha'),
+                'network': network,
+                'mask': settings.vlan_networking.netmask,
+                'domain-ids': domain['id'],
+                'location-ids': loc['id'],
+                'organization-ids': org['id'],
+                'dhcp-id': puppet_proxy['id'],
+                'dns-id': puppet_proxy['id'],
+                'tftp-id': puppet_proxy['id'],
+            })
+        return subnet
+
+    plan.add('subnet', subnet, requires=['org', 'loc', 'proxy', 'domain'])
 
     # Search if Libvirt compute-resource already exists. If so, just update its
     # relevant fields otherwise, create new compute-resource with 'libvirt'
     # provider.
-    current_libvirt_url = (
-        LIBVIRT_RESOURCE_URL % settings.compute_resources.libvirt_hostname
-    )
+    def compute_resource(org, loc):
+        current_libvirt_url = (
+            LIBVIRT_RESOURCE_URL % settings.compute_resources.libvirt_hostname
+        )
 
-    comp_resources = [
-        ComputeResource.info({'id': comp_res['id']}) for comp_res
-        in ComputeResource.list()
-    ]
-    libvirt_resources = [
-        comp_res for comp_res in comp_resources
-        if comp_res['url'] == 'url={0}'.format(current_libvirt_url) and
-        comp_res['provider'] == FOREMAN_PROVIDERS['libvirt']
-    ]
-    if len(libvirt_resources) >= 1:
-        libvirt_res = ComputeResource.info({'id': libvirt_resources[0]['id']})
-        ComputeResource.update({
-            'id': libvirt_res['id'],
-            'locations': list(set(libvirt_res['locations']) | {loc['name']}),
-            'organizations': list(
-                set(libvirt_res['organizations']) | {org['name']}),
-        })
-    else:
-        # Create Libvirt compute-resource
-        make_compute_resource({
-            'name': gen_string('alpha'),
-            'provider': 'libvirt',
-            'url': current_libvirt_url,
-            'set-console-password': False,
-            'display-type': 'VNC',
-            'location-ids': loc['id'],
-            'organization-ids': org['id'],
-        })
+        comp_resources = [
+            ComputeResource.info({'id': comp_res['id']}) for comp_res
+            in ComputeResource.list()
+        ]
+        libvirt_resources = [
+            comp_res for comp_res in comp_resources
+            if comp_res['url'] == 'url={0}'.format(current_libvirt_url) and
+            comp_res['provider'] == FOREMAN_PROVIDERS['libvirt']
+        ]
+        if len(libvirt_resources) >= 1:
+            libvirt_res = ComputeResource.info(
+                {'id': libvirt_resources[0]['id']})
+            ComputeResource.update({
+                'id': libvirt_res['id'],
+                'locations': list(
+                    set(libvirt_res['locations']) | {loc['name']}),
+                'organizations': list(
+                    set(libvirt_res['organizations']) | {org['name']}),
+            })
+        else:
+            # Create Libvirt compute-resource
+            make_compute_resource({
+                'name': gen_string('alpha'),
+                'provider': 'libvirt',
+                'url': current_libvirt_url,
+                'set-console-password': False,
+                'display-type': 'VNC',
+                'location-ids': loc['id'],
+                'organization-ids': org['id'],
+            })
 
-    # Get the Partition table entity
-    ptable = PartitionTable.info({'name': DEFAULT_PTABLE})
+    plan.add('compute-resource', compute_resource, requires=['org', 'loc'])
 
-    # Get the OS entity
-    os = OperatingSys.list({
-        'search': 'name="RedHat" AND major="{0}" OR major="{1}"'.format(
-            RHEL_6_MAJOR_VERSION, RHEL_7_MAJOR_VERSION)
-    })[0]
+    # Get the Partition table entity
+    plan.add('ptable', lambda: PartitionTable.info({'name': DEFAULT_PTABLE}))
 
     # Get proper Provisioning templates and update with OS, Org, Location
-    provisioning_template = Template.info({'name': DEFAULT_TEMPLATE})
-    pxe_template = Template.info({'name': DEFAULT_PXE_TEMPLATE})
-    for template in provisioning_template, pxe_template:
-        if os['title'] not in template['operating-systems']:
-            Template.update({
-                'id': template['id'],
-                'locations': list(set(template['locations']) | {loc['name']}),
-                'operatingsystems': list(
-                    set(template['operating-systems']) | {os['title']}),
-                'organizations': list(
-                    set(template['organizations']) | {org['name']}),
-            })
+    def templates(org, loc):
+        # Get the OS entity
+        os = default_entities.get('operatingsystem')
+        provisioning_template = Template.info({'name': DEFAULT_TEMPLATE})
+        pxe_template = Template.info({'name': DEFAULT_PXE_TEMPLATE})
+        for template in provisioning_template, pxe_template:
+            if os['title'] not in template['operating-systems']:
+                Template.update({
+                    'id': template['id'],
+                    'locations': list(
+                        set(template['locations']) | {loc['name']}),
+                    'operatingsystems': list(
+                        set(template['operating-systems']) | {os['title']}),
+                    'organizations': list(
+                        set(template['organizations']) | {org['name']}),
+                })
+        # The OS templates include the ones updated above
+        return OperatingSys.info({'id': os['id']}), (
+            provisioning_template, pxe_template)
+
+    plan.add('templates', templates, requires=['org', 'loc'])
 
     # Get the architecture entity
-    arch = Architecture.list(
-        {'search': 'name={0}'.format(DEFAULT_ARCHITECTURE)})[0]
+    plan.add('arch', lambda: default_entities.get('architecture'))
 
-    os = OperatingSys.info({'id': os['id']})
     # Get the media and update its location
-    medium = Medium.list({'organization-id': org['id']})
-    if medium:
-        media = Medium.info({'id': medium[0]['id']})
-        Medium.update({
-            'id': media['id'],
-            'operatingsystems': list(
-                set(media['operating-systems']) | {os['title']}),
-            'locations': list(set(media['locations']) | {loc['name']}),
+    def medium(org, loc, templates):
+        os = templates[0]
+        medium = Medium.list({'organization-id': org['id']})
+        if medium:
+            media = Medium.info({'id': medium[0]['id']})
+            Medium.update({
+                'id': media['id'],
+                'operatingsystems': list(
+                    set(media['operating-systems']) | {os['title']}),
+                'locations': list(set(media['locations']) | {loc['name']}),
+            })
+        else:
+            media = make_medium({
+                'location-ids': loc['id'],
+                'operatingsystem-ids': os['id'],
+                'organization-ids': org['id'],
+            })
+        return media
+
+    plan.add('medium', medium, requires=['org', 'loc', 'templates'])
+
+    # Update the OS with found arch, ptable, templates and media
+    def operating_system(templates, arch, media, ptable):
+        os, os_templates = templates
+        OperatingSys.update({
+            'id': os['id'],
+            'architectures': list(set(os['architectures']) | {arch['name']}),
+            'media': list(set(os['installation-media']) | {media['name']}),
+            'partition-tables': list(
+                set(os['partition-tables']) | {ptable['name']}),
         })
-    else:
-        media = make_medium({
+        for template in os_templates:
+            if '{} ({})'.format(template['name'], template['type']) not in os[
+                    'templates']:
+                OperatingSys.update({
+                    'id': os['id'],
+                    'config-templates': list(
+                        set(os['templates']) | {template['name']}),
+                })
+        return os
+
+    plan.add(
+        'os',
+        operating_system,
+        requires=['templates', 'arch', 'medium', 'ptable'],
+    )
+
+    # Create new hostgroup using proper entities
+    def hostgroup(loc, env, lce, puppet_proxy, cv, domain, subnet, org, arch,
+                  ptable, media, os):
+        return make_hostgroup({
             'location-ids': loc['id'],
-            'operatingsystem-ids': os['id'],
+            'environment-id': env['id'],
+            'lifecycle-environment-id': lce['id'],
+            'puppet-proxy-id': puppet_proxy['id'],
+            'puppet-ca-proxy-id': puppet_proxy['id'],
+            'content-view-id': cv['id'],
+            'domain-id': domain['id'],
+            'subnet-id': subnet['id'],
             'organization-ids': org['id'],
+            'architecture-id': arch['id'],
+            'partition-table-id': ptable['id'],
+            'medium-id': media['id'],
+            'operatingsystem-id': os['id'],
+            'content-source-id': puppet_proxy['id'],
         })
 
-    # Update the OS with found arch, ptable, templates and media
-    OperatingSys.update({
-        'id': os['id'],
-        'architectures': list(set(os['architectures']) | {arch['name']}),
-        'media': list(set(os['installation-media']) | {media['name']}),
-        'partition-tables': list(
-            set(os['partition-tables']) | {ptable['name']}),
-    })
-    for template in (provisioning_template, pxe_template):
-        if '{} ({})'.format(template['name'], template['type']) not in os[
-                'templates']:
-            OperatingSys.update({
-                'id': os['id'],
-                'config-templates': list(
-                    set(os['templates']) | {template['name']}),
-            })
-
-    # Create new hostgroup using proper entities
-    hostgroup = make_hostgroup({
-        'location-ids': loc['id'],
-        'environment-id': env['id'],
-        'lifecycle-environment-id': lce['id'],
-        'puppet-proxy-id': puppet_proxy['id'],
-        'puppet-ca-proxy-id': puppet_proxy['id'],
-        'content-view-id': cv['id'],
-        'domain-id': domain['id'],
-        'subnet-id': subnet['id'],
-        'organization-ids': org['id'],
-        'architecture-id': arch['id'],
-        'partition-table-id': ptable['id'],
-        'medium-id': media['id'],
-        'operatingsystem-id': os['id'],
-        'content-source-id': puppet_proxy['id'],
-    })
+    plan.add(
+        'hostgroup',
+        hostgroup,
+        requires=[
+            'loc', 'environment', 'lce', 'proxy', 'content-view', 'domain',
+            'subnet', 'org', 'arch', 'ptable', 'medium', 'os',
+        ],
+        after=['compute-resource'],
+    )
+    results = plan.run()
 
     return {
-        'hostgroup': hostgroup,
-        'subnet': subnet,
-        'domain': domain,
-        'ptable': ptable,
-        'os': os
+        'hostgroup': results['hostgroup'],
+        'subnet': results['subnet'],
+        'domain': results['domain'],
+        'ptable': results['ptable'],
+        'os': results['os'],
     }
 
 
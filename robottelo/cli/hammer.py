@@ -4,10 +4,16 @@ import json
 
 import re
 import six
+import threading
+from cachetools import LRUCache
 from six import text_type
-from six.moves import cStringIO as StringIO
 from six.moves import zip
 
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:  # pragma: no cover
+    from collections import Mapping, Sequence  # Python 2
+
 
 def _csv_reader(output):
     """An unicode CSV reader which processes unicode strings and return unicode
@@ -28,12 +34,14 @@ def _csv_reader(output):
     :return: generator that will yield a list of unicode string values.
 
     """
-    data = '\n'.join(output)
+    # Lines are fed one at a time, so a streamed output is never fully loaded
+    # in memory. The newline is kept for values spanning many lines.
     if six.PY2:
-        data = data.encode('utf8')
-    handler = StringIO(data)
+        lines = (u'{0}\n'.format(line).encode('utf8') for line in output)
+    else:
+        lines = (u'{0}\n'.format(line) for line in output)
 
-    for row in csv.reader(handler):
+    for row in csv.reader(lines):
         if six.PY2:
             yield [value.decode('utf8') for value in row]
         else:
@@ -46,11 +54,20 @@ def _normalize(header):
     return header.replace(' ', '-').lower()
 
 
-def parse_json(stdout):
+def parse_json(stdout, lazy=False):
     """Parse JSON output from Hammer CLI and convert it to python dictionary
     while normalizing keys.
+
+    :param stdout: The JSON output, as text or UTF-8 encoded bytes.
+    :param bool lazy: Return read-only views of the parsed output instead of
+        normalized copies, see :class:`JSONObject`.
     """
+    if isinstance(stdout, six.binary_type) and not six.PY2:
+        # json.loads only accepts bytes from Python 3.6
+        stdout = stdout.decode('utf-8')
     parsed = json.loads(stdout)
+    if lazy:
+        return _json_view(parsed)
     return _normalize_obj(parsed)
 
 
@@ -68,13 +85,210 @@ def _normalize_obj(obj):
     return obj
 
 
-def parse_csv(output):
-    """Parse CSV output from Hammer CLI and convert it to python dictionary."""
+#: The maximum number of keys kept by the key caches. JSON outputs have
+#: data-dependent keys, like host facts and parameters, so the caches are
+#: bounded and only the most recently used keys are shared.
+KEYS_CACHE_SIZE = 4096
+
+_KEYS = LRUCache(maxsize=KEYS_CACHE_SIZE)
+_KEYS_LOCK = threading.Lock()
+
+
+def _intern_key(key):
+    """Return a single shared instance of each normalized header key."""
+    with _KEYS_LOCK:
+        return _KEYS.setdefault(key, key)
+
+
+class CSVRow(Mapping):
+    """A read-only row of CSV output from Hammer CLI.
+
+    All the rows of an output share the mapping of the keys to their
+    positions, so each row only keeps the list of its values instead of a
+    whole ``dict``. Rows compare equal to a ``dict`` with the same items.
+    """
+    __slots__ = ('_header', '_values')
+
+    def __init__(self, header, values):
+        #: A tuple ``(keys, positions)`` shared by all the rows, positions
+        #: maps each key to its indexes in the values
+        self._header = header
+        self._values = values
+
+    def __getitem__(self, key):
+        # Positions are sorted from the last, which wins for duplicated keys
+        for index in self._header[1].get(key, ()):
+            if index < len(self._values):
+                return self._values[index]
+        raise KeyError(key)
+
+    def __iter__(self):
+        keys, positions = self._header
+        for key in keys:
+            if positions[key][-1] < len(self._values):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return (CSVRow, (self._header, self._values))
+
+
+_NORMALIZED_KEYS = LRUCache(maxsize=KEYS_CACHE_SIZE)
+
+
+def _normalize_key(key):
+    """Return the normalized form of a JSON key, computing it only once while
+    it is in the cache.
+    """
+    with _KEYS_LOCK:
+        normalized = _NORMALIZED_KEYS.get(key)
+    if normalized is None:
+        normalized = _intern_key(_normalize(key))
+        with _KEYS_LOCK:
+            _NORMALIZED_KEYS[key] = normalized
+    return normalized
+
+
+def _json_view(value):
+    """Return the value seen through a JSON view, converted like
+    :func:`_normalize_obj` does.
+    """
+    # json only builds these exact types, which are faster to check than
+    # with isinstance, and bool is not converted as it is not an int here
+    value_type = type(value)
+    if value_type is dict:
+        return JSONObject(value)
+    elif value_type is list:
+        return JSONArray(value)
+    elif value_type is int:
+        return text_type(value)
+    return value
+
+
+class JSONObject(Mapping):
+    """A read-only view of an object of JSON output from Hammer CLI.
+
+    It gives the same items as :func:`parse_json` without copying the parsed
+    object: keys are normalized when the view is first used and values are
+    converted when they are accessed. Views compare equal to a ``dict`` with
+    the same items.
+    """
+    __slots__ = ('_raw', '_keys')
+
+    def __init__(self, raw):
+        self._raw = raw
+        #: Maps the normalized keys to the keys of the parsed object
+        self._keys = None
+
+    def _index(self):
+        if self._keys is None:
+            self._keys = dict(
+                (_normalize_key(key), key) for key in self._raw)
+        return self._keys
+
+    def __getitem__(self, key):
+        return _json_view(self._raw[self._index()[key]])
+
+    def __contains__(self, key):
+        return key in self._index()
+
+    def __iter__(self):
+        return iter(self._index())
+
+    def __len__(self):
+        return len(self._index())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return (JSONObject, (self._raw,))
+
+
+class JSONArray(Sequence):
+    """A read-only view of an array of JSON output from Hammer CLI.
+
+    Items are seen through JSON views, see :class:`JSONObject`. Views compare
+    equal to a ``list`` with the same items.
+    """
+    __slots__ = ('_raw',)
+    __hash__ = None
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [_json_view(value) for value in self._raw[index]]
+        return _json_view(self._raw[index])
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, JSONArray)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            item == other_item for item, other_item in zip(self, other))
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __reduce__(self):
+        return (JSONArray, (self._raw,))
+
+
+def iter_csv(output, compact=False):
+    """Parse CSV output from Hammer CLI yielding a python dictionary for each
+    row as soon as it is read.
+
+    :param output: an iterable of lines, like the ``SSHCommandStream``
+        returned by ``ssh.command_stream``.
+    :param bool compact: Yield read-only ``CSVRow`` objects, which use less
+        memory than dictionaries, instead of dictionaries.
+    """
     reader = _csv_reader(output)
     # Generate the key names, spaces will be converted to dashes "-"
-    keys = [_normalize(header) for header in next(reader)]
+    try:
+        keys = [_intern_key(_normalize(header)) for header in next(reader)]
+    except StopIteration:
+        return
+    if compact:
+        # Duplicated keys are kept once with the last value, like dict does
+        positions = {}
+        for index, key in enumerate(keys):
+            positions[key] = (index,) + positions.get(key, ())
+        header = (
+            tuple(key for index, key in enumerate(keys)
+                  if positions[key][-1] == index),
+            positions
+        )
+        for values in reader:
+            if len(values) > 0:
+                yield CSVRow(header, values)
+        return
     # For each entry, create a dict mapping each key with each value
-    return [dict(zip(keys, values)) for values in reader if len(values) > 0]
+    for values in reader:
+        if len(values) > 0:
+            yield dict(zip(keys, values))
+
+
+def parse_csv(output, compact=False):
+    """Parse CSV output from Hammer CLI and convert it to python dictionary.
+
+    :param bool compact: Return read-only ``CSVRow`` objects, which use less
+        memory than dictionaries, instead of dictionaries.
+    """
+    return list(iter_csv(output, compact))
 
 
 def parse_help(output):
@@ -141,9 +355,88 @@ def parse_help(output):
     return contents
 
 
+def diff_command_trees(old, new, command='hammer'):
+    """Compare two hammer command trees as generated by
+    ``scripts/hammer_command_tree.py``.
+
+    :param dict old: The previous tree, or ``None`` if the command is new.
+    :param dict new: The current tree, or ``None`` if the command was
+        removed.
+    :param str command: The command at the root of the trees.
+    :return: A dict mapping each command which changed to a dict with the
+        ``added_command`` and ``removed_command`` flags and the sorted lists
+        of ``added_options``, ``removed_options``, ``added_subcommands`` and
+        ``removed_subcommands``, when not empty.
+    """
+    old = old or {}
+    new = new or {}
+    old_options = set(option['name'] for option in old.get('options', ()))
+    new_options = set(option['name'] for option in new.get('options', ()))
+    old_subcommands = dict(
+        (subcommand['name'], subcommand)
+        for subcommand in old.get('subcommands', ())
+    )
+    new_subcommands = dict(
+        (subcommand['name'], subcommand)
+        for subcommand in new.get('subcommands', ())
+    )
+    diff = {}
+    for key, value in (
+            ('added_options', new_options - old_options),
+            ('removed_options', old_options - new_options),
+            ('added_subcommands', set(new_subcommands) - set(old_subcommands)),
+            ('removed_subcommands',
+             set(old_subcommands) - set(new_subcommands))):
+        if value:
+            diff[key] = sorted(value)
+    differences = {}
+    if diff or not old or not new:
+        diff['added_command'] = not old
+        diff['removed_command'] = not new
+        differences[command] = diff
+    for name in set(old_subcommands) | set(new_subcommands):
+        differences.update(diff_command_trees(
+            old_subcommands.get(name),
+            new_subcommands.get(name),
+            u'{0} {1}'.format(command, name),
+        ))
+    return differences
+
+
+# Item of a numbered list like " 1) template1"
+_INFO_NUMBERED_ITEM_REGEX = re.compile(r'\d+\)\s+(.+)$')
+# Number starting the first key of each dict of a numbered list
+_INFO_NUMBERED_KEY_REGEX = re.compile(r'(\d+)\)')
+_INFO_NUMBER_REGEX = re.compile(r'\d+\)')
+
+
 def parse_info(output):
-    """Parse the info output and returns a dict mapping the values."""
-    # info dictionary
+    """Parse the info output and returns a dict mapping the values.
+
+    The lines are read in a single pass, each line is either a ``key:
+    value`` property, a ``key:`` group of sub-properties or, when indented, a
+    sub-property. Sub-properties can be:
+
+    * ``key: value`` or ``key => value`` pairs, collected in a dict::
+
+        GPG:
+            GPG Key ID: 1
+
+    * numbered groups of pairs, collected in a list of dicts::
+
+        Content:
+         1) Repo Name: repo1
+            URL:       /custom/4f84fc90-9ffa-...
+         2) Repo Name: puppet1
+            URL:       /custom/4f84fc90-9ffa-...
+
+    * single values, optionally numbered, collected in a list::
+
+        Template
+         1) template1
+         2) template2
+
+    """
     contents = {}
     sub_prop = None  # stores name of the last group of sub-properties
     sub_num = None  # is not None when list of properties
@@ -152,71 +445,53 @@ def parse_info(output):
         # skip empty lines
         if line == '':
             continue
-        if line.startswith(' '):  # sub-properties are indented
-            # values are separated by ':' or '=>', but not by '::' which can be
-            # entity name like 'test::params::keys'
-            if line.find(':') != -1 and not line.find('::') != -1:
-                key, value = line.lstrip().split(":", 1)
-            elif line.find('=>') != -1:
-                key, value = line.lstrip().split(" =>", 1)
-            else:
-                key = value = None
-
-            if key is None and value is None:
-                # Parse single attribute collection properties
-                # Template
-                #  1) template1
-                #  2) template2
-                #
-                # or
-                # Template
-                #  template1
-                #  template2
-                match = re.match(r'\d+\)\s+(.+)$', line.lstrip())
-
-                if match is None:
-                    match = re.match(r'(.*)$', line.lstrip())
-
-                value = match.group(1)
-
-                if isinstance(contents[sub_prop], dict):
-                    contents[sub_prop] = []
-
-                contents[sub_prop].append(value)
-            else:
-                # some properties have many numbered values
-                # Example:
-                # Content:
-                #  1) Repo Name: repo1
-                #     URL:       /custom/4f84fc90-9ffa-...
-                #  2) Repo Name: puppet1
-                #     URL:       /custom/4f84fc90-9ffa-...
-                starts_with_number = re.match(r'(\d+)\)', key)
-                if starts_with_number:
-                    sub_num = int(starts_with_number.group(1))
-                    # no. 1) we need to change dict() to list()
-                    if sub_num == 1:
-                        contents[sub_prop] = []
-                    # remove number from key
-                    key = re.sub(r'\d+\)', '', key)
-                    # append empty dict to array
-                    contents[sub_prop].append({})
-
-                key = key.lstrip().replace(' ', '-').lower()
-
-                # add value to dictionary
-                if sub_num is not None:
-                    contents[sub_prop][-1][key] = value.lstrip()
-                else:
-                    contents[sub_prop][key] = value.lstrip()
-        else:
+        if not line.startswith(' '):
+            # 'key: value' line or 'key:' line starting new sub-properties
             sub_num = None  # new property implies no sub property
-            key, value = line.lstrip().split(":", 1)
+            key, value = line.split(':', 1)
             key = key.lstrip().replace(' ', '-').lower()
-            if value.lstrip() == '':  # 'key:' no value, new sub-property
+            value = value.lstrip()
+            if value:
+                contents[key] = value
+            else:
                 sub_prop = key
                 contents[sub_prop] = {}
-            else:  # 'key: value' line
-                contents[key] = value.lstrip()
+            continue
+
+        # sub-properties are indented
+        line = line.lstrip()
+        # values are separated by ':' or '=>', but not by '::' which can be
+        # entity name like 'test::params::keys'
+        if ':' in line and '::' not in line:
+            key, value = line.split(':', 1)
+        elif '=>' in line:
+            key, value = line.split(' =>', 1)
+        else:
+            # single attribute collection properties
+            match = _INFO_NUMBERED_ITEM_REGEX.match(line)
+            if match is not None:
+                line = match.group(1)
+            values = contents[sub_prop]
+            if isinstance(values, dict):
+                values = contents[sub_prop] = []
+            values.append(line)
+            continue
+
+        # numbered sub-properties start a new dict
+        match = key[:1].isdigit() and _INFO_NUMBERED_KEY_REGEX.match(key)
+        if match:
+            sub_num = int(match.group(1))
+            # no. 1) we need to change dict() to list()
+            if sub_num == 1:
+                contents[sub_prop] = []
+            # remove number from key
+            key = _INFO_NUMBER_REGEX.sub('', key)
+            contents[sub_prop].append({})
+
+        key = key.lstrip().replace(' ', '-').lower()
+        if sub_num is not None:
+            contents[sub_prop][-1][key] = value.lstrip()
+        else:
+            contents[sub_prop][key] = value.lstrip()
 
     return contents
@@ -0,0 +1,266 @@
+# -*- encoding: utf-8 -*-
+"""Persistent ``hammer shell`` sessions.
+
+Running ``hammer`` for every CLI command means paying the ruby interpreter
+start up and the hammer plugins loading on each call. A ``hammer shell``
+session loads hammer once and then runs every command written to its standard
+input.
+
+To be able to tell where the output of each command ends, a small ruby file is
+preloaded into the shell process. It makes the shell write a marker line with
+the exit code of each command to ``stdout`` and a marker line to ``stderr``
+after the command finishes, and disables the shell prompt.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+
+from robottelo import ssh
+from robottelo.config import settings
+from six.moves import StringIO
+
+logger = logging.getLogger(__name__)
+
+_PRELOAD_SCRIPT = u'''\
+require 'readline'
+$stdout.sync = true
+$stderr.sync = true
+
+module RobotteloHammerShell
+  MARKER = ENV.fetch('ROBOTTELO_HAMMER_MARKER')
+
+  module Command
+    def run(*args)
+      exit_code = super
+    ensure
+      exit_code = 70 unless exit_code.is_a?(Integer)
+      $stdout.print("\\n#{MARKER} #{exit_code}\\n")
+      $stderr.print("\\n#{MARKER}\\n")
+    end
+  end
+
+  module Input
+    def readline(_prompt = '', add_history = false)
+      unless HammerCLI::MainCommand.ancestors.include?(Command)
+        HammerCLI::MainCommand.send(:prepend, Command)
+      end
+      super('', add_history)
+    end
+  end
+end
+
+Readline.singleton_class.send(:prepend, RobotteloHammerShell::Input)
+'''
+
+
+class HammerShellError(Exception):
+    """Indicates that the ``hammer shell`` session is not usable anymore."""
+
+
+class HammerShell(object):
+    """A long-lived ``hammer shell`` process running on the server.
+
+    Commands are run one at a time, calls from different threads are
+    serialized.
+
+    :param str username: Foreman user used by the shell session.
+    :param str password: Password of the Foreman user.
+    :param str hostname: The server to run the shell on. If it is ``None``
+        ``hostname`` from configuration's ``server`` section will be used.
+
+    """
+
+    def __init__(self, username, password, hostname=None):
+        self.username = username
+        self.password = password
+        self.hostname = hostname
+        self._lock = threading.Lock()
+        self._marker = u'ROBOTTELO-{0}'.format(uuid.uuid4().hex)
+        self._preload_path = u'/tmp/robottelo-hammer-shell-{0}.rb'.format(
+            self._marker)
+        self._connection = None
+        self._channel = None
+        self._stdout = b''
+        self._stderr = b''
+
+    @property
+    def alive(self):
+        """Tell whether the shell process is running."""
+        return (
+            self._channel is not None and
+            not self._channel.closed and
+            not self._channel.exit_status_ready()
+        )
+
+    def start(self):
+        """Start the shell process over a dedicated ssh connection."""
+        self._connection = ssh.get_client(hostname=self.hostname)
+        sftp = self._connection.open_sftp()
+        try:
+            sftp.putfo(StringIO(_PRELOAD_SCRIPT), self._preload_path)
+        finally:
+            sftp.close()
+        self._stdout = self._stderr = b''
+        self._channel = self._connection.get_transport().open_session()
+        self._channel.exec_command(
+            u'LANG={0} TERM=dumb RUBYOPT=-r{1} ROBOTTELO_HAMMER_MARKER={2} '
+            u'hammer -v -u {3} -p {4} shell'.format(
+                settings.locale,
+                self._preload_path,
+                self._marker,
+                self.username,
+                self.password,
+            ).encode('utf-8')
+        )
+        logger.debug('Started hammer shell %s', self._marker)
+        # Discard the shell welcome message
+        self._run(u'--help', timeout=None)
+
+    def close(self):
+        """Terminate the shell process and close its connection."""
+        if self._connection is None:
+            return
+        try:
+            if self.alive:
+                self._channel.sendall(b'exit\n')
+            ssh.execute_command(
+                u'rm -f {0}'.format(self._preload_path), self._connection)
+        except Exception as err:  # pragma: no cover
+            logger.debug('Failed to close hammer shell cleanly: %s', err)
+        finally:
+            self._connection.close()
+            self._connection = self._channel = None
+            logger.debug('Closed hammer shell %s', self._marker)
+
+    def _read_until_marker(self, deadline):
+        """Read the shell output until both marker lines are found.
+
+        :return: A tuple ``(stdout, stderr, return_code)`` with the raw output
+            of the last command.
+        """
+        marker = u'\n{0}'.format(self._marker).encode('utf-8')
+        out_end = err_end = -1
+        while out_end == -1 or err_end == -1:
+            if self._channel.recv_ready():
+                self._stdout += self._channel.recv(65536)
+            elif self._channel.recv_stderr_ready():
+                self._stderr += self._channel.recv_stderr(65536)
+            elif self._channel.exit_status_ready():
+                raise HammerShellError(
+                    'hammer shell exited with status {0}'.format(
+                        self._channel.recv_exit_status())
+                )
+            elif deadline is not None and time.time() > deadline:
+                raise HammerShellError('hammer shell command timed out')
+            else:
+                time.sleep(0.005)
+            out_end = self._stdout.find(marker)
+            if out_end != -1 and self._stdout.find(b'\n', out_end + 1) == -1:
+                out_end = -1  # exit code not fully received yet
+            err_end = self._stderr.find(marker)
+        stdout = self._stdout[:out_end]
+        status_line, _, self._stdout = (
+            self._stdout[out_end + len(marker):].partition(b'\n'))
+        stderr = self._stderr[:err_end]
+        self._stderr = self._stderr[err_end + len(marker):].partition(
+            b'\n')[2]
+        return stdout, stderr, int(status_line)
+
+    def _run(self, line, timeout):
+        """Write a command line to the shell and return its raw output."""
+        deadline = None if timeout is None else time.time() + timeout
+        self._channel.sendall(u'{0}\n'.format(line).encode('utf-8'))
+        stdout, stderr, return_code = self._read_until_marker(deadline)
+        # The shell may echo the command line when its input is not a tty
+        echo = u'{0}\n'.format(line).encode('utf-8')
+        if stdout.startswith(echo):
+            stdout = stdout[len(echo):]
+        return stdout, stderr, return_code
+
+    def run(self, command, output_format=None, timeout=None,
+            lazy_json=False):
+        """Run a hammer command in the shell.
+
+        :param str command: The hammer command, without the ``hammer`` and
+            credential options prefix.
+        :param str output_format: json, csv or None
+        :param int timeout: Seconds to wait for the command to finish. The
+            shell is closed if the command does not finish in time.
+        :param bool lazy_json: Parse the JSON output into read-only views.
+        :return: A ``SSHCommandResult`` as returned by ``ssh.command``.
+        :raises robottelo.cli.hammer_shell.HammerShellError: If the shell
+            process exits or the command times out.
+        """
+        if output_format:
+            command = u'--output={0} {1}'.format(output_format, command)
+        with self._lock:
+            if not self.alive:
+                self.close()
+                try:
+                    self.start()
+                except Exception:
+                    self.close()
+                    raise
+            logger.info('>>> [hammer shell] %s', command)
+            try:
+                stdout, stderr, return_code = self._run(command, timeout)
+            except Exception:
+                self.close()
+                raise
+        return ssh.build_command_result(
+            ssh.decode_to_utf8(stdout),
+            ssh.decode_to_utf8(stderr),
+            return_code,
+            output_format,
+            lazy_json=lazy_json
+        )
+
+
+_shells = {}
+_shells_lock = threading.Lock()
+
+
+def get_hammer_shell(username, password):
+    """Return the shell session of the current process for the given
+    credentials, creating it if needed.
+    """
+    key = (os.getpid(), username, password)
+    with _shells_lock:
+        shell = _shells.get(key)
+        if shell is None:
+            shell = _shells[key] = HammerShell(username, password)
+    return shell
+
+
+def command(cmd, username, password, output_format=None, timeout=None,
+            lazy_json=False):
+    """Run a hammer command in the shell session for the given credentials.
+
+    :param str cmd: The hammer command, without the ``hammer`` and credential
+        options prefix.
+    :param str username: Foreman user to run the command as.
+    :param str password: Password of the Foreman user.
+    :param str output_format: json, csv or None
+    :param int timeout: Seconds to wait for the command to finish.
+    :param bool lazy_json: Parse the JSON output into read-only views.
+    :return: A ``SSHCommandResult`` as returned by ``ssh.command``.
+    """
+    return get_hammer_shell(username, password).run(
+        cmd, output_format=output_format, timeout=timeout,
+        lazy_json=lazy_json)
+
+
+def close_hammer_shells():
+    """Close all shell sessions started by the current process."""
+    with _shells_lock:
+        shells = [
+            shell for key, shell in _shells.items() if key[0] == os.getpid()]
+        _shells.clear()
+    for shell in shells:
+        shell.close()
+
+
+atexit.register(close_hammer_shells)
@@ -28,6 +28,7 @@ class LifecycleEnvironment(Base):
 
     command_base = 'lifecycle-environment'
     command_requires_org = True
+    paginated_list = False
 
     @classmethod
     def list(cls, options=None, per_page=False):
@@ -67,9 +67,15 @@ class Repository(Base):
         return result
 
     @classmethod
-    def synchronize(cls, options, return_raw_response=None):
-        """Synchronizes a repository."""
+    def synchronize(cls, options, return_raw_response=None, async_=False):
+        """Synchronizes a repository.
+
+        With ``async_`` the id of the sync task is returned without waiting
+        for it to finish.
+        """
         cls.command_sub = 'synchronize'
+        if async_:
+            return cls._start_task(options)
         return cls.execute(
             cls._construct_command(options),
             output_format='csv',
@@ -30,6 +30,7 @@ class RepositorySet(Base):
     """
 
     command_base = 'repository-set'
+    paginated_list = False
 
     @classmethod
     def enable(cls, options):
@@ -32,10 +32,16 @@ class Subscription(Base):
     command_base = 'subscription'
 
     @classmethod
-    def upload(cls, options=None):
-        """Upload a subscription manifest."""
+    def upload(cls, options=None, async_=False):
+        """Upload a subscription manifest.
+
+        With ``async_`` the id of the import task is returned once the
+        manifest is uploaded, without waiting for it to be imported.
+        """
         cls.command_sub = 'upload'
         timeout = 900 if bz_bug_is_open(1339696) else 300
+        if async_:
+            return cls._start_task(options, timeout=timeout)
         return cls.execute(
             cls._construct_command(options),
             ignore_stderr=True,
@@ -52,9 +58,15 @@ class Subscription(Base):
         )
 
     @classmethod
-    def refresh_manifest(cls, options=None):
-        """Refreshes a subscription manifest."""
+    def refresh_manifest(cls, options=None, async_=False):
+        """Refreshes a subscription manifest.
+
+        With ``async_`` the id of the refresh task is returned without waiting
+        for it to finish.
+        """
         cls.command_sub = 'refresh-manifest'
+        if async_:
+            return cls._start_task(options)
         return cls.execute(
             cls._construct_command(options),
             ignore_stderr=True,
@@ -15,10 +15,27 @@ Subcommands::
     progress                      Show the progress of the task
     resume                        Resume all tasks paused in error state
 """
+import time
 
+from collections import OrderedDict
 from robottelo.cli.base import Base
 
 
+class TaskWaitError(Exception):
+    """Indicates that foreman tasks failed or did not finish in time.
+
+    :param str msg: explanation of the error
+    :param dict tasks: The tasks which finished, mapping their id to their
+        ``hammer task list`` row.
+    :param list pending: The ids of the tasks which did not finish.
+    """
+
+    def __init__(self, msg, tasks, pending=()):
+        super(TaskWaitError, self).__init__(msg)
+        self.tasks = tasks
+        self.pending = list(pending)
+
+
 class Task(Base):
     """
     Manipulates Foreman's task.
@@ -53,3 +70,88 @@ class Task(Base):
         """
         cls.command_sub = 'resume'
         return cls.execute(cls._construct_command(options))
+
+    @classmethod
+    def _poll(cls, task_ids):
+        """Return the ``hammer task list`` rows of some tasks.
+
+        The results are never taken from the read cache since the tasks state
+        is expected to change.
+        """
+        cls.command_sub = 'list'
+        return cls.execute(
+            cls._construct_command({
+                u'search': u' or '.join(
+                    u'id = {0}'.format(task_id) for task_id in task_ids),
+                u'per-page': len(task_ids),
+            }),
+            output_format='csv',
+        )
+
+    @classmethod
+    def wait_many(cls, task_ids, timeout=1800, poll_interval=1,
+                  max_poll_interval=30, chunk_size=50,
+                  raise_on_failure=True):
+        """Wait for many foreman tasks to finish.
+
+        All the running tasks are polled together, with a single ``hammer task
+        list`` command per ``chunk_size`` tasks. The time between polls starts
+        at ``poll_interval`` and doubles up to ``max_poll_interval``.
+
+        :param task_ids: The ids of the tasks, as returned by the CLI methods
+            called with ``async_=True``.
+        :param int timeout: Seconds to wait for all the tasks to finish.
+        :param float poll_interval: Seconds to wait before the second poll.
+        :param float max_poll_interval: Maximum seconds between two polls.
+        :param int chunk_size: Maximum number of tasks polled by a command.
+        :param bool raise_on_failure: Whether to raise an error if a task
+            failed.
+        :return: An ``OrderedDict`` mapping each task id to its ``hammer task
+            list`` row, with its ``state`` and ``result``.
+        :raises robottelo.cli.task.TaskWaitError: If the tasks do not finish
+            in time or, when ``raise_on_failure`` is ``True``, if a task
+            finished with an error or was paused.
+        """
+        pending = list(OrderedDict.fromkeys(task_ids))
+        finished = {}
+        deadline = time.time() + timeout
+        interval = poll_interval
+        while True:
+            for index in range(0, len(pending), chunk_size):
+                for row in cls._poll(pending[index:index + chunk_size]):
+                    if row.get('state') in ('stopped', 'paused'):
+                        finished[row['id']] = row
+            pending = [
+                task_id for task_id in pending if task_id not in finished]
+            if not pending:
+                break
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TaskWaitError(
+                    u'{0} task(s) did not finish in {1} seconds: {2}'.format(
+                        len(pending), timeout, u', '.join(pending)),
+                    finished,
+                    pending,
+                )
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, max_poll_interval)
+        tasks = OrderedDict(
+            (task_id, finished[task_id])
+            for task_id in OrderedDict.fromkeys(task_ids)
+        )
+        failed = [
+            task_id for task_id, row in tasks.items()
+            if row.get('state') == 'paused' or row.get('result') == 'error'
+        ]
+        if failed and raise_on_failure:
+            raise TaskWaitError(
+                u'{0} task(s) failed: {1}'.format(
+                    len(failed), u', '.join(
+                        u'{0} ({1})'.format(
+                            task_id, tasks[task_id].get('task-errors'))
+                        for task_id in failed
+                    )
+                ),
+                tasks,
+            )
+        return tasks
@@ -147,6 +147,7 @@ class UserGroupExternal(Base):
         update         Update external user group
     """
     command_base = 'user-group external'
+    paginated_list = False
 
     @classmethod
     def refresh(cls, options=None):
@@ -8,6 +8,7 @@ from functools import partial
 from logging import config
 from nailgun import entities, entity_mixins
 from nailgun.config import ServerConfig
+from robottelo.api import session as api_session
 from robottelo.config import casts
 from six.moves.urllib.parse import urlunsplit, urljoin
 from six.moves.configparser import (
@@ -740,9 +741,22 @@ class Settings(object):
         self._all_features = None
         self._configured = False
         self._validation_errors = []
+        self.api_pool_size = None
+        self.api_retries = None
         self.browser = None
+        self.cassette = None
+        self.cassette_latency = None
+        self.cassette_mode = None
         self.cdn = None
+        self.hammer_json_list = None
+        self.hammer_read_cache = None
+        self.hammer_read_cache_size = None
+        self.hammer_read_cache_ttl = None
+        self.hammer_shell = None
+        self.hammer_single_trip_create = None
+        self.hammer_validate_options = None
         self.locale = None
+        self.metrics_file = None
         self.project = None
         self.reader = None
         self.rhel6_repo = None
@@ -752,6 +766,7 @@ class Settings(object):
         self.capsule_repo = None
         self.sattools_repo = None
         self.screenshots_path = None
+        self.setup_workers = None
         self.saucelabs_key = None
         self.saucelabs_user = None
         self.server = ServerSettings()
@@ -841,10 +856,34 @@ class Settings(object):
              'mouseMoveTo'],
             list
         )
+        self.api_pool_size = self.reader.get(
+            'robottelo', 'api_pool_size', api_session.POOL_SIZE, int)
+        self.api_retries = self.reader.get(
+            'robottelo', 'api_retries', api_session.RETRIES, int)
         self.browser = self.reader.get(
             'robottelo', 'browser', 'selenium')
+        self.cassette = self.reader.get('robottelo', 'cassette', None)
+        self.cassette_latency = self.reader.get(
+            'robottelo', 'cassette_latency', False, bool)
+        self.cassette_mode = self.reader.get(
+            'robottelo', 'cassette_mode', 'replay')
         self.cdn = self.reader.get('robottelo', 'cdn', True, bool)
+        self.hammer_json_list = self.reader.get(
+            'robottelo', 'hammer_json_list', False, bool)
+        self.hammer_read_cache = self.reader.get(
+            'robottelo', 'hammer_read_cache', False, bool)
+        self.hammer_read_cache_size = self.reader.get(
+            'robottelo', 'hammer_read_cache_size', 1024, int)
+        self.hammer_read_cache_ttl = self.reader.get(
+            'robottelo', 'hammer_read_cache_ttl', 300, int)
+        self.hammer_shell = self.reader.get(
+            'robottelo', 'hammer_shell', False, bool)
+        self.hammer_single_trip_create = self.reader.get(
+            'robottelo', 'hammer_single_trip_create', False, bool)
+        self.hammer_validate_options = self.reader.get(
+            'robottelo', 'hammer_validate_options', False, bool)
         self.locale = self.reader.get('robottelo', 'locale', 'en_US.UTF-8')
+        self.metrics_file = self.reader.get('robottelo', 'metrics_file', None)
         self.project = self.reader.get('robottelo', 'project', 'sat')
         self.rhel6_repo = self.reader.get('robottelo', 'rhel6_repo', None)
         self.rhel7_repo = self.reader.get('robottelo', 'rhel7_repo', None)
@@ -855,6 +894,8 @@ class Settings(object):
             'robottelo', 'sattools_repo', None)
         self.screenshots_path = self.reader.get(
             'robottelo', 'screenshots_path', '/tmp/robottelo/screenshots')
+        self.setup_workers = self.reader.get(
+            'robottelo', 'setup_workers', 4, int)
         self.run_one_datapoint = self.reader.get(
             'robottelo', 'run_one_datapoint', False, bool)
         self.cleanup = self.reader.get('robottelo', 'cleanup', False, bool)
@@ -937,6 +978,9 @@ class Settings(object):
         returned by :meth:`robottelo.helpers.get_nailgun_config`. See
         ``robottelo.entity_mixins.Entity`` for more information on the effects
         of this.
+        * Send NailGun's requests through the keep-alive session of
+        :mod:`robottelo.api.session`, sized by ``api_pool_size`` and retrying
+        ``api_retries`` times.
         * Set a default value for ``nailgun.entities.GPGKey.content``.
         * Set the default value for
           ``nailgun.entities.DockerComputeResource.url``
@@ -949,6 +993,9 @@ class Settings(object):
             self.server.get_credentials(),
             verify=False,
         )
+        api_session.configure(
+            pool_size=self.api_pool_size, retries=self.api_retries)
+        api_session.install_nailgun_session()
 
         gpgkey_init = entities.GPGKey.__init__
 
@@ -10,6 +10,7 @@ import unittest2
 from functools import wraps
 from robottelo.helpers import get_func_name
 from robottelo.config import settings
+from robottelo.entity_cache import EntityCache, make_key, option_references
 from robottelo.constants import (
     BUGZILLA_URL,
     BZ_OPEN_STATUSES,
@@ -22,7 +23,9 @@ from xml.parsers.expat import ExpatError, ErrorString
 
 
 LOGGER = logging.getLogger(__name__)
-OBJECT_CACHE = {}
+#: The cache of the entities created by the :func:`cacheable` factory
+#: functions
+OBJECT_CACHE = EntityCache()
 
 # Test Tier Decorators
 # CRUD tests
@@ -163,21 +166,34 @@ def stubbed(reason=None):
 
 
 def cacheable(func):
-    """Decorator that makes an optional object cache available"""
+    """Decorator that makes an optional object cache available
+
+    The decorated factory function accepts a ``cached`` argument. When it is
+    ``True`` or a scope name (``'session'``, ``'module'`` or ``'class'``),
+    the entity is looked up in :data:`OBJECT_CACHE` under the factory
+    function name and its options, and it is only created and cached if it
+    was not found. ``True`` caches the entity for the whole session. See
+    :mod:`robottelo.entity_cache`.
+    """
 
     @wraps(func)
     def cacheable_function(options=None, cached=False):
         """
         This is the function being returned.
-        Requires input function's name start with 'make_'
         """
-        object_key = func.__name__.replace('make_', '')
-        if cached is True and object_key in OBJECT_CACHE:
-            return OBJECT_CACHE[object_key]
-        new_object = func(options)
-        if cached is True:
-            OBJECT_CACHE[object_key] = new_object
-        return new_object
+        if not cached:
+            return func(options)
+        scope = 'session' if cached is True else cached
+        # The key and references are built before calling the factory
+        # function, which may change the options
+        object_key = make_key(func, options)
+        references = option_references(options)
+        try:
+            return OBJECT_CACHE.get(object_key, scope)
+        except KeyError:
+            pass
+        return OBJECT_CACHE.setdefault(
+            object_key, func(options), scope, references)
 
     return cacheable_function
 
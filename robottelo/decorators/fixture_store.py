@@ -0,0 +1,394 @@
+# -*- encoding: utf-8 -*-
+"""Share expensive setups between pytest xdist workers
+
+A shared resource is built by the first worker asking for it, the other
+workers wait for it to be built and reuse its value, for example the ids of
+the created entities. The store counts the uses of each resource by each
+worker, workers release their resources when their test session finishes.
+A resource is never cleaned up by a worker, even when no worker uses it
+anymore, as a worker which did not ask for it yet may still need it: the
+xdist controller cleans up all the resources when the whole test session
+finishes.
+
+The cleanup function is run by the controller process, so it must be a
+module level function, which the controller imports. Usage::
+
+    from robottelo.cleanup import org_cleanup
+    from robottelo.cli.factory import setup_org_for_a_rh_repo
+    from robottelo.decorators.fixture_store import shared_resource
+
+    def cleanup_rh_repo_org(ids):
+        org_cleanup(ids['organization-id'])
+
+    class SomeTestCase(CLITestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            super(SomeTestCase, cls).setUpClass()
+            cls.setup = shared_resource(
+                'org with synced RHEL7 repo',
+                lambda: setup_org_for_a_rh_repo({
+                    u'product': PRDS['rhel'],
+                    u'repository-set': REPOSET['rhst7'],
+                    u'repository': REPOS['rhst7']['name'],
+                }),
+                cleanup=cleanup_rh_repo_org,
+            )
+
+Values are shared as JSON, so a resource value must be JSON serializable.
+The state of the resources is kept in files under a directory created for the
+test session, which is handed to the xdist workers by the pytest
+configuration. Those files are only read and written while holding a file
+lock, but the setup and cleanup functions run without it so other workers
+are not blocked.
+"""
+import errno
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+
+from pytest_services.locks import file_lock
+from robottelo.decorators.func_locker import TEMP_ROOT_DIR
+
+logger = logging.getLogger(__name__)
+
+TEMP_FIXTURE_STORE_DIR = 'fixture_store'
+#: Default time in seconds to wait for a resource built by another worker
+WAIT_TIMEOUT = 3600
+#: Default time in seconds between two checks of a resource being built by
+#: another worker
+POLL_INTERVAL = 5
+
+_store = None
+
+
+class FixtureStoreError(Exception):
+    """Indicates a shared resource could not be built or waited for."""
+
+
+def _function_path(function):
+    """Return the ``module:name`` path of a module level function.
+
+    :raise ValueError: If the function can not be imported back from its
+        path, e.g. a lambda or a method.
+    """
+    if function is None:
+        return None
+    path = u'{0}:{1}'.format(
+        getattr(function, '__module__', None),
+        getattr(function, '__name__', None),
+    )
+    try:
+        found = _import_function(path) is function
+    except (AttributeError, ImportError, ValueError):
+        found = False
+    if not found:
+        raise ValueError(
+            u'The cleanup of a shared resource must be a module level '
+            u'function, got {0!r}'.format(function))
+    return path
+
+
+def _import_function(path):
+    """Return the function of a ``module:name`` path."""
+    module, _, name = path.partition(u':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _process_is_alive(pid):
+    """Return whether a process with the given id is running."""
+    try:
+        os.kill(pid, 0)
+    except OSError as err:
+        return err.errno == errno.EPERM
+    return True
+
+
+class FixtureStore(object):
+    """Resources shared by the processes using the same directory.
+
+    :param str path: The directory where the state of the resources is kept.
+    :param str worker_id: The id of the worker using the store, e.g. ``gw0``.
+    :param int timeout: Seconds to wait for a resource built by another
+        worker.
+    :param int poll_interval: Seconds between two checks of a resource being
+        built by another worker.
+    """
+
+    def __init__(self, path, worker_id='master', timeout=WAIT_TIMEOUT,
+                 poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.worker_id = worker_id
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # The number of uses of each resource by this worker
+        self._uses = {}
+        if not os.path.exists(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                if not os.path.exists(path):
+                    raise
+
+    def _file_path(self, name, extension):
+        """Return the path of a file of the resource called ``name``."""
+        slug = re.sub(r'[^\w.-]+', '_', name)[:64]
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:10]
+        return os.path.join(
+            self.path, u'{0}-{1}.{2}'.format(slug, digest, extension))
+
+    def _read(self, name):
+        """Return the state of a resource, ``None`` if it was never built."""
+        try:
+            with open(self._file_path(name, 'json')) as handler:
+                return json.load(handler)
+        except IOError as err:
+            if err.errno == errno.ENOENT:
+                return None
+            raise
+
+    def _write(self, name, state):
+        """Replace the state of a resource, ``None`` removes it."""
+        path = self._file_path(name, 'json')
+        if state is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        temp_path = u'{0}.{1}'.format(path, os.getpid())
+        with open(temp_path, 'w') as handler:
+            json.dump(state, handler)
+        os.rename(temp_path, path)
+
+    def _update(self, name, function):
+        """Call ``function`` with the state of a resource while holding its
+        lock, and store the state it returns.
+        """
+        with file_lock(self._file_path(name, 'lock')):
+            state = function(self._read(name))
+            self._write(name, state)
+            return state
+
+    def acquire(self, name, setup, cleanup=None):
+        """Return the value of a shared resource, building it if needed.
+
+        :param str name: The name of the resource, shared by all the workers.
+        :param setup: A function returning the value of the resource. It is
+            only called by the first worker asking for the resource.
+        :param cleanup: A module level function called with the value of
+            the resource by :meth:`cleanup_all`, when the whole test session
+            finishes.
+        :raise FixtureStoreError: If another worker failed to build the
+            resource, or did not build it in time.
+        :raise ValueError: If ``cleanup`` is not a module level function.
+        """
+        cleanup_path = _function_path(cleanup)
+        deadline = time.time() + self.timeout
+        while True:
+            decision = {}
+
+            def claim(state):
+                # The worker building or cleaning up the resource died
+                owner_gone = (
+                    state is not None and
+                    state['status'] in ('building', 'cleaning') and
+                    not _process_is_alive(state['pid'])
+                )
+                if state is None or owner_gone:
+                    decision['build'] = True
+                    return {
+                        'name': name,
+                        'status': 'building',
+                        'owner': self.worker_id,
+                        'pid': os.getpid(),
+                        'users': {},
+                    }
+                if state['status'] == 'ready':
+                    state['users'][self.worker_id] = (
+                        state['users'].get(self.worker_id, 0) + 1)
+                decision['state'] = state
+                return state
+
+            self._update(name, claim)
+            if decision.get('build'):
+                value = self._build(name, setup, cleanup_path)
+                self._uses[name] = self._uses.get(name, 0) + 1
+                return value
+            state = decision['state']
+            if state['status'] == 'ready':
+                self._uses[name] = self._uses.get(name, 0) + 1
+                logger.info(
+                    u'Reusing shared resource "%s" built by %s',
+                    name, state['owner'])
+                return state['value']
+            if state['status'] == 'failed':
+                raise FixtureStoreError(
+                    u'Shared resource "{0}" failed to be built by {1}: {2}'
+                    .format(name, state['owner'], state['error']))
+            # Being built or cleaned up by another worker
+            if time.time() > deadline:
+                raise FixtureStoreError(
+                    u'Timed out waiting for shared resource "{0}" {1} by {2}'
+                    .format(name, state['status'], state['owner']))
+            time.sleep(self.poll_interval)
+
+    def _build(self, name, setup, cleanup_path):
+        """Build a resource claimed by this worker and publish its value."""
+        logger.info(u'Building shared resource "%s"', name)
+        try:
+            value = setup()
+        except Exception as err:
+            error = u'{0}'.format(err)
+
+            def fail(state):
+                state.update(status='failed', error=error)
+                return state
+
+            self._update(name, fail)
+            raise
+
+        def publish(state):
+            state.update(
+                status='ready',
+                value=value,
+                cleanup=cleanup_path,
+                users={self.worker_id: 1},
+            )
+            return state
+
+        self._update(name, publish)
+        return value
+
+    def release(self, name):
+        """Stop using a shared resource once.
+
+        The resource is not cleaned up, even if no worker uses it anymore,
+        see :meth:`cleanup_all`.
+        """
+        if not self._uses.get(name):
+            return
+        self._uses[name] -= 1
+        if not self._uses[name]:
+            del self._uses[name]
+
+        def leave(state):
+            if state is None or state['status'] != 'ready':
+                return state
+            users = state['users']
+            if users.get(self.worker_id, 0) > 1:
+                users[self.worker_id] -= 1
+            else:
+                users.pop(self.worker_id, None)
+            return state
+
+        self._update(name, leave)
+
+    def release_all(self):
+        """Release all the resources used by this worker."""
+        for name in list(self._uses):
+            while name in self._uses:
+                self.release(name)
+
+    def cleanup_all(self):
+        """Clean up all the shared resources, called by the xdist controller
+        when the whole test session finishes.
+
+        A resource still used by a worker, e.g. one which crashed before
+        releasing it, is cleaned up too. The failure of a cleanup is logged
+        and does not stop the others.
+        """
+        for file_name in sorted(os.listdir(self.path)):
+            if not file_name.endswith('.json'):
+                continue
+            with open(os.path.join(self.path, file_name)) as handler:
+                name = json.load(handler)['name']
+            decision = {}
+
+            def claim(state):
+                if state is not None and state['status'] == 'ready':
+                    decision['state'] = dict(state)
+                    state.update(
+                        status='cleaning',
+                        owner=self.worker_id,
+                        pid=os.getpid(),
+                    )
+                return state
+
+            self._update(name, claim)
+            state = decision.get('state')
+            try:
+                if state is None or state['cleanup'] is None:
+                    continue
+                if state['users']:
+                    logger.warning(
+                        u'Shared resource "%s" is still used by %s',
+                        name, u', '.join(sorted(state['users'])))
+                logger.info(u'Cleaning up shared resource "%s"', name)
+                _import_function(state['cleanup'])(state['value'])
+            except Exception as err:
+                logger.warning(
+                    u'Failed to clean up shared resource "%s": %s', name, err)
+            finally:
+                self._update(name, lambda state: None)
+        self._uses.clear()
+
+
+def configure(path, worker_id='master'):
+    """Set the store used by :func:`shared_resource`, called by the pytest
+    configuration with a directory shared by all the xdist workers.
+    """
+    global _store
+    _store = FixtureStore(path, worker_id)
+    return _store
+
+
+def get_store():
+    """Return the store used by :func:`shared_resource`, creating a store
+    private to this process if none was configured.
+    """
+    if _store is None:
+        root = os.path.join(tempfile.gettempdir(), TEMP_ROOT_DIR)
+        if not os.path.exists(root):
+            try:
+                os.makedirs(root)
+            except OSError:
+                if not os.path.exists(root):
+                    raise
+        configure(tempfile.mkdtemp(
+            prefix='{0}-'.format(TEMP_FIXTURE_STORE_DIR), dir=root))
+    return _store
+
+
+def remove_store():
+    """Clean up the resources of the store and remove its directory, called
+    by the xdist controller, or the only pytest process, when the whole test
+    session finishes.
+    """
+    global _store
+    if _store is None:
+        return
+    _store.cleanup_all()
+    shutil.rmtree(_store.path, ignore_errors=True)
+    _store = None
+
+
+def shared_resource(name, setup, cleanup=None):
+    """Return the value of a resource shared by all the xdist workers.
+
+    See :meth:`FixtureStore.acquire`.
+    """
+    return get_store().acquire(name, setup, cleanup)
+
+
+def release_resource(name):
+    """Stop using a shared resource before the end of the session, it is
+    still cleaned up when the whole test session finishes.
+
+    See :meth:`FixtureStore.release`.
+    """
+    get_store().release(name)
@@ -0,0 +1,320 @@
+# -*- encoding: utf-8 -*-
+"""Cache of the entities created by the CLI factory functions.
+
+Entities are cached by :func:`robottelo.decorators.cacheable` when a factory
+function is called with ``cached``, under a key made of the factory function
+and a hash of its options. So ``make_org(cached=True)`` always returns the
+same organization while ``make_product({'organization-id': 1},
+cached=True)`` and ``make_product({'organization-id': 2}, cached=True)``
+return different products.
+
+Each entry belongs to a scope. Session entries are kept until the end of the
+test session, module and class entries are dropped at the end of the test
+module or class which cached them. The least recently used entries are
+forgotten when the cache is full.
+
+Entities dropped at the end of their scope, or invalidated, are handed to the
+functions registered with :meth:`EntityCache.register_cleanup`, so they can be
+deleted even though no test owns them. Entities forgotten because the cache is
+full, or created twice at the same time, are not: they may still be in use,
+and they are left like any entity created without cache.
+
+An entity created with the id of a cached entity in its ``*-id`` or ``*-ids``
+options refers to it, e.g. a product created in a cached organization. A
+referred entity is never handed to the cleanup functions while an entity
+referring to it is still cached, it is kept until the end of the scope of
+the entities referring to it instead. Example::
+
+    from robottelo.cli.factory import make_org, make_product
+    from robottelo.decorators import OBJECT_CACHE
+
+    org = make_org(cached=True)
+    product = make_product({'organization-id': org['id']}, cached='class')
+    # The product is updated, make sure nobody gets the stale copy
+    OBJECT_CACHE.invalidate(make_product)
+"""
+import hashlib
+import json
+import logging
+import threading
+
+from collections import OrderedDict
+from six import text_type
+
+logger = logging.getLogger(__name__)
+
+#: Scopes of the cached entities, from the broadest to the narrowest
+SCOPES = ('session', 'module', 'class')
+#: Default maximum number of cached entities
+ENTITY_CACHE_SIZE = 512
+
+
+def _factory_name(factory):
+    """Return the name of a factory given as a function or a name."""
+    return getattr(factory, '__name__', factory)
+
+
+def option_references(options=None):
+    """Return the ids of the entities referred by factory options.
+
+    :param dict options: The options given to a factory function.
+    :return: A ``frozenset`` with the values of the ``*-id`` and ``*-ids``
+        options, as text.
+    """
+    references = set()
+    for name, value in (options or {}).items():
+        if name.endswith('-ids'):
+            if isinstance(value, (list, tuple, set)):
+                values = value
+            else:
+                values = text_type(value).split(',')
+            references.update(text_type(item).strip() for item in values)
+        elif name.endswith('-id'):
+            references.add(text_type(value))
+    return frozenset(references)
+
+
+def _entity_id(entity):
+    """Return the id of an entity as text, or ``None`` if it has none."""
+    try:
+        entity_id = entity['id']
+    except (KeyError, TypeError):
+        return None
+    return text_type(entity_id)
+
+
+def make_key(factory, options=None):
+    """Return the cache key of an entity created by ``factory``.
+
+    :param factory: The factory function or its name.
+    :param dict options: The options given to the factory function. ``None``
+        and an empty dict give the same key.
+    :return: A tuple with the factory function name and a hash of the
+        options, which doesn't depend on the order of the options.
+    """
+    canonical = json.dumps(
+        options or {},
+        default=text_type,
+        separators=(',', ':'),
+        sort_keys=True,
+    )
+    return (
+        _factory_name(factory),
+        hashlib.sha1(canonical.encode('utf-8')).hexdigest(),
+    )
+
+
+class EntityCache(object):
+    """A bounded, thread safe cache of created entities.
+
+    :param int maxsize: The maximum number of cached entities, the least
+        recently used one is forgotten when a new one is cached past this
+        size.
+    """
+
+    def __init__(self, maxsize=ENTITY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # Map each key to a [entity, scope, references] list, least recently
+        # used first
+        self._entries = OrderedDict()
+        self._cleanups = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def _check_scope(scope):
+        """Raise ``ValueError`` if ``scope`` is not a known scope."""
+        if scope not in SCOPES:
+            raise ValueError(
+                u'Unknown scope {0!r}, expected one of {1}'.format(
+                    scope, u', '.join(SCOPES)))
+
+    def get(self, key, scope=None):
+        """Return the entity cached under ``key``.
+
+        :param key: A key returned by :func:`make_key`.
+        :param str scope: The scope the entity is requested for. The entry is
+            moved to this scope if it is broader than its current one, so an
+            entity cached for a class and then requested for the session is
+            kept until the end of the session.
+        :raise KeyError: If no entity is cached under ``key``.
+        """
+        if scope is not None:
+            self._check_scope(scope)
+        with self._lock:
+            entry = self._entries.pop(key)
+            self._entries[key] = entry
+            if scope is not None and SCOPES.index(scope) < SCOPES.index(
+                    entry[1]):
+                entry[1] = scope
+        logger.debug(u'Using cached %s entity %s', key[0], key[1])
+        return entry[0]
+
+    def setdefault(self, key, entity, scope='session', references=None):
+        """Cache ``entity`` under ``key``, unless an entity is already cached
+        there.
+
+        When two threads create the same entity at the same time, the first
+        one is cached and returned to both threads, the other one is
+        forgotten. The least recently used entities are forgotten when the
+        cache is full.
+
+        :param references: The ids of the entities ``entity`` refers to, as
+            returned by :func:`option_references`.
+        :return: The cached entity.
+        """
+        self._check_scope(scope)
+        with self._lock:
+            if key in self._entries:
+                logger.debug(
+                    u'Forgetting %s entity %s created twice', key[0], key[1])
+                return self._entries[key][0]
+            self._entries[key] = [entity, scope, references or frozenset()]
+            while len(self._entries) > max(1, self.maxsize):
+                old_key, _ = self._entries.popitem(last=False)
+                logger.debug(
+                    u'Forgetting least recently used %s entity %s',
+                    old_key[0], old_key[1])
+        return entity
+
+    def invalidate(self, factory=None, options=None, scope=None):
+        """Drop cached entities.
+
+        :param factory: Only drop the entities created by this factory
+            function, or factory function name. By default all the entities
+            are dropped.
+        :param dict options: Only drop the entity created by ``factory`` with
+            these options. Pass an empty dict to drop the entity created
+            without options.
+        :param str scope: Only drop the entities of this scope.
+        :return: The number of dropped entities. The ones still referred by
+            a cached entity are forgotten instead of handed to the cleanup
+            functions.
+        """
+        if scope is not None:
+            self._check_scope(scope)
+        if options is not None:
+            if factory is None:
+                raise ValueError(u'options can only be used with factory')
+            wanted = make_key(factory, options)
+        name = _factory_name(factory)
+        with self._lock:
+            keys = [
+                key for key, (_, entry_scope, _) in self._entries.items()
+                if (factory is None or key[0] == name) and
+                (options is None or key == wanted) and
+                (scope is None or entry_scope == scope)
+            ]
+            referred = self._referred(keys)
+            dropped = [(key, self._entries.pop(key)) for key in keys]
+        released = [
+            (key, entity) for key, (entity, _, _) in dropped
+            if key not in referred
+        ]
+        for key in referred:
+            logger.debug(
+                u'Forgetting %s entity %s still referred by a cached entity',
+                key[0], key[1])
+        self._release(released)
+        return len(dropped)
+
+    def end_scope(self, scope):
+        """Drop the entities of ``scope``, called when a test class, module
+        or session finishes.
+
+        Entities referred by a cached entity of another scope are kept, and
+        moved to the broadest scope of the entities referring to them.
+
+        :return: The number of dropped entities.
+        """
+        self._check_scope(scope)
+        with self._lock:
+            keys = [
+                key for key, (_, entry_scope, _) in self._entries.items()
+                if entry_scope == scope
+            ]
+            referred = self._referred(keys)
+            for key in referred:
+                self._entries[key][1] = referred[key]
+            released = [
+                (key, self._entries.pop(key)[0])
+                for key in keys if key not in referred
+            ]
+        self._release(released)
+        return len(released)
+
+    def _referred(self, keys):
+        """Return the entries about to be dropped which are referred by an
+        entity staying in the cache.
+
+        An entry referred by another referred entry is referred too. Must be
+        called with the lock held.
+
+        :param keys: The keys of the entries about to be dropped.
+        :return: A dict mapping the key of each referred entry to the
+            broadest scope of the entities referring to it.
+        """
+        dropped = [(key, self._entries[key]) for key in keys]
+        keys = set(keys)
+        referring = [
+            (entry_scope, references)
+            for key, (_, entry_scope, references) in self._entries.items()
+            if references and key not in keys
+        ]
+        referred = {}
+        found = True
+        while found:
+            found = False
+            for key, (entity, _, references) in dropped:
+                entity_id = _entity_id(entity)
+                if key in referred or entity_id is None:
+                    continue
+                scopes = [
+                    entry_scope for entry_scope, entry_references in referring
+                    if entity_id in entry_references
+                ]
+                if scopes:
+                    referred[key] = min(scopes, key=SCOPES.index)
+                    referring.append((referred[key], references))
+                    found = True
+        return referred
+
+    def clear(self):
+        """Drop all the cached entities."""
+        return self.invalidate()
+
+    def register_cleanup(self, cleanup):
+        """Register a function called with the factory function name and the
+        entity of each entity leaving the cache. Registering the same
+        function twice has no effect.
+        """
+        with self._lock:
+            if cleanup not in self._cleanups:
+                self._cleanups.append(cleanup)
+
+    def unregister_cleanup(self, cleanup):
+        """Stop calling a cleanup function registered before."""
+        with self._lock:
+            if cleanup in self._cleanups:
+                self._cleanups.remove(cleanup)
+
+    def _release(self, released):
+        """Hand entities which left the cache to the cleanup functions,
+        newest first so entities are cleaned before the ones they were
+        created in.
+        """
+        with self._lock:
+            cleanups = list(self._cleanups)
+        for key, entity in reversed(released):
+            for cleanup in cleanups:
+                try:
+                    cleanup(key[0], entity)
+                except Exception as err:
+                    logger.warning(
+                        u'Failed to clean up cached %s entity: %s',
+                        key[0], err)
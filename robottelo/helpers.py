@@ -138,6 +138,10 @@ def get_nailgun_config():
     :return: A ``nailgun.config.ServerConfig`` object, populated with values
         from ``robottelo.config.settings``.
 
+    The requests made with it share the keep-alive connections of
+    :mod:`robottelo.api.session`, like all the NailGun requests once the
+    settings are configured.
+
     """
     return ServerConfig(
         settings.server.get_url(),
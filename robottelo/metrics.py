@@ -0,0 +1,214 @@
+# -*- encoding: utf-8 -*-
+"""In-memory latency and size metrics of the ssh and hammer layers.
+
+The ssh module records the time to open connections and, for each command,
+the time to the first byte of output, the total time and the bytes sent and
+received. The CLI layer records the time of each hammer subcommand.
+
+Metrics are kept as histograms in :data:`registry`, which can be dumped as
+JSON or in the Prometheus text format, for example at the end of a test
+session when the ``metrics_file`` setting is set.
+"""
+import bisect
+import json
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+#: Default buckets, in seconds, of the latency histograms
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+#: Default buckets, in bytes, of the size histograms
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram(object):
+    """A histogram of observed values, one series per set of labels.
+
+    :param str name: The metric name.
+    :param str description: A short description of the metric.
+    :param buckets: The upper bounds of the buckets, in increasing order.
+    """
+
+    def __init__(self, name, description, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        """Record a value in the series of the given labels."""
+        key = tuple(sorted(
+            (name, u'{0}'.format(label)) for name, label in labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'counts': [0] * (len(self.buckets) + 1),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Record the time spent in the ``with`` block."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(time.time() - start, **labels)
+
+    def samples(self):
+        """Return a snapshot of the series.
+
+        :return: A list of dicts with the ``labels``, the per bucket
+            ``counts``, the ``sum`` and the ``count`` of each series.
+        """
+        with self._lock:
+            return [
+                {
+                    'labels': OrderedDict(key),
+                    'counts': list(series['counts']),
+                    'sum': series['sum'],
+                    'count': series['count'],
+                }
+                for key, series in sorted(self._series.items())
+            ]
+
+    def reset(self):
+        """Forget all the observed values."""
+        with self._lock:
+            self._series.clear()
+
+
+def _format_labels(labels, **extra):
+    """Format labels as ``{name="value",...}`` for the Prometheus format."""
+    items = list(labels.items()) + sorted(extra.items())
+    if not items:
+        return u''
+    return u'{{{0}}}'.format(u','.join(
+        u'{0}="{1}"'.format(
+            name,
+            value.replace(u'\\', u'\\\\').replace(u'"', u'\\"').replace(
+                u'\n', u'\\n')
+        )
+        for name, value in items
+    ))
+
+
+class MetricsRegistry(object):
+    """A collection of histograms which can be dumped all at once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = OrderedDict()
+
+    def histogram(self, name, description, buckets=LATENCY_BUCKETS):
+        """Return the histogram called ``name``, creating it if needed."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(
+                    name, description, buckets)
+            return metric
+
+    def reset(self):
+        """Forget all the observed values of all the histograms."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def to_dict(self):
+        """Return all the histograms as a JSON serializable dict."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return OrderedDict(
+            (metric.name, OrderedDict((
+                ('description', metric.description),
+                ('buckets', list(metric.buckets)),
+                ('series', metric.samples()),
+            )))
+            for metric in metrics
+        )
+
+    def to_json(self):
+        """Return all the histograms as a JSON document."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        """Return all the histograms in the Prometheus text format."""
+        lines = []
+        for name, metric in self.to_dict().items():
+            lines.append(u'# HELP {0} {1}'.format(
+                name, metric['description']))
+            lines.append(u'# TYPE {0} histogram'.format(name))
+            for series in metric['series']:
+                labels = series['labels']
+                cumulative = 0
+                bounds = [u'{0}'.format(bound) for bound in metric['buckets']]
+                for bound, count in zip(bounds + [u'+Inf'], series['counts']):
+                    cumulative += count
+                    lines.append(u'{0}_bucket{1} {2}'.format(
+                        name, _format_labels(labels, le=bound), cumulative))
+                lines.append(u'{0}_sum{1} {2!r}'.format(
+                    name, _format_labels(labels), series['sum']))
+                lines.append(u'{0}_count{1} {2}'.format(
+                    name, _format_labels(labels), series['count']))
+        return u'\n'.join(lines) + u'\n'
+
+    def dump(self, path):
+        """Write all the histograms to a file.
+
+        The Prometheus text format is used if ``path`` ends with ``.prom``,
+        JSON otherwise.
+        """
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = self.to_json()
+        with open(path, 'w') as handler:
+            handler.write(content)
+
+
+#: The registry where robottelo records its metrics
+registry = MetricsRegistry()
+
+SSH_CONNECT_SECONDS = registry.histogram(
+    'robottelo_ssh_connect_seconds',
+    'Time to open a ssh connection',
+)
+SSH_FIRST_BYTE_SECONDS = registry.histogram(
+    'robottelo_ssh_first_byte_seconds',
+    'Time from sending a ssh command to receiving its first output byte',
+)
+SSH_COMMAND_SECONDS = registry.histogram(
+    'robottelo_ssh_command_seconds',
+    'Total time of a ssh command',
+)
+SSH_BYTES_SENT = registry.histogram(
+    'robottelo_ssh_bytes_sent',
+    'Size of a ssh command',
+    SIZE_BUCKETS,
+)
+SSH_BYTES_RECEIVED = registry.histogram(
+    'robottelo_ssh_bytes_received',
+    'Size of the output of a ssh command',
+    SIZE_BUCKETS,
+)
+HAMMER_COMMAND_SECONDS = registry.histogram(
+    'robottelo_hammer_command_seconds',
+    'Total time of a hammer subcommand',
+)
+SETUP_STEP_SECONDS = registry.histogram(
+    'robottelo_setup_step_seconds',
+    'Total time of a step of a CLI factory setup plan',
+)
@@ -6,10 +6,11 @@ register and attach, single subscription deletion.
 
 """
 import logging
-import requests
 import time
 
+from collections import OrderedDict
 from robottelo import ssh
+from robottelo.api.session import get_session
 from robottelo.config import settings
 from six.moves.urllib.parse import urljoin
 
@@ -104,11 +105,98 @@ class Candlepin(object):
             LOGGER.info('Attach client {0} successfully'.format(vm_ip))
         return cls.get_real_time(result.stderr)
 
+    @staticmethod
+    def _command_many(cmd, vm_ips):
+        """Run a command on many VMs in parallel with ``ssh.command_many``
+        and return the result of each VM, in the order of ``vm_ips``.
+
+        ``ssh.command_many`` returns one result per host, so a VM listed
+        more than once runs the command again in a later round instead of
+        sharing the result of the first run.
+        """
+        results = [None] * len(vm_ips)
+        pending = list(enumerate(vm_ips))
+        while pending:
+            round_ips = OrderedDict()
+            remaining = []
+            for index, vm_ip in pending:
+                if vm_ip in round_ips:
+                    remaining.append((index, vm_ip))
+                else:
+                    round_ips[vm_ip] = index
+            round_results = ssh.command_many(
+                list(round_ips), cmd, concurrency=len(round_ips))
+            for vm_ip, index in round_ips.items():
+                results[index] = round_results[vm_ip]
+            pending = remaining
+        return results
+
+    @classmethod
+    def _get_real_times(cls, vm_ips, results, action):
+        """Return the real timing value of each VM, ``None`` for the VMs on
+        which the command failed, which are logged.
+        """
+        times = []
+        for vm_ip, result in zip(vm_ips, results):
+            if result.return_code != 0:
+                LOGGER.error('Fail to {0} client {1}!'.format(action, vm_ip))
+                times.append(None)
+            else:
+                times.append(cls.get_real_time(result.stderr))
+        return times
+
+    @classmethod
+    def register_activation_key_many(cls, ak_name, default_org, vm_ips):
+        """Subscribe many VMs to Satellite by Register + ActivationKey in
+        parallel
+
+        :return: A list with the timing value of each VM, in the order of
+            ``vm_ips``, ``None`` for the VMs which failed to register.
+        """
+        cls._command_many('subscription-manager clean', vm_ips)
+        results = cls._command_many(
+            'time -p subscription-manager register --activationkey={0} '
+            '--org={1}'.format(ak_name, default_org),
+            vm_ips
+        )
+        return cls._get_real_times(vm_ips, results, 'subscribe by ak')
+
+    @classmethod
+    def register_attach_many(
+            cls, sub_id, default_org, environment, vm_ips):
+        """Subscribe many VMs to Satellite by Register + Attach in parallel
+
+        :return: A tuple of two lists with the register and attach timing
+            values of each VM, in the order of ``vm_ips``, ``None`` for the
+            VMs on which the step failed.
+        """
+        cls._command_many('subscription-manager clean', vm_ips)
+        results = cls._command_many(
+            'time -p subscription-manager register --username={0} '
+            '--password={1} '
+            '--org={2} '
+            '--environment={3}'
+            .format(
+                settings.server.admin_username,
+                settings.server.admin_password,
+                default_org,
+                environment
+            ),
+            vm_ips
+        )
+        time_reg = cls._get_real_times(vm_ips, results, 'register')
+        results = cls._command_many(
+            'time -p subscription-manager attach --pool={0}'.format(sub_id),
+            vm_ips
+        )
+        time_att = cls._get_real_times(vm_ips, results, 'attach')
+        return (time_reg, time_att)
+
     @classmethod
     def single_delete(cls, id, thread_id):
         """Delete host from subscription"""
         start = time.time()
-        response = requests.delete(
+        response = get_session().delete(
             urljoin(
                 settings.server.get_url(),
                 '/katello/api/hosts/{0}'.format(id)
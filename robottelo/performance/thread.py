@@ -46,7 +46,12 @@ class DeleteThread(PerformanceThread):
 
 
 class SubscribeAKThread(PerformanceThread):
-    """Thread utility to support concurrent subscription by activation key"""
+    """Thread utility to support concurrent subscription by activation key
+
+    ``ConcurrentTestCase`` registers all its clients at once with
+    :meth:`Candlepin.register_activation_key_many`, this thread registers a
+    single client with it.
+    """
     def __init__(
             self,
             thread_id,
@@ -64,16 +69,16 @@ class SubscribeAKThread(PerformanceThread):
         self.vm_ip = vm_ip
 
     def run(self):
-        time.sleep(5)
         for i in range(self.num_iterations):
             self.logger.debug(
                 "{0}: register with ak {1} on {2} attempt {3}"
                 .format(self.thread_name, self.ak_name, self.vm_ip, i))
-            time_point = Candlepin.single_register_activation_key(
+            time_point, = Candlepin.register_activation_key_many(
                 self.ak_name,
                 self.default_org,
-                self.vm_ip)
-            self.time_result_dict[self.thread_name].append(time_point)
+                [self.vm_ip])
+            if time_point is not None:
+                self.time_result_dict[self.thread_name].append(time_point)
 
 
 class SubscribeAttachThread(PerformanceThread):
@@ -88,6 +93,9 @@ class SubscribeAttachThread(PerformanceThread):
         dict-register: {client-0: [...], ..., client-9:[...]}
         dict-attach: {client-0: [...], ..., client-9:[...]}
 
+    ``ConcurrentTestCase`` registers all its clients at once with
+    :meth:`Candlepin.register_attach_many`, this thread registers a single
+    client with it.
     """
     def __init__(
             self,
@@ -120,22 +128,22 @@ class SubscribeAttachThread(PerformanceThread):
                 "{0}: register with subscription {1} on vm {2} attempt {3}"
                 .format(self.thread_name, self.sub_id, self.vm_ip, i))
 
-            time_points = Candlepin.single_register_attach(
+            (time_reg,), (time_att,) = Candlepin.register_attach_many(
                 self.sub_id,
                 self.default_org,
                 self.environment,
-                self.vm_ip)
+                [self.vm_ip])
 
             # split original time_result_dict into two new dictionaries
             # append each client's register timing data
-            self.time_result_dict_register.get(
-                self.thread_name, 'thread-0'
-            ).append(time_points[0])
+            if time_reg is not None:
+                self.time_result_dict_register[self.thread_name].append(
+                    time_reg)
 
             # append each client's attach timing data
-            self.time_result_dict_attach.get(
-                self.thread_name, 'thread-0'
-            ).append(time_points[1])
+            if time_att is not None:
+                self.time_result_dict_attach[self.thread_name].append(
+                    time_att)
 
 
 class SyncThread(PerformanceThread):
@@ -1,40 +1,75 @@
 """Utility module to handle the shared ssh connection."""
+import atexit
 import base64
+import codecs
+import functools
+import hashlib
 import logging
 import os
 import paramiko
+import posixpath
 import re
 import six
+import socket
+import sys
+import threading
+import time
+import uuid
 
+from collections import OrderedDict
 from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+try:
+    import asyncio
+except ImportError:  # pragma: no cover
+    asyncio = None  # Python 2
+
+from robottelo import cassette, metrics
 from robottelo.cli import hammer
 from robottelo.config import settings
+from six.moves import shlex_quote
 
 logger = logging.getLogger(__name__)
 
+# Escape codes of the colors displayed in the output
+_COLOR_CODES_REGEX = re.compile(r'\x1b\[\d\d?m')
+
 
 def decode_to_utf8(text):  # pragma: no cover
-    """In python 3 all strings are already unicode, no need to decode"""
-    if six.PY2:
+    """Decode byte strings, in python 3 ``str`` is already unicode and is
+    returned as is.
+    """
+    if isinstance(text, six.binary_type):
         return text.decode('utf-8')
     return text
 
 
 class SSHCommandResult(object):
-    """Structure that returns in all ssh commands results."""
+    """Structure that returns in all ssh commands results.
+
+    With ``lazy_json`` the JSON output is parsed into the read-only views of
+    :func:`robottelo.cli.hammer.parse_json` instead of dicts and lists.
+    """
 
     def __init__(
-            self, stdout=None, stderr=None, return_code=0, output_format=None):
+            self, stdout=None, stderr=None, return_code=0, output_format=None,
+            lazy_json=False):
         self.stdout = stdout
         self.stderr = stderr
         self.return_code = return_code
         self.output_format = output_format
+        # Wall time in seconds spent running the command, when measured
+        self.elapsed = None
         #  Does not make sense to return suspicious output if ($? <> 0)
         if output_format and self.return_code == 0:
             if output_format == 'csv':
                 self.stdout = hammer.parse_csv(stdout) if stdout else {}
             if output_format == 'json':
-                self.stdout = hammer.parse_json(stdout) if stdout else None
+                self.stdout = (
+                    hammer.parse_json(stdout, lazy=lazy_json)
+                    if stdout else None
+                )
 
     def __repr__(self):
         tmpl = u'SSHCommandResult(stdout={stdout!r}, stderr={stderr!r}, ' + \
@@ -73,9 +108,13 @@ def _call_paramiko_sshclient():  # pragma: no cover
     return SSHClient()
 
 
-def get_client(hostname=None, username=None, password=None,
-               key_filename=None, timeout=10):
-    """Returns a SSH client connected to given hostname"""
+def _get_connection_params(hostname=None, username=None, password=None,
+                           key_filename=None):
+    """Fill the connection parameters not provided with the values from the
+    ``server`` section of the configuration.
+
+    :return: A tuple ``(hostname, username, password, key_filename)``.
+    """
     if hostname is None:
         hostname = settings.server.hostname
     if username is None:
@@ -84,16 +123,30 @@ def get_client(hostname=None, username=None, password=None,
         key_filename = settings.server.ssh_key
     if password is None:
         password = settings.server.ssh_password
+    return hostname, username, password, key_filename
+
+
+def get_client(hostname=None, username=None, password=None,
+               key_filename=None, timeout=10):
+    """Returns a SSH client connected to given hostname"""
+    hostname, username, password, key_filename = _get_connection_params(
+        hostname, username, password, key_filename)
+    active_cassette = cassette.current()
+    if active_cassette is not None and active_cassette.replaying:
+        # never connect while replaying
+        return cassette.ReplayClient(active_cassette, hostname)
     client = _call_paramiko_sshclient()
     client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    client.connect(
-        hostname=hostname,
-        username=username,
-        key_filename=key_filename,
-        password=password,
-        timeout=timeout
-    )
+    with metrics.SSH_CONNECT_SECONDS.time(host=hostname):
+        client.connect(
+            hostname=hostname,
+            username=username,
+            key_filename=key_filename,
+            password=password,
+            timeout=timeout
+        )
     client._id = hex(id(client))
+    client._hostname = hostname
     return client
 
 
@@ -141,6 +194,237 @@ def get_connection(hostname=None, username=None, password=None,
         logger.debug('Destroyed Paramiko client {0}'.format(client._id))
 
 
+class SSHConnectionPoolTimeout(Exception):
+    """Indicates that no pooled connection became available in time."""
+
+
+def _is_connection_alive(client):
+    """Check if the transport of a SSH client is still usable."""
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+class SSHConnectionPool(object):
+    """Thread-safe pool of reusable SSH connections.
+
+    Connections are grouped by ``(hostname, username, password,
+    key_filename)``. A connection is handed to a single caller at a time and
+    is returned to the pool when the caller is done with it, so the TCP
+    connection, key exchange and authentication are paid only once per
+    connection instead of once per command.
+
+    :param int max_per_host: Maximum number of connections, idle or in use,
+        opened for the same connection key. Callers wait for a connection to
+        be released when this limit is reached.
+    :param int idle_timeout: Seconds after which an unused connection is
+        closed and removed from the pool.
+    :param int checkout_timeout: Seconds to wait for a connection to be
+        released before raising ``SSHConnectionPoolTimeout``.
+    :param int keepalive: Interval in seconds of the keepalive packets sent
+        over pooled connections, helps detecting dead connections.
+
+    """
+
+    def __init__(self, max_per_host=10, idle_timeout=300,
+                 checkout_timeout=300, keepalive=30):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.keepalive = keepalive
+        self._condition = threading.Condition()
+        self._idle = {}  # key: list of (client, released_at) tuples
+        self._opened = {}  # key: number of open connections, idle or not
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        """Forget connections inherited from a parent process.
+
+        Must be called holding the pool lock.
+        """
+        if self._pid != os.getpid():
+            self._idle = {}
+            self._opened = {}
+            self._pid = os.getpid()
+
+    def _pop_expired(self):
+        """Remove from the pool the connections idle for too long.
+
+        Must be called holding the pool lock.
+
+        :return: A list of the removed connections, to be closed by the caller
+            once the lock is released.
+        """
+        expired = []
+        deadline = time.time() - self.idle_timeout
+        for key, idle in list(self._idle.items()):
+            kept = [item for item in idle if item[1] >= deadline]
+            expired.extend(item[0] for item in idle if item[1] < deadline)
+            self._opened[key] -= len(idle) - len(kept)
+            if kept:
+                self._idle[key] = kept
+            else:
+                del self._idle[key]
+        return expired
+
+    @staticmethod
+    def _close(clients):
+        """Close the given connections ignoring any error."""
+        for client in clients:
+            try:
+                client.close()
+                logger.debug(
+                    'Destroyed pooled Paramiko client %s',
+                    getattr(client, '_id', None)
+                )
+            except Exception as err:  # pragma: no cover
+                logger.debug('Failed to close pooled client: %s', err)
+
+    def checkout(self, hostname=None, username=None, password=None,
+                 key_filename=None, timeout=10):
+        """Get a connection from the pool, opening a new one if needed.
+
+        The arguments follow :func:`get_connection`. Connections returned by
+        this method must be given back using :meth:`checkin`.
+
+        :raises robottelo.ssh.SSHConnectionPoolTimeout: If ``max_per_host``
+            connections are in use and none is released before
+            ``checkout_timeout`` seconds.
+        """
+        key = _get_connection_params(
+            hostname, username, password, key_filename)
+        deadline = time.time() + self.checkout_timeout
+        discarded = []
+        client = None
+        reserved = False
+        with self._condition:
+            self._check_pid()
+            while True:
+                discarded.extend(self._pop_expired())
+                idle = self._idle.get(key)
+                if idle:
+                    client, _ = idle.pop()
+                    if _is_connection_alive(client):
+                        break
+                    discarded.append(client)
+                    client = None
+                    self._opened[key] -= 1
+                    continue
+                if self._opened.get(key, 0) < self.max_per_host:
+                    # reserve the slot of the connection about to be opened
+                    self._opened[key] = self._opened.get(key, 0) + 1
+                    reserved = True
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+        self._close(discarded)
+        if client is None and not reserved:
+            raise SSHConnectionPoolTimeout(
+                'No connection to {0} released in {1} seconds'.format(
+                    key[0], self.checkout_timeout)
+            )
+        if client is not None:
+            logger.debug('Reusing pooled Paramiko client %s', client._id)
+            return client
+        try:
+            client = get_client(timeout=timeout, *key)
+        except Exception:
+            with self._condition:
+                self._opened[key] -= 1
+                self._condition.notify()
+            raise
+        client._pool_key = key
+        if self.keepalive:
+            client.get_transport().set_keepalive(self.keepalive)
+        logger.debug('Instantiated pooled Paramiko client %s', client._id)
+        logger.info('Connected to [%s]', key[0])
+        return client
+
+    def checkin(self, client, discard=False):
+        """Give a connection back to the pool.
+
+        :param client: A connection got from :meth:`checkout`.
+        :param bool discard: Close the connection instead of keeping it in
+            the pool, should be used when the connection is on an unknown
+            state, for example after an error.
+        """
+        key = client._pool_key
+        with self._condition:
+            if self._pid != os.getpid():
+                return
+            if discard or not _is_connection_alive(client):
+                self._opened[key] -= 1
+                discard = True
+            else:
+                self._idle.setdefault(key, []).append((client, time.time()))
+            expired = self._pop_expired()
+            self._condition.notify()
+        if discard:
+            expired.append(client)
+        self._close(expired)
+
+    @contextmanager
+    def connection(self, hostname=None, username=None, password=None,
+                   key_filename=None, timeout=10):
+        """Yield a pooled connection and give it back to the pool when the
+        caller is done using it.
+
+        If an exception is raised while the connection is in use, the
+        connection is closed instead of being reused.
+        """
+        client = self.checkout(
+            hostname, username, password, key_filename, timeout)
+        try:
+            yield client
+        except BaseException:
+            self.checkin(client, discard=True)
+            raise
+        self.checkin(client)
+
+    def close_all(self):
+        """Close all the idle connections of the pool.
+
+        Connections currently checked out are closed when given back.
+        """
+        with self._condition:
+            clients = [
+                client
+                for idle in self._idle.values()
+                for client, _ in idle
+            ]
+            for key, idle in self._idle.items():
+                self._opened[key] -= len(idle)
+            self._idle = {}
+            self._condition.notify_all()
+        self._close(clients)
+
+
+_connection_pool = SSHConnectionPool()
+atexit.register(_connection_pool.close_all)
+
+
+def get_pooled_connection(hostname=None, username=None, password=None,
+                          key_filename=None, timeout=10):
+    """Yield a ssh connection from the shared connection pool.
+
+    Works like :func:`get_connection` but the connection is kept open and
+    reused by the next callers with the same connection parameters::
+
+        with get_pooled_connection() as connection:
+            ...
+
+    The connection must not be closed by the caller.
+    """
+    return _connection_pool.connection(
+        hostname, username, password, key_filename, timeout)
+
+
+def close_pooled_connections():
+    """Close all idle connections of the shared connection pool."""
+    _connection_pool.close_all()
+
+
 def add_authorized_key(key, hostname=None, username=None, password=None,
                        key_filename=None, timeout=10):
     """Appends a local public ssh key to remote authorized keys
@@ -176,68 +460,281 @@ def add_authorized_key(key, hostname=None, username=None, password=None,
     ssh_path = '~/.ssh'
     auth_file = os.path.join(ssh_path, 'authorized_keys')
 
-    with get_connection(hostname=hostname, username=username,
-                        password=password, key_filename=key_filename,
-                        timeout=timeout) as con:
+    with get_pooled_connection(hostname=hostname, username=username,
+                               password=password, key_filename=key_filename,
+                               timeout=timeout) as con:
+        ssh_user = username or settings.server.ssh_username
+        execute_batch([
+            # ensure ssh directory exists
+            'mkdir -p %s' % ssh_path,
+            # append the key if doesn't exists
+            "grep -q '{key}' {dest} || echo '{key}' >> {dest}".format(
+                key=key_content, dest=auth_file),
+            # set proper permissions
+            'chmod 700 %s' % ssh_path,
+            'chmod 600 %s' % auth_file,
+            'chown -R %s %s' % (ssh_user, ssh_path),
+            # Restore SELinux context with restorecon, if it's available:
+            'command -v restorecon && restorecon -RvF %s || true' % ssh_path,
+        ], con)
 
-        # ensure ssh directory exists
-        execute_command('mkdir -p %s' % ssh_path, con)
 
-        # append the key if doesn't exists
-        add_key = "grep -q '{key}' {dest} || echo '{key}' >> {dest}".format(
-            key=key_content, dest=auth_file)
-        execute_command(add_key, con)
+# Files at least this big are transferred in parallel chunks
+TRANSFER_PARALLEL_THRESHOLD = 64 * 1024 * 1024
+# Number of connections used to transfer the chunks of a big file
+TRANSFER_WORKERS = 4
+# Size of each read or write request sent to the SFTP server
+TRANSFER_BLOCK_SIZE = 32768
+
+
+def _get_sftp(connection):
+    """Return the SFTP session of the connection, opening it if needed.
+
+    The session is kept on the connection, so it is reused as long as the
+    connection stays in the pool.
+    """
+    sftp = getattr(connection, '_sftp', None)
+    if sftp is None or sftp.get_channel().closed:
+        sftp = connection._sftp = connection.open_sftp()
+    return sftp
+
+
+def _transfer_ranges(size):
+    """Split ``size`` bytes in one ``(offset, length)`` range per worker."""
+    length = -(-size // TRANSFER_WORKERS)
+    return [
+        (offset, min(length, size - offset))
+        for offset in range(0, size, length)
+    ]
 
-        # set proper permissions
-        execute_command('chmod 700 %s' % ssh_path, con)
-        execute_command('chmod 600 %s' % auth_file, con)
-        ssh_user = username or settings.server.ssh_username
-        execute_command('chown -R %s %s' % (ssh_user, ssh_path), con)
 
-        # Restore SELinux context with restorecon, if it's available:
-        cmd = 'command -v restorecon && restorecon -RvF %s || true' % ssh_path
-        execute_command(cmd, con)
+def _run_transfer_ranges(function, size):
+    """Call ``function(offset, length)`` for each range in parallel."""
+    pool = ThreadPool(TRANSFER_WORKERS)
+    try:
+        pool.map(lambda args: function(*args), _transfer_ranges(size))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _register_sftp(connection, register=None):
+    """Return the SFTP session of the connection, given to ``register``
+    first if it is set.
+    """
+    sftp = _get_sftp(connection)
+    if register is not None:
+        register(sftp)
+    return sftp
+
+
+def _upload_range(local_file, remote_file, hostname, offset, length,
+                  register=None):
+    """Upload a range of a local file to an existing remote file."""
+    with get_pooled_connection(hostname=hostname) as connection:
+        sftp = _register_sftp(connection, register)
+        with open(local_file, 'rb') as local, sftp.open(
+                remote_file, 'r+b') as remote:
+            local.seek(offset)
+            remote.seek(offset)
+            remote.set_pipelined(True)
+            while length > 0:
+                data = local.read(min(TRANSFER_BLOCK_SIZE, length))
+                if not data:
+                    break
+                remote.write(data)
+                length -= len(data)
+
+
+def _download_range(remote_file, local_file, hostname, offset, length,
+                    register=None):
+    """Download a range of a remote file to an existing local file."""
+    blocks = [
+        (block, min(TRANSFER_BLOCK_SIZE, offset + length - block))
+        for block in range(offset, offset + length, TRANSFER_BLOCK_SIZE)
+    ]
+    with get_pooled_connection(hostname=hostname) as connection:
+        sftp = _register_sftp(connection, register)
+        with sftp.open(remote_file, 'rb') as remote, open(
+                local_file, 'r+b') as local:
+            local.seek(offset)
+            # readv sends the read requests without waiting for each answer,
+            # request the blocks in groups to bound the memory used
+            for index in range(0, len(blocks), 1024):
+                for data in remote.readv(blocks[index:index + 1024]):
+                    local.write(data)
+
+
+def _put(sftp, local_file, remote_file, hostname=None, register=None):
+    """Upload a local file using ``sftp``, in parallel chunks if it is big.
+
+    :param register: A callable given the SFTP sessions of the parallel
+        chunks, e.g. ``_RemoteJob.register``.
+    """
+    if hasattr(local_file, 'read'):
+        sftp.putfo(local_file, remote_file)
+        return
+    size = os.path.getsize(local_file)
+    if size < TRANSFER_PARALLEL_THRESHOLD:
+        sftp.put(local_file, remote_file)
+        return
+    with sftp.open(remote_file, 'wb') as remote:
+        remote.truncate(size)
+    _run_transfer_ranges(
+        functools.partial(
+            _upload_range, local_file, remote_file, hostname,
+            register=register),
+        size
+    )
+
+
+def _get(sftp, remote_file, local_file, hostname=None, register=None):
+    """Download a remote file using ``sftp``, in parallel chunks if it is
+    big.
+
+    :param register: A callable given the SFTP sessions of the parallel
+        chunks, e.g. ``_RemoteJob.register``.
+    """
+    size = sftp.stat(remote_file).st_size
+    if size < TRANSFER_PARALLEL_THRESHOLD:
+        sftp.get(remote_file, local_file)
+        return
+    with open(local_file, 'wb') as local:
+        local.truncate(size)
+    _run_transfer_ranges(
+        functools.partial(
+            _download_range, remote_file, local_file, hostname,
+            register=register),
+        size
+    )
 
 
 def upload_file(local_file, remote_file, hostname=None):
     """Upload a local file to a remote machine
 
+    Files bigger than ``TRANSFER_PARALLEL_THRESHOLD`` are uploaded in
+    ``TRANSFER_WORKERS`` chunks in parallel, each over its own pooled
+    connection.
+
     :param local_file: either a file path or a file-like object to be uploaded.
     :param remote_file: a remote file path where the uploaded file will be
         placed.
     :param hostname: target machine hostname. If not provided will be used the
         ``server.hostname`` from the configuration.
     """
-    with get_connection(hostname=hostname) as connection:  # pragma: no cover
-        try:
-            sftp = connection.open_sftp()
-            # Check if local_file is a file-like object and use the proper
-            # paramiko function to upload it to the remote machine.
-            if hasattr(local_file, 'read'):
-                sftp.putfo(local_file, remote_file)
-            else:
-                sftp.put(local_file, remote_file)
-        finally:
-            sftp.close()
+    with get_pooled_connection(hostname=hostname) as connection:
+        _put(_get_sftp(connection), local_file, remote_file, hostname)
 
 
 def download_file(remote_file, local_file=None, hostname=None):
     """Download a remote file to the local machine. If ``hostname`` is not
     provided will be used the server.
 
+    Files bigger than ``TRANSFER_PARALLEL_THRESHOLD`` are downloaded in
+    ``TRANSFER_WORKERS`` chunks in parallel, each over its own pooled
+    connection.
     """
     if local_file is None:  # pragma: no cover
         local_file = remote_file
-    with get_connection(hostname=hostname) as connection:  # pragma: no cover
-        try:
-            sftp = connection.open_sftp()
-            sftp.get(remote_file, local_file)
-        finally:
-            sftp.close()
+    with get_pooled_connection(hostname=hostname) as connection:
+        _get(_get_sftp(connection), remote_file, local_file, hostname)
+
+
+def _file_md5(path):
+    """Return the md5 hex digest of a local file."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as handler:
+        for block in iter(lambda: handler.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _remote_files(connection, remote_dir, checksum=False):
+    """Return the files under a remote directory, in one round trip.
+
+    :return: A dict mapping each file path relative to ``remote_dir`` to its
+        md5 hex digest if ``checksum`` is ``True``, else to a tuple
+        ``(size, mtime)``.
+    """
+    remote_dir = shlex_quote(remote_dir)
+    if checksum:
+        cmd = u'cd {0} && find . -type f -exec md5sum {{}} +'.format(
+            remote_dir)
+    else:
+        cmd = u"find {0} -type f -printf '%s %T@ %P\\n'".format(remote_dir)
+    result = execute_command(cmd, connection, output_format='plain')
+    files = {}
+    if result.return_code != 0:  # the directory does not exist yet
+        return files
+    for line in (result.stdout or u'').splitlines():
+        if checksum:
+            digest, _, path = line.partition(u'  ')
+            files[path[2:]] = digest
+        else:
+            size, mtime, path = line.split(u' ', 2)
+            files[path] = (int(size), int(float(mtime)))
+    return files
+
+
+def sync_directory(local_dir, remote_dir, hostname=None, checksum=False):
+    """Upload the files of a local directory which are missing or changed on
+    a remote directory.
+
+    By default a file is considered unchanged when its size and modification
+    time are the same on both sides, the modification time of the uploaded
+    files is set to the one of the local files. With ``checksum=True`` the
+    md5 digests of the files are compared instead.
+
+    :param str local_dir: The local directory to upload.
+    :param str remote_dir: The remote directory to upload to, created if
+        needed.
+    :param hostname: target machine hostname. If not provided will be used the
+        ``server.hostname`` from the configuration.
+    :param bool checksum: Compare the files content instead of their size and
+        modification time.
+    :return: The list of uploaded file paths relative to ``local_dir``.
+    """
+    local_files = []
+    for root, _, names in os.walk(local_dir):
+        for name in sorted(names):
+            local_files.append(
+                os.path.relpath(os.path.join(root, name), local_dir))
+    with get_pooled_connection(hostname=hostname) as connection:
+        remote_files = _remote_files(connection, remote_dir, checksum)
+        changed = []
+        for path in sorted(local_files):
+            remote_path = u'/'.join(path.split(os.sep))
+            local_path = os.path.join(local_dir, path)
+            if checksum:
+                unchanged = remote_files.get(remote_path) == _file_md5(
+                    local_path)
+            else:
+                stat = os.stat(local_path)
+                unchanged = remote_files.get(remote_path) == (
+                    stat.st_size, int(stat.st_mtime))
+            if not unchanged:
+                changed.append((path, local_path, posixpath.join(
+                    remote_dir, remote_path)))
+        if not changed:
+            return []
+        remote_dirs = sorted(set(
+            posixpath.dirname(remote_path) for _, _, remote_path in changed))
+        execute_command(
+            u'mkdir -p {0}'.format(u' '.join(
+                shlex_quote(remote_path) for remote_path in remote_dirs)),
+            connection
+        )
+        sftp = _get_sftp(connection)
+        for _, local_path, remote_path in changed:
+            _put(sftp, local_path, remote_path, hostname)
+            stat = os.stat(local_path)
+            sftp.utime(remote_path, (stat.st_atime, stat.st_mtime))
+    return [path for path, _, _ in changed]
 
 
 def command(cmd, hostname=None, output_format=None, username=None,
-            password=None, key_filename=None, timeout=10):
+            password=None, key_filename=None, timeout=10, pooled=True,
+            lazy_json=False):
     """Executes SSH command(s) on remote hostname.
 
     :param str cmd: The command to run
@@ -254,39 +751,238 @@ def command(cmd, hostname=None, output_format=None, username=None,
         connecting to the server. If it is ``None`` ``key_filename`` from
         configuration's ``server`` section will be used.
     :param int timeout: Time to wait for establish the connection.
+    :param bool pooled: Run the command over a connection from the shared
+        connection pool instead of opening and closing a new one.
+    :param bool lazy_json: Parse the JSON output into read-only views, see
+        :func:`robottelo.cli.hammer.parse_json`.
     """
     hostname = hostname or settings.server.hostname
-    with get_connection(hostname=hostname, username=username,
-                        password=password, key_filename=key_filename,
-                        timeout=timeout) as connection:
-        return execute_command(cmd, connection, output_format, timeout)
+    connect = get_pooled_connection if pooled else get_connection
+    with connect(hostname=hostname, username=username, password=password,
+                 key_filename=key_filename, timeout=timeout) as connection:
+        return execute_command(
+            cmd, connection, output_format, timeout, lazy_json=lazy_json)
 
 
-def execute_command(cmd, connection, output_format=None, timeout=120):
+def execute_command(cmd, connection, output_format=None, timeout=120,
+                    lazy_json=False):
     """Execute a command via ssh in the given connection
 
     :param cmd: a command to be executed via ssh
     :param connection: SSH Paramiko client connection
     :param output_format: plain|json|csv|list valid only for hammer commands
     :param timeout: defaults to 120
+    :param bool lazy_json: Parse the JSON output into read-only views.
     :return: SSHCommandResult
     """
     logger.info('>>> %s', cmd)
+    stdout, stderr, errorcode = _exec_command(cmd, connection, timeout)
+    return build_command_result(
+        stdout, stderr, errorcode, output_format, lazy_json=lazy_json)
+
+
+class _CommandHooks(object):
+    """The cassette and metrics hooks of a command run on ``connection``.
+
+    Every way of running a command goes through them, so all the commands
+    are recorded to or replayed from the cassette in use, and measured, the
+    same way.
+    """
+
+    def __init__(self, cmd, connection):
+        self.cmd = cmd
+        self.connection = connection
+        self.cassette = cassette.current()
+        host = getattr(connection, '_hostname', None)
+        if host == settings.server.hostname:
+            # the default server is recorded as such, so a cassette can be
+            # replayed against any configured server
+            host = None
+        self.host = host
+        self.start = time.time()
+        self.first_byte_time = None
+
+    @property
+    def replaying(self):
+        """Whether the command is answered from the cassette."""
+        return self.cassette is not None and self.cassette.replaying
+
+    @property
+    def recording(self):
+        """Whether the command output is recorded to the cassette."""
+        return self.cassette is not None and self.cassette.recording
+
+    def play(self):
+        """Return the recorded ``stdout``, ``stderr`` and return code."""
+        return self.cassette.play(self.cmd, self.host)
+
+    def first_byte(self):
+        """Note that the first byte of output was received."""
+        if self.first_byte_time is None:
+            self.first_byte_time = time.time()
+
+    def done(self, stdout, stderr, return_code, stdout_size=None):
+        """Record the metrics of the finished command, and its output when
+        recording.
+
+        :param stdout: The raw ``stdout``, only needed when recording.
+        :param stderr: The raw ``stderr``.
+        :param int return_code: The exit status of the command.
+        :param int stdout_size: The size of ``stdout`` when it is not given.
+        """
+        self.first_byte()
+        if stdout_size is None:
+            stdout_size = len(stdout or b'')
+        host = getattr(self.connection, '_hostname', None)
+        metrics.SSH_FIRST_BYTE_SECONDS.observe(
+            self.first_byte_time - self.start, host=host)
+        metrics.SSH_COMMAND_SECONDS.observe(
+            time.time() - self.start, host=host)
+        metrics.SSH_BYTES_SENT.observe(len(self.cmd), host=host)
+        metrics.SSH_BYTES_RECEIVED.observe(
+            stdout_size + len(stderr or b''), host=host)
+        if self.recording:
+            self.cassette.record(
+                self.cmd, self.host, stdout, stderr, return_code,
+                self.first_byte_time - self.start, time.time() - self.start)
+
+
+def _exec_command(cmd, connection, timeout):
+    """Run a command in the given connection and return its raw ``stdout``,
+    ``stderr`` and return code.
+
+    When a cassette is in use the command is recorded to it, or answered from
+    it without running anything.
+    """
+    hooks = _CommandHooks(cmd, connection)
+    if hooks.replaying:
+        return hooks.play()
     _, stdout, stderr = connection.exec_command(cmd, timeout)
+    # Reading the first byte apart tells the time to first byte
+    first_byte = stdout.read(1)
+    hooks.first_byte()
 
     errorcode = stdout.channel.recv_exit_status()
 
-    stdout = stdout.read()
+    stdout = first_byte + stdout.read()
     stderr = stderr.read()
-    # Remove escape code for colors displayed in the output
-    regex = re.compile(r'\x1b\[\d\d?m')
-    if stdout:
+    hooks.done(stdout, stderr, errorcode)
+    return stdout, stderr, errorcode
+
+
+def _build_batch_script(cmds, marker, stop_on_failure=False):
+    """Build a shell script running ``cmds`` one after the other.
+
+    After each command the script writes a line with ``marker`` and the
+    command return code to ``stdout`` and a line with ``marker`` to
+    ``stderr``, so the output of each command can be told apart.
+    """
+    lines = []
+    for cmd in cmds:
+        # Each command runs in a subshell, like it does when run alone
+        lines.append(
+            u'( {0}\n) < /dev/null; rc=$?; '
+            u'printf "\\n{1} %d\\n" $rc; printf "\\n{1}\\n" >&2'
+            .format(cmd, marker)
+        )
+        if stop_on_failure:
+            lines.append(u'[ $rc -eq 0 ] || exit $rc')
+    return u'\n'.join(lines)
+
+
+def _split_batch_output(stdout, stderr, marker, output_format=None):
+    """Split the output of a batch script into one ``SSHCommandResult`` per
+    command run.
+    """
+    stdout_parts = re.split(
+        u'\n{0} (\\d+)\n'.format(marker), decode_to_utf8(stdout or u''))
+    stderr_parts = decode_to_utf8(stderr or u'').split(
+        u'\n{0}\n'.format(marker))
+    results = []
+    for index in range((len(stdout_parts) - 1) // 2):
+        results.append(build_command_result(
+            stdout_parts[2 * index],
+            stderr_parts[index] if index < len(stderr_parts) else u'',
+            int(stdout_parts[2 * index + 1]),
+            output_format
+        ))
+    return results
+
+
+def execute_batch(cmds, connection, output_format=None, timeout=120,
+                  stop_on_failure=False):
+    """Execute many commands as a single script via ssh in the given
+    connection.
+
+    The commands are sent and run in one round trip, but each command gets
+    its own result as if it was run by :func:`execute_command`.
+
+    :param cmds: A list of commands to be executed via ssh
+    :param connection: SSH Paramiko client connection
+    :param output_format: plain|json|csv|list valid only for hammer commands
+    :param timeout: defaults to 120
+    :param bool stop_on_failure: Do not run the remaining commands once a
+        command returned a non-zero return code.
+    :return: A list of SSHCommandResult, one for each command run. When
+        ``stop_on_failure`` is ``True`` the list may be shorter than
+        ``cmds``.
+    """
+    cmds = list(cmds)
+    marker = u'ROBOTTELO-BATCH-{0}'.format(uuid.uuid4().hex)
+    for cmd in cmds:
+        logger.info('>>> [batch] %s', cmd)
+    script = _build_batch_script(cmds, marker, stop_on_failure)
+    stdout, stderr, _ = _exec_command(script, connection, timeout)
+    return _split_batch_output(stdout, stderr, marker, output_format)
+
+
+def command_batch(cmds, hostname=None, output_format=None, username=None,
+                  password=None, key_filename=None, timeout=10,
+                  stop_on_failure=False):
+    """Executes many SSH commands on remote hostname in a single round trip.
+
+    :param cmds: A list of commands to run.
+    :param bool stop_on_failure: Do not run the remaining commands once a
+        command returned a non-zero return code.
+
+    The other parameters are the same as :func:`command`.
+
+    :return: A list of SSHCommandResult, one for each command run.
+    """
+    with get_pooled_connection(hostname=hostname, username=username,
+                               password=password, key_filename=key_filename,
+                               timeout=timeout) as connection:
+        return execute_batch(
+            cmds,
+            connection,
+            output_format=output_format,
+            timeout=timeout,
+            stop_on_failure=stop_on_failure,
+        )
+
+
+def build_command_result(stdout, stderr, return_code, output_format=None,
+                         lazy_json=False):
+    """Decode and clean up the raw output of a command.
+
+    :param bytes stdout: The raw ``stdout`` of the command.
+    :param bytes stderr: The raw ``stderr`` of the command.
+    :param int return_code: The exit status of the command.
+    :param output_format: plain|json|csv|list valid only for hammer commands
+    :param bool lazy_json: Parse the JSON output into read-only views.
+    :return: SSHCommandResult
+    """
+    if stdout and output_format == 'json' and return_code == 0:
+        # JSON is parsed straight from the raw output
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('<<< stdout\n%s', decode_to_utf8(stdout))
+    elif stdout:
         # Convert to unicode string
         stdout = decode_to_utf8(stdout)
         logger.info('<<< stdout\n%s', stdout)
     if stderr:
         # Convert to unicode string and remove all color codes characters
-        stderr = regex.sub('', decode_to_utf8(stderr))
+        stderr = _COLOR_CODES_REGEX.sub('', decode_to_utf8(stderr))
         logger.info('<<< stderr\n%s', stderr)
     # we don't want a list as output of 'plain' just pure text
     if stdout and output_format not in ('json', 'plain'):
@@ -297,12 +993,607 @@ def execute_command(cmd, connection, output_format=None, timeout=120):
         stdout = stdout.replace('""', '')
         stdout = u''.join(stdout).split('\n')
         stdout = [
-            regex.sub('', line)
+            _COLOR_CODES_REGEX.sub('', line)
             for line in stdout
             if not line.startswith('[')
         ]
     return SSHCommandResult(
-        stdout, stderr, errorcode, output_format)
+        stdout, stderr, return_code, output_format, lazy_json=lazy_json)
+
+
+class SSHCommandStream(object):
+    """Iterate over the ``stdout`` lines of a command while it runs.
+
+    ``stdout`` and ``stderr`` are drained together as the command produces
+    them, so the remote side never blocks on a full pipe. Lines are decoded
+    and cleaned up the same way :func:`execute_command` does, but only the
+    line being read is kept in memory. ``stderr`` is collected and is
+    available, together with ``return_code``, once all the lines were read::
+
+        with ssh.command_stream('rpm -qa') as stream:
+            for line in stream:
+                ...
+        print(stream.return_code)
+
+    :param channel: A paramiko channel on which the command was started.
+    :param output_format: plain|json|csv|list valid only for hammer commands
+    :param timeout: Seconds to wait for new output before raising
+        ``socket.timeout``. ``None`` waits forever.
+    :param on_close: Callable called with the stream when it is closed.
+    :param hooks: The ``_CommandHooks`` of the command, which measure it and
+        record it to the cassette in use once all its output was read.
+
+    """
+
+    def __init__(self, channel, output_format=None, timeout=None,
+                 on_close=None, chunk_size=32768, hooks=None):
+        self.channel = channel
+        self.output_format = output_format
+        self.timeout = timeout
+        self.on_close = on_close
+        self.chunk_size = chunk_size
+        self.hooks = hooks
+        self.return_code = None
+        self.stderr = None
+        self._stderr = []
+        # The raw stdout is only kept when it is recorded to a cassette
+        self._stdout = [] if hooks is not None and hooks.recording else None
+        self._stdout_size = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self._lines = self._read_lines()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._lines)
+
+    next = __next__  # Python 2
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_lines(self):
+        """Yield the ``stdout`` lines as soon as they are complete."""
+        pending = u''
+        for chunk in self._read_chunks():
+            pending += chunk
+            lines = pending.split(u'\n')
+            pending = lines.pop()
+            for line in lines:
+                line = self._clean_line(line)
+                if line is not None:
+                    yield line
+        line = self._clean_line(pending)
+        if line is not None:
+            yield line
+
+    def _clean_line(self, line):
+        """Apply to a line the same clean up done by ``execute_command``.
+
+        :return: The cleaned up line or ``None`` if the line must be skipped.
+        """
+        if self.output_format in ('json', 'plain'):
+            return line
+        if line.startswith('['):
+            return None
+        return _COLOR_CODES_REGEX.sub('', line.replace('""', ''))
+
+    def _read_chunks(self):
+        """Yield decoded ``stdout`` chunks collecting ``stderr``."""
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.time() + self.timeout
+        try:
+            while True:
+                received = False
+                if self.channel.recv_stderr_ready():
+                    self._stderr.append(
+                        self.channel.recv_stderr(self.chunk_size))
+                    received = True
+                if self.channel.recv_ready():
+                    data = self.channel.recv(self.chunk_size)
+                    received = True
+                    if data:
+                        if self.hooks is not None:
+                            self.hooks.first_byte()
+                        self._stdout_size += len(data)
+                        if self._stdout is not None:
+                            self._stdout.append(data)
+                        yield self._decoder.decode(data)
+                if received:
+                    if deadline is not None:
+                        deadline = time.time() + self.timeout
+                    continue
+                if self.channel.exit_status_ready():
+                    if not (self.channel.recv_ready() or
+                            self.channel.recv_stderr_ready()):
+                        break
+                    continue
+                if self.channel.closed:
+                    raise socket.error(
+                        'Channel closed before the command finished')
+                if deadline is not None and time.time() > deadline:
+                    raise socket.timeout(
+                        'No output received in {0} seconds'.format(
+                            self.timeout)
+                    )
+                time.sleep(0.005)
+            tail = self._decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            self.return_code = self.channel.recv_exit_status()
+            stderr = b''.join(self._stderr)
+            if self.hooks is not None:
+                self.hooks.done(
+                    None if self._stdout is None else b''.join(self._stdout),
+                    stderr,
+                    self.return_code,
+                    stdout_size=self._stdout_size,
+                )
+            self.stderr = _COLOR_CODES_REGEX.sub(
+                '', decode_to_utf8(stderr))
+            if self.stderr:
+                logger.info('<<< stderr\n%s', self.stderr)
+        finally:
+            self.close()
+
+    def close(self):
+        """Close the channel, stopping the command if it still runs."""
+        if self.channel is None:
+            return
+        self.channel.close()
+        self.channel = None
+        if self.on_close is not None:
+            self.on_close(self)
+
+
+class _ReplayedChannel(object):
+    """A finished channel giving the output of a command replayed from a
+    cassette, read by ``SSHCommandStream`` like a real channel.
+    """
+
+    def __init__(self, stdout, stderr, return_code):
+        self._stdout = stdout or b''
+        self._stderr = stderr or b''
+        self._return_code = return_code
+        self.closed = False
+
+    def recv_ready(self):
+        return bool(self._stdout)
+
+    def recv(self, size):
+        data, self._stdout = self._stdout[:size], self._stdout[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        return bool(self._stderr)
+
+    def recv_stderr(self, size):
+        data, self._stderr = self._stderr[:size], self._stderr[size:]
+        return data
+
+    def exit_status_ready(self):
+        return True
+
+    def recv_exit_status(self):
+        return self._return_code
+
+    def close(self):
+        self.closed = True
+
+
+def _open_command_channel(cmd, connection, register=None):
+    """Start a command in the given connection and return its channel.
+
+    When a cassette is replayed nothing runs and the channel gives the
+    recorded output.
+
+    :param register: A callable given the channel before the command starts,
+        e.g. ``_RemoteJob.register``.
+    :return: A tuple with the channel and the ``_CommandHooks`` to give to
+        the ``SSHCommandStream`` reading it.
+    """
+    hooks = _CommandHooks(cmd, connection)
+    if hooks.replaying:
+        return _ReplayedChannel(*hooks.play()), None
+    channel = connection.get_transport().open_session()
+    if register is not None:
+        channel = register(channel)
+    channel.exec_command(cmd)
+    return channel, hooks
+
+
+def execute_command_stream(cmd, connection, output_format=None,
+                           timeout=None):
+    """Start a command via ssh in the given connection and return a
+    ``SSHCommandStream`` yielding its ``stdout`` lines.
+
+    Like :func:`execute_command`, the command is recorded to or replayed
+    from the cassette in use, and measured, once all its output was read.
+
+    :param cmd: a command to be executed via ssh
+    :param connection: SSH Paramiko client connection
+    :param output_format: plain|json|csv|list valid only for hammer commands
+    :param timeout: Seconds to wait for new output. ``None`` waits forever.
+    :return: SSHCommandStream
+    """
+    logger.info('>>> %s', cmd)
+    channel, hooks = _open_command_channel(cmd, connection)
+    return SSHCommandStream(channel, output_format, timeout, hooks=hooks)
+
+
+def command_stream(cmd, hostname=None, output_format=None, username=None,
+                   password=None, key_filename=None, timeout=None):
+    """Executes SSH command on remote hostname and return a
+    ``SSHCommandStream`` yielding its ``stdout`` lines.
+
+    The command runs over a connection from the shared connection pool, which
+    is given back when the stream is exhausted or closed.
+
+    The parameters are the same as :func:`command`, but ``timeout`` is the
+    time to wait for new output.
+    """
+    client = _connection_pool.checkout(
+        hostname, username, password, key_filename)
+    try:
+        stream = execute_command_stream(cmd, client, output_format, timeout)
+    except BaseException:
+        _connection_pool.checkin(client, discard=True)
+        raise
+    stream.on_close = lambda _: _connection_pool.checkin(client)
+    return stream
+
+
+def command_many(hosts, cmd, concurrency=10, fail_fast=False,
+                 output_format=None, username=None, password=None,
+                 key_filename=None, timeout=10):
+    """Run the same command on many hosts in parallel.
+
+    Commands run over pooled connections, at most ``concurrency`` at the same
+    time. A command which could not be run, for example because the host is
+    unreachable, gets a result with ``255`` as return code, like the ``ssh``
+    command line tool does, and the error message as ``stderr``.
+
+    :param hosts: The hostnames to run the command on.
+    :param str cmd: The command to run.
+    :param int concurrency: The maximum number of commands running at the
+        same time.
+    :param bool fail_fast: If ``True`` the command is not started on the
+        remaining hosts once a command failed, and those hosts are left out
+        of the results. By default the command runs on all the hosts.
+    :param str output_format: json, csv or None
+    :param int timeout: Time to wait for the ssh command to finish.
+
+    The other parameters are the same as :func:`command`.
+
+    :return: An ``OrderedDict`` mapping each host, in the order of
+        ``hosts``, to its ``SSHCommandResult``. The ``elapsed`` attribute of
+        each result holds the wall time spent on the host.
+    """
+    hosts = list(hosts)
+    failed = threading.Event()
+
+    def run(hostname):
+        if fail_fast and failed.is_set():
+            return hostname, None
+        start = time.time()
+        try:
+            result = command(
+                cmd,
+                hostname=hostname,
+                output_format=output_format,
+                username=username,
+                password=password,
+                key_filename=key_filename,
+                timeout=timeout,
+            )
+        except Exception as err:
+            logger.warning('Failed to run %r on %s: %s', cmd, hostname, err)
+            result = SSHCommandResult(
+                stdout=[], stderr=six.text_type(err), return_code=255)
+        result.elapsed = time.time() - start
+        if result.return_code != 0:
+            failed.set()
+        return hostname, result
+
+    results = OrderedDict()
+    if not hosts:
+        return results
+    pool = ThreadPool(max(1, min(concurrency, len(hosts))))
+    try:
+        for hostname, result in pool.imap(run, hosts):
+            if result is not None:
+                results[hostname] = result
+    finally:
+        pool.close()
+        pool.join()
+    return results
+
+
+class _RemoteJob(object):
+    """A blocking remote operation which can be stopped from another thread.
+
+    Channels and SFTP sessions used by the operation are registered in the
+    job, cancelling the job closes them, which makes the blocked operation
+    fail right away instead of running until the end.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._closables = []
+        self.cancelled = False
+
+    def register(self, closable):
+        """Register a channel or SFTP session to be closed on cancel.
+
+        :return: ``closable`` itself.
+        """
+        with self._lock:
+            if not self.cancelled:
+                self._closables.append(closable)
+                return closable
+        closable.close()
+        raise socket.error('Remote operation cancelled')
+
+    def cancel(self):
+        """Close all the registered channels and SFTP sessions."""
+        with self._lock:
+            self.cancelled = True
+            closables, self._closables = self._closables, []
+        for closable in closables:
+            try:
+                closable.close()
+            except Exception as err:  # pragma: no cover
+                logger.debug('Failed to close cancelled channel: %s', err)
+
+
+def _command_job(job, cmd, output_format, connection_params):
+    """Run a command over a pooled connection as part of ``job``."""
+    with get_pooled_connection(*connection_params) as connection:
+        logger.info('>>> %s', cmd)
+        channel, hooks = _open_command_channel(
+            cmd, connection, register=job.register)
+        stream = SSHCommandStream(channel, output_format='plain', hooks=hooks)
+        stdout = u'\n'.join(stream)
+        return build_command_result(
+            stdout, stream.stderr, stream.return_code, output_format)
+
+
+def _upload_job(job, local_file, remote_file, connection_params):
+    """Upload a file over a pooled connection as part of ``job``.
+
+    The pooled SFTP sessions are used, a cancelled job closes them and they
+    are opened again by the next transfer.
+    """
+    with get_pooled_connection(*connection_params) as connection:
+        _put(
+            _register_sftp(connection, job.register), local_file,
+            remote_file, connection_params[0], register=job.register)
+
+
+def _download_job(job, remote_file, local_file, connection_params):
+    """Download a file over a pooled connection as part of ``job``.
+
+    The pooled SFTP sessions are used, a cancelled job closes them and they
+    are opened again by the next transfer.
+    """
+    with get_pooled_connection(*connection_params) as connection:
+        _get(
+            _register_sftp(connection, job.register), remote_file,
+            local_file, connection_params[0], register=job.register)
+
+
+_async_executor = None
+_async_executor_lock = threading.Lock()
+# Maximum number of remote operations running at the same time in the
+# executor used by the asyncio functions
+ASYNC_MAX_WORKERS = 128
+
+
+def _get_async_executor():
+    """Return the thread pool running the asyncio remote operations.
+
+    paramiko is a blocking library, the asyncio functions run the blocking
+    calls in this thread pool and let the event loop wait on their results.
+    """
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _async_executor = ThreadPoolExecutor(ASYNC_MAX_WORKERS)
+    return _async_executor
+
+
+def _create_future(loop):
+    """Return a new future attached to ``loop``."""
+    if sys.version_info < (3, 5, 2):
+        # loop.create_future was added in Python 3.5.2
+        return asyncio.Future(loop=loop)
+    return loop.create_future()
+
+
+def _run_async(job_function, args, loop=None, semaphore=None, timeout=None):
+    """Run a remote job in the executor and return an asyncio future with
+    its result.
+
+    :param job_function: A function accepting a ``_RemoteJob`` followed by
+        ``args``.
+    :param loop: The event loop, by default the current event loop.
+    :param semaphore: An ``asyncio.Semaphore`` bounding the number of
+        operations running at the same time.
+    :param timeout: Seconds to wait for the operation, not counting the time
+        waiting for the semaphore. The operation is cancelled and the future
+        raises ``asyncio.TimeoutError`` when it expires.
+    """
+    if asyncio is None:  # pragma: no cover
+        raise RuntimeError('asyncio is not available')
+    loop = loop or asyncio.get_event_loop()
+    job = _RemoteJob()
+    result = _create_future(loop)
+    timer = []
+
+    def on_result_done(future):
+        if future.cancelled():
+            job.cancel()
+
+    def on_timeout():
+        if not result.done():
+            result.set_exception(asyncio.TimeoutError())
+            job.cancel()
+
+    def on_work_done(work):
+        if semaphore is not None:
+            semaphore.release()
+        for handle in timer:
+            handle.cancel()
+        if result.done():
+            return
+        if work.cancelled():
+            result.cancel()
+        elif work.exception() is not None:
+            result.set_exception(work.exception())
+        else:
+            result.set_result(work.result())
+
+    def start(acquired=None):
+        if acquired is not None and acquired.cancelled():
+            result.cancel()
+            return
+        if result.done():  # cancelled while waiting for the semaphore
+            if semaphore is not None:
+                semaphore.release()
+            return
+        if timeout is not None:
+            timer.append(loop.call_later(timeout, on_timeout))
+        work = loop.run_in_executor(
+            _get_async_executor(),
+            functools.partial(job_function, job, *args)
+        )
+        work.add_done_callback(on_work_done)
+
+    result.add_done_callback(on_result_done)
+    if semaphore is None:
+        start()
+    else:
+        acquire = asyncio.ensure_future(semaphore.acquire(), loop=loop)
+        acquire.add_done_callback(start)
+    return result
+
+
+def command_async(cmd, hostname=None, output_format=None, username=None,
+                  password=None, key_filename=None, timeout=None,
+                  semaphore=None, loop=None):
+    """Asyncio counterpart of :func:`command`.
+
+    Returns a future which can be awaited and resolves to a
+    ``SSHCommandResult``. Cancelling the future, or reaching ``timeout``,
+    closes the channel running the command.
+
+    :param semaphore: An ``asyncio.Semaphore`` bounding the number of
+        operations running at the same time.
+    :param loop: The event loop, by default the current event loop.
+
+    The other parameters are the same as :func:`command`, but ``timeout`` is
+    the time to wait for the command to finish, which raises
+    ``asyncio.TimeoutError``.
+    """
+    return _run_async(
+        _command_job,
+        (cmd, output_format, (hostname, username, password, key_filename)),
+        loop=loop,
+        semaphore=semaphore,
+        timeout=timeout,
+    )
+
+
+def upload_file_async(local_file, remote_file, hostname=None, timeout=None,
+                      semaphore=None, loop=None):
+    """Asyncio counterpart of :func:`upload_file`.
+
+    Returns a future which can be awaited. Cancelling the future, or reaching
+    ``timeout``, closes the SFTP session doing the transfer.
+    """
+    return _run_async(
+        _upload_job,
+        (local_file, remote_file, (hostname,)),
+        loop=loop,
+        semaphore=semaphore,
+        timeout=timeout,
+    )
+
+
+def download_file_async(remote_file, local_file=None, hostname=None,
+                        timeout=None, semaphore=None, loop=None):
+    """Asyncio counterpart of :func:`download_file`.
+
+    Returns a future which can be awaited. Cancelling the future, or reaching
+    ``timeout``, closes the SFTP session doing the transfer.
+    """
+    if local_file is None:
+        local_file = remote_file
+    return _run_async(
+        _download_job,
+        (remote_file, local_file, (hostname,)),
+        loop=loop,
+        semaphore=semaphore,
+        timeout=timeout,
+    )
+
+
+class _AsyncPooledConnection(object):
+    """Asynchronous context manager yielding a pooled connection."""
+
+    def __init__(self, connection_params, loop=None):
+        self.connection_params = connection_params
+        self.loop = loop
+        self.client = None
+
+    def _loop(self):
+        return self.loop or asyncio.get_event_loop()
+
+    def __aenter__(self):
+        future = self._loop().run_in_executor(
+            _get_async_executor(),
+            functools.partial(
+                _connection_pool.checkout, *self.connection_params)
+        )
+
+        def on_checkout(checkout):
+            if not checkout.cancelled() and checkout.exception() is None:
+                self.client = checkout.result()
+        future.add_done_callback(on_checkout)
+        return future
+
+    def __aexit__(self, exc_type, exc_value, traceback):
+        return self._loop().run_in_executor(
+            _get_async_executor(),
+            functools.partial(
+                _connection_pool.checkin,
+                self.client,
+                discard=exc_type is not None
+            )
+        )
+
+
+def get_connection_async(hostname=None, username=None, password=None,
+                         key_filename=None, timeout=10, loop=None):
+    """Asyncio counterpart of :func:`get_pooled_connection`.
+
+    Returns an asynchronous context manager yielding a pooled connection,
+    the connection is checked out and given back without blocking the event
+    loop::
+
+        async with ssh.get_connection_async() as connection:
+            ...
+
+    Blocking calls on the connection should be run in an executor.
+    """
+    return _AsyncPooledConnection(
+        (hostname, username, password, key_filename, timeout), loop=loop)
 
 
 def is_ssh_pub_key(key):
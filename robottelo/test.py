@@ -19,16 +19,19 @@ except ImportError:
     # saucelabs.
     sauceclient = None
 
+from collections import OrderedDict
 from datetime import datetime
 from fauxfactory import gen_string
 from nailgun import entities
 from robottelo import ssh
-from robottelo.cleanup import EntitiesCleaner
+from robottelo.cleanup import EntitiesCleaner, cached_entity_cleanup
 from robottelo.cli.base import CLIReturnCodeError
 from robottelo.cli.org import Org as OrgCli
 from robottelo.cli.subscription import Subscription
 from robottelo.config import settings
 from robottelo.constants import DEFAULT_ORG, DEFAULT_ORG_ID
+from robottelo.decorators import OBJECT_CACHE
+from robottelo.performance.candlepin import Candlepin
 from robottelo.performance.constants import NUM_THREADS
 from robottelo.performance.graph import (
     generate_bar_chart_stat,
@@ -36,12 +39,7 @@ from robottelo.performance.graph import (
     generate_line_chart_stat_bucketized_candlepin,
 )
 from robottelo.performance.stat import generate_stat_for_concurrent_thread
-from robottelo.performance.thread import (
-    DeleteThread,
-    SyncThread,
-    SubscribeAKThread,
-    SubscribeAttachThread
-)
+from robottelo.performance.thread import DeleteThread, SyncThread
 from robottelo.ui.browser import browser, DockerBrowser
 from robottelo.ui.activationkey import ActivationKey
 from robottelo.ui.architecture import Architecture
@@ -287,11 +285,13 @@ class TestCase(unittest2.TestCase):
                 entities.Host,
                 entities.HostGroup
             )
+            OBJECT_CACHE.register_cleanup(cached_entity_cleanup)
 
     @classmethod
     def tearDownClass(cls):
         cls.logger.info('Started tearDownClass: {0}/{1}'.format(
             cls.__module__, cls.__name__))
+        OBJECT_CACHE.end_scope('class')
         if settings.cleanup:
             cls.cleaner.clean()
 
@@ -722,15 +722,13 @@ class ConcurrentTestCase(TestCase):
     def _get_subscription_id(self):
         """Get subscription id"""
         try:
-            result = Subscription.list(
-                {'organization-id': self.org_id},
-                per_page=False
-            )
-        except CLIReturnCodeError:
+            subscription = next(Subscription.iter_list(
+                {'organization-id': self.org_id}, page_size=1))
+        except (CLIReturnCodeError, StopIteration):
             self.logger.error('Fail to get subscription id!')
             raise RuntimeError('Invalid subscription id. Stop!')
-        subscription_id = result[0]['id']
-        subscription_name = result[0]['name']
+        subscription_id = subscription['id']
+        subscription_name = subscription['name']
         self.logger.info(
             'Subscribed to {0} with subscription id {1}'
             .format(subscription_name, subscription_id)
@@ -1089,29 +1087,18 @@ class ConcurrentTestCase(TestCase):
         self._set_num_iterations(total_iterations, current_num_threads)
         self._set_bucket_size()
 
-        # Create a list to store all threads
-        thread_list = []
         # Create a dictionary to store all timing results from each client
-        time_result_dict_ak = {}
-
-        # Create new threads and start each thread mapped with a vm
-        for i in range(current_num_threads):
-            thread_name = 'thread-{0}'.format(i)
-            time_result_dict_ak[thread_name] = []
-            thread = SubscribeAKThread(
-                i,
-                thread_name,
-                time_result_dict_ak,
-                self.num_iterations,
-                self.ak_name,
-                self.default_org,
-                current_vm_list[i]
-            )
-            thread.start()
-            thread_list.append(thread)
-
-        # wait all threads in thread list
-        self._join_all_threads(thread_list)
+        time_result_dict_ak = OrderedDict(
+            ('thread-{0}'.format(i), []) for i in range(current_num_threads))
+
+        # Register all the vms in parallel on each iteration
+        for i in range(self.num_iterations):
+            self.logger.debug(
+                'register with ak {0} on {1} clients attempt {2}'
+                .format(self.ak_name, current_num_threads, i))
+            time_points = Candlepin.register_activation_key_many(
+                self.ak_name, self.default_org, current_vm_list)
+            self._append_time_points(time_result_dict_ak, time_points)
 
         # write raw result of activation-key
         self._write_raw_csv_file(
@@ -1129,6 +1116,18 @@ class ConcurrentTestCase(TestCase):
             'stat-ak-{0}-clients'.format(current_num_threads)
         )
 
+    @staticmethod
+    def _append_time_points(time_result_dict, time_points):
+        """Append the timing value of each client to its timing results.
+
+        Clients on which the command failed have a ``None`` timing value,
+        which is left out of the results.
+        """
+        for timings, time_point in zip(
+                time_result_dict.values(), time_points):
+            if time_point is not None:
+                timings.append(time_point)
+
     def kick_off_att_test(self, current_num_threads, total_iterations):
         """Refactor out concurrent register and attach test case
 
@@ -1144,36 +1143,30 @@ class ConcurrentTestCase(TestCase):
         self._set_num_iterations(total_iterations, current_num_threads)
         self._set_bucket_size()
 
-        # Create a list to store all threads
-        thread_list = []
         # Create a dictionary to store register timings from each client
-        time_result_dict_register = {}
+        time_result_dict_register = OrderedDict(
+            ('thread-{0}'.format(i), []) for i in range(current_num_threads))
         # Create a dictionary to store attach timings from each client
-        time_result_dict_attach = {}
-
-        # Create new threads and start each thread mapped with a vm
-        for i in range(current_num_threads):
-            thread_name = 'thread-{0}'.format(i)
-            time_result_dict_register[thread_name] = []
-            time_result_dict_attach[thread_name] = []
-
-            thread = SubscribeAttachThread(
-                i,
-                thread_name,
-                {},
-                time_result_dict_register,
-                time_result_dict_attach,
-                self.num_iterations,
-                self.sub_id,
-                self.default_org,
-                self.environment,
-                current_vm_list[i]
+        time_result_dict_attach = OrderedDict(
+            ('thread-{0}'.format(i), []) for i in range(current_num_threads))
+
+        # Register and attach all the vms in parallel on each iteration
+        for i in range(self.num_iterations):
+            self.logger.debug(
+                'register with subscription {0} on {1} clients attempt {2}'
+                .format(self.sub_id, current_num_threads, i))
+            time_points_reg, time_points_att = (
+                Candlepin.register_attach_many(
+                    self.sub_id,
+                    self.default_org,
+                    self.environment,
+                    current_vm_list
+                )
             )
-            thread.start()
-            thread_list.append(thread)
-
-        # wait all threads in thread list
-        self._join_all_threads(thread_list)
+            self._append_time_points(
+                time_result_dict_register, time_points_reg)
+            self._append_time_points(
+                time_result_dict_attach, time_points_att)
 
         # write raw result of register
         self._write_raw_csv_file(
@@ -247,16 +247,17 @@ class VirtualMachine(object):
             installed.
 
         """
-        self.run('yum install -y katello-agent')
-        result = self.run('rpm -q katello-agent')
-        if result.return_code != 0:
+        start_gofer = bz_bug_is_open('1431747')
+        cmds = ['yum install -y katello-agent', 'rpm -q katello-agent']
+        if start_gofer:
+            cmds.append('service goferd start')
+        cmds.append('service goferd status')
+        results = self.run_batch(cmds)
+        if results[1].return_code != 0:
             raise VirtualMachineError('Failed to install katello-agent')
-        if bz_bug_is_open('1431747'):
-            gofer_start = self.run('service goferd start')
-            if gofer_start.return_code != 0:
-                raise VirtualMachineError('Failed to start katello-agent')
-        gofer_check = self.run('service goferd status')
-        if gofer_check.return_code != 0:
+        if start_gofer and results[2].return_code != 0:
+            raise VirtualMachineError('Failed to start katello-agent')
+        if results[-1].return_code != 0:
             raise VirtualMachineError('katello-agent is not running')
 
     def install_katello_ca(self):
@@ -368,6 +369,28 @@ class VirtualMachine(object):
 
         return ssh.command(cmd, hostname=self.ip_addr)
 
+    def run_batch(self, cmds, stop_on_failure=False):
+        """Runs many ssh commands on the virtual machine in a single round
+        trip
+
+        :param list cmds: Commands to run on the virtual machine
+        :param bool stop_on_failure: Do not run the remaining commands once a
+            command failed
+        :return: A list of :class:`robottelo.ssh.SSHCommandResult` instances,
+            one for each command run
+        :raises robottelo.vm.VirtualMachineError: If the virtual machine is not
+            created.
+
+        """
+        if not self._created:
+            raise VirtualMachineError(
+                'The virtual machine should be created before running any ssh '
+                'command'
+            )
+
+        return ssh.command_batch(
+            cmds, hostname=self.ip_addr, stop_on_failure=stop_on_failure)
+
     def get(self, remote_path, local_path=None):
         """Get a remote file from the virtual machine."""
         if not self._created:
@@ -421,14 +444,13 @@ class VirtualMachine(object):
         if result.return_code != 0:
             raise VirtualMachineError(
                 'Failed to install the puppet rpm')
-        self.run(
-            'echo "{0}" >> /etc/puppet/puppet.conf'
-            .format(puppet_conf)
-        )
-        # This particular puppet run on client would populate a cert on sat6
-        # under the capsule --> certifcates or via cli "puppet cert list", so
-        # that we sign it.
-        self.run(u'puppet agent -t')
+        self.run_batch([
+            u'echo "{0}" >> /etc/puppet/puppet.conf'.format(puppet_conf),
+            # This particular puppet run on client would populate a cert on
+            # sat6 under the capsule --> certifcates or via cli "puppet cert
+            # list", so that we sign it.
+            u'puppet agent -t',
+        ])
         ssh.command(u'puppet cert sign --all')
         # This particular puppet run would create the host entity under
         # 'All Hosts' and let's redirect stderr to /dev/null as errors at this
@@ -491,29 +513,28 @@ class VirtualMachine(object):
 
         self.configure_rhel_repo(rhel_repo)
 
-        self.run(
-            'wget -O /etc/yum.repos.d/insights.repo {0}'.format(insights_repo))
-
-        # Install redhat-access-insights package
+        # Add the insights repo, install the redhat-access-insights package,
+        # query it to verify it is installed and register client with Red Hat
+        # Access Insights. A failed wget is ignored, the package may still be
+        # installed from the other repositories.
         package_name = 'redhat-access-insights'
-        result = self.run('yum install -y {0}'.format(package_name))
-        if result.return_code != 0:
+        results = self.run_batch([
+            'wget -O /etc/yum.repos.d/insights.repo {0}'.format(insights_repo),
+            'yum install -y {0}'.format(package_name),
+            'rpm -qi {0}'.format(package_name),
+            'redhat-access-insights --register',
+        ])
+        if results[1].return_code != 0:
             raise VirtualMachineError(
                 'Unable to install redhat-access-insights package'
             )
-
-        # Verify if package is installed by query it
-        result = self.run('rpm -qi {0}'.format(package_name))
         logger.info('Insights client rpm version: {0}'.format(
-            result.stdout))
-        if result.return_code != 0:
+            results[2].stdout))
+        if results[2].return_code != 0:
             raise VirtualMachineError(
                 'Unable to install redhat-access-insights package'
             )
-
-        # Register client with Red Hat Access Insights
-        result = self.run('redhat-access-insights --register')
-        if result.return_code != 0:
+        if results[3].return_code != 0:
             raise VirtualMachineError(
                 'Unable to register client to Access Insights through '
                 'Satellite')
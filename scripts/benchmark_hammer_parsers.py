@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+"""Benchmark the parsers of hammer output from ``robottelo.cli.hammer``.
+
+Each parser is run on a large synthetic output, and its best time and, on
+Python 3, its peak memory usage are printed::
+
+    python scripts/benchmark_hammer_parsers.py csv --rows 50000
+    python scripts/benchmark_hammer_parsers.py info --versions 20000
+    python scripts/benchmark_hammer_parsers.py json --hosts 20000 \
+        --packages 100000
+
+"""
+from __future__ import print_function
+
+import argparse
+import csv
+import gc
+import json
+import re
+import sys
+import timeit
+
+import six
+from collections import OrderedDict
+from six.moves import cStringIO as StringIO
+from six.moves import zip
+
+from robottelo.cli import hammer
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+def legacy_parse_csv(output):
+    """The parser used before CSV output was read line by line, kept as a
+    reference.
+    """
+    data = '\n'.join(output)
+    if six.PY2:
+        data = data.encode('utf8')
+    reader = csv.reader(StringIO(data))
+    if six.PY2:
+        reader = ([value.decode('utf8') for value in row] for row in reader)
+    keys = [hammer._normalize(header) for header in next(reader)]
+    return [dict(zip(keys, values)) for values in reader if len(values) > 0]
+
+
+def legacy_parse_info(output):
+    """The parser used before the single pass rewrite, kept as a reference.
+    """
+    contents = {}
+    sub_prop = None
+    sub_num = None
+    for line in output:
+        if line == '':
+            continue
+        if line.startswith(' '):
+            if line.find(':') != -1 and not line.find('::') != -1:
+                key, value = line.lstrip().split(":", 1)
+            elif line.find('=>') != -1:
+                key, value = line.lstrip().split(" =>", 1)
+            else:
+                key = value = None
+            if key is None and value is None:
+                match = re.match(r'\d+\)\s+(.+)$', line.lstrip())
+                if match is None:
+                    match = re.match(r'(.*)$', line.lstrip())
+                value = match.group(1)
+                if isinstance(contents[sub_prop], dict):
+                    contents[sub_prop] = []
+                contents[sub_prop].append(value)
+            else:
+                starts_with_number = re.match(r'(\d+)\)', key)
+                if starts_with_number:
+                    sub_num = int(starts_with_number.group(1))
+                    if sub_num == 1:
+                        contents[sub_prop] = []
+                    key = re.sub(r'\d+\)', '', key)
+                    contents[sub_prop].append({})
+                key = key.lstrip().replace(' ', '-').lower()
+                if sub_num is not None:
+                    contents[sub_prop][-1][key] = value.lstrip()
+                else:
+                    contents[sub_prop][key] = value.lstrip()
+        else:
+            sub_num = None
+            key, value = line.lstrip().split(":", 1)
+            key = key.lstrip().replace(' ', '-').lower()
+            if value.lstrip() == '':
+                sub_prop = key
+                contents[sub_prop] = {}
+            else:
+                contents[key] = value.lstrip()
+    return contents
+
+
+def generate_csv(rows):
+    """Generate the lines of a hammer ``package list`` like CSV output."""
+    lines = [u'ID,Filename,Source RPM,Name,Version,Release,Arch,Epoch']
+    for index in range(rows):
+        lines.append(
+            u'{0},package-{0}-1.0-{1}.el7.x86_64.rpm,'
+            u'package-{0}-1.0-{1}.el7.src.rpm,package-{0},1.0,{1}.el7,'
+            u'x86_64,0'.format(index, index % 10)
+        )
+    return lines
+
+
+def generate_package_records(rows):
+    """Generate the records of a hammer ``package list`` like output."""
+    return [
+        OrderedDict((
+            (u'ID', index),
+            (u'Filename', u'package-{0}-1.0-{1}.el7.x86_64.rpm'.format(
+                index, index % 10)),
+            (u'Source RPM', u'package-{0}-1.0-{1}.el7.src.rpm'.format(
+                index, index % 10)),
+            (u'Name', u'package-{0}'.format(index)),
+            (u'Version', u'1.0'),
+            (u'Release', u'{0}.el7'.format(index % 10)),
+            (u'Arch', u'x86_64'),
+            (u'Epoch', 0),
+        ))
+        for index in range(rows)
+    ]
+
+
+def generate_host_records(rows):
+    """Generate the records of a hammer ``host list`` like output, with some
+    nested attributes.
+    """
+    return [
+        OrderedDict((
+            (u'Id', index),
+            (u'Name', u'host-{0}.example.com'.format(index)),
+            (u'Operating System', u'RedHat 7.3'),
+            (u'Host Group', u'hostgroup-{0}'.format(index % 50)),
+            (u'IP', u'10.{0}.{1}.{2}'.format(
+                index // 65536, index // 256 % 256, index % 256)),
+            (u'MAC', u'52:54:00:{0:02x}:{1:02x}:{2:02x}'.format(
+                index // 65536, index // 256 % 256, index % 256)),
+            (u'Content View', OrderedDict((
+                (u'ID', index % 20), (u'Name', u'cv-{0}'.format(index % 20))
+            ))),
+            (u'Lifecycle Environment', OrderedDict((
+                (u'ID', 1), (u'Name', u'Library')
+            ))),
+            (u'Parameters', [
+                OrderedDict(((u'Name', u'param'), (u'Value', index)))
+            ]),
+            (u'Enabled', True),
+        ))
+        for index in range(rows)
+    ]
+
+
+def records_to_csv(records):
+    """Format flat records as the lines of hammer CSV output."""
+    lines = [u','.join(records[0])]
+    lines.extend(
+        u','.join(u'{0}'.format(value) for value in record.values())
+        for record in records
+    )
+    return lines
+
+
+def read_all(value):
+    """Read every value of a parsed JSON output, return how many there are.
+    """
+    if isinstance(value, (dict, hammer.JSONObject)):
+        return sum(read_all(value[key]) for key in value)
+    elif isinstance(value, (list, hammer.JSONArray)):
+        return sum(read_all(item) for item in value)
+    return 1
+
+
+def generate_info(versions):
+    """Generate the lines of a hammer ``content-view info`` like output with
+    many versions and repositories.
+    """
+    lines = [
+        u'ID:                     42',
+        u'Name:                   rhel7-cv',
+        u'Description:',
+        u'Organization:           Default Organization',
+        u'Activation Keys:',
+    ]
+    lines.extend(u' ak{0}'.format(index) for index in range(versions))
+    lines.append(u'Yum Repositories:')
+    for index in range(versions):
+        lines.extend([
+            u' {0}) ID:    {0}'.format(index + 1),
+            u'    Name:  Repository {0}'.format(index),
+            u'    Label: repository_{0}'.format(index),
+        ])
+    lines.append(u'Versions:')
+    for index in range(versions):
+        lines.extend([
+            u' {0}) ID:        {0}'.format(index + 1),
+            u'    Version:   {0}.0'.format(index + 1),
+            u'    Published: 2017/03/01 10:00:01',
+        ])
+    lines.append(u'Parameters:')
+    lines.extend(
+        u' param{0} => value::{0}'.format(index) for index in range(versions))
+    return lines
+
+
+def measure(function, repeat):
+    """Return the best time and the peak memory, in bytes, of a call."""
+    best = min(timeit.repeat(function, number=1, repeat=repeat))
+    peak = None
+    if tracemalloc is not None:
+        gc.collect()
+        tracemalloc.start()
+        result = function()  # noqa
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del result
+    return best, peak
+
+
+def report(name, best, peak):
+    """Print one line of results."""
+    memory = 'n/a' if peak is None else '{0:.1f} MiB'.format(
+        peak / 1024.0 / 1024)
+    print('{0:<32} {1:>10.3f} s {2:>12}'.format(name, best, memory))
+
+
+def benchmark_csv(args):
+    """Compare the CSV parsers."""
+    lines = generate_csv(args.rows)
+    print('CSV output with {0} rows'.format(args.rows))
+    cases = (
+        ('legacy parse_csv', lambda: legacy_parse_csv(lines)),
+        ('parse_csv', lambda: hammer.parse_csv(lines)),
+        ('parse_csv(compact=True)',
+         lambda: hammer.parse_csv(lines, compact=True)),
+        ('iter_csv (consumed lazily)',
+         lambda: sum(1 for _ in hammer.iter_csv(lines))),
+    )
+    for name, function in cases:
+        report(name, *measure(function, args.repeat))
+
+
+def benchmark_info(args):
+    """Compare the info parsers."""
+    lines = generate_info(args.versions)
+    print('Info output with {0} lines'.format(len(lines)))
+    if legacy_parse_info(lines) != hammer.parse_info(lines):
+        raise AssertionError('The parsers results differ')
+    cases = (
+        ('legacy parse_info', lambda: legacy_parse_info(lines)),
+        ('parse_info', lambda: hammer.parse_info(lines)),
+    )
+    for name, function in cases:
+        report(name, *measure(function, args.repeat))
+
+
+def benchmark_json(args):
+    """Compare the eager and lazy JSON parsers, and the CSV parser for the
+    same flat records.
+    """
+    hosts = json.dumps(generate_host_records(args.hosts)).encode('utf-8')
+    package_records = generate_package_records(args.packages)
+    packages = json.dumps(package_records).encode('utf-8')
+    package_lines = records_to_csv(package_records)
+    del package_records
+    for name, output in (('host list', hosts), ('package list', packages)):
+        if hammer.parse_json(output) != hammer.parse_json(output, lazy=True):
+            raise AssertionError('The parsers results differ')
+        print('JSON {0} output of {1:.1f} MiB'.format(
+            name, len(output) / 1024.0 / 1024))
+        cases = (
+            ('parse_json', lambda: hammer.parse_json(output)),
+            ('parse_json, read all',
+             lambda: read_all(hammer.parse_json(output))),
+            ('parse_json(lazy=True)',
+             lambda: hammer.parse_json(output, lazy=True)),
+            ('parse_json(lazy=True), first',
+             lambda: hammer.parse_json(output, lazy=True)[0][u'name']),
+            ('parse_json(lazy=True), read all',
+             lambda: read_all(hammer.parse_json(output, lazy=True))),
+        )
+        for case_name, function in cases:
+            report(case_name, *measure(function, args.repeat))
+    print('CSV package list output with {0} rows'.format(args.packages))
+    report('parse_csv', *measure(
+        lambda: hammer.parse_csv(package_lines), args.repeat))
+
+
+def main(argv=None):
+    """Parse the arguments and run the selected benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='parser')
+    subparsers.required = True
+    csv_parser = subparsers.add_parser('csv', help='benchmark parse_csv')
+    csv_parser.add_argument('--rows', type=int, default=50000)
+    csv_parser.set_defaults(function=benchmark_csv)
+    info_parser = subparsers.add_parser('info', help='benchmark parse_info')
+    info_parser.add_argument('--versions', type=int, default=20000)
+    info_parser.set_defaults(function=benchmark_info)
+    json_parser = subparsers.add_parser(
+        'json', help='benchmark parse_json and compare it to parse_csv')
+    json_parser.add_argument('--hosts', type=int, default=20000)
+    json_parser.add_argument('--packages', type=int, default=100000)
+    json_parser.set_defaults(function=benchmark_json)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    args.function(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
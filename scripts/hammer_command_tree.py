@@ -1,35 +1,171 @@
 """Generate hammer command tree in json format by inspecting every command's
 help.
 
+The tree is walked one level at a time. The help of all the commands of a
+level is fetched at once, split in batches which run in parallel over pooled
+ssh connections, each batch running its ``--help`` commands in a single
+remote script.
+
+When a previously generated tree is given, only the top level commands whose
+help changed are walked again, the others are copied from the previous tree.
+The differences between both trees can be written as JSON::
+
+    python scripts/hammer_command_tree.py \\
+        --previous tests/foreman/data/hammer_commands.json \\
+        --report hammer_commands_changes.json
+
 """
+from __future__ import print_function
+
+import argparse
 import json
+import sys
+
+from multiprocessing.pool import ThreadPool
 
 from robottelo import ssh
 from robottelo.cli import hammer
 from robottelo.config import settings
 
 
-def generate_command_tree(command):
-    """Recursively walk trhough the hammer commands and subcommands and fetch
-    their help. Return a dictionary with the contents.
+def fetch_help(commands, workers=4, batch_size=20, timeout=600):
+    """Fetch and parse the help of many hammer commands.
 
+    :param commands: The commands, starting with ``hammer``.
+    :param int workers: The number of batches running at the same time.
+    :param int batch_size: The number of commands run by each batch.
+    :param int timeout: Time to wait for a batch to finish.
+    :return: A dict mapping each command to its parsed help.
     """
-    output = ssh.command('{0} --help'.format(command)).stdout
-    contents = hammer.parse_help(output)
-    if len(contents['subcommands']) > 0:
-        for subcommand in contents['subcommands']:
-            subcommand.update(generate_command_tree(
-                '{0} {1}'.format(command, subcommand['name'])
-            ))
-    return contents
-
-
-settings.configure()
-
-# Generate the json file in the working directory
-with open('hammer_commands.json', 'w') as f:
-    f.write(json.dumps(
-        generate_command_tree('hammer'),
-        indent=2,
-        sort_keys=True
-    ))
+    commands = list(commands)
+    batches = [
+        commands[index:index + batch_size]
+        for index in range(0, len(commands), batch_size)
+    ]
+
+    def run(batch):
+        return ssh.command_batch(
+            [u'{0} --help'.format(command) for command in batch],
+            timeout=timeout,
+        )
+
+    pool = ThreadPool(max(1, min(workers, len(batches))))
+    try:
+        results = pool.map(run, batches)
+    finally:
+        pool.close()
+        pool.join()
+    helps = {}
+    for batch, batch_results in zip(batches, results):
+        if len(batch_results) != len(batch):
+            raise RuntimeError(
+                'Failed to fetch the help of {0}'.format(', '.join(batch)))
+        for command, result in zip(batch, batch_results):
+            helps[command] = hammer.parse_help(result.stdout or [])
+    return helps
+
+
+def _own_help(node):
+    """Return the parts of a command help which do not depend on its
+    subcommands help.
+    """
+    return (
+        sorted(
+            sorted(option.items()) for option in node.get('options', ())),
+        [
+            (subcommand['name'], subcommand.get('description'))
+            for subcommand in node.get('subcommands', ())
+        ],
+    )
+
+
+def generate_command_tree(previous=None, workers=4, batch_size=20):
+    """Walk through the hammer commands and subcommands and fetch their help.
+
+    :param dict previous: A previously generated tree. The top level commands
+        whose help did not change are copied from it instead of being walked.
+    :param int workers: The number of batches running at the same time.
+    :param int batch_size: The number of commands run by each batch.
+    :return: A tuple with the tree and the list of the top level commands
+        which were walked.
+    """
+    tree = fetch_help(['hammer'], workers, batch_size)['hammer']
+    previous_commands = dict(
+        (subcommand['name'], subcommand)
+        for subcommand in (previous or {}).get('subcommands', ())
+    )
+    walked = []
+    level = [(u'hammer', tree)]
+    depth = 0
+    while level:
+        depth += 1
+        pending = [
+            (u'{0} {1}'.format(command, subcommand['name']), subcommand)
+            for command, node in level
+            for subcommand in node['subcommands']
+        ]
+        helps = fetch_help(
+            [command for command, _ in pending], workers, batch_size)
+        level = []
+        for command, node in pending:
+            node.update(helps[command])
+            if depth == 1:
+                previous_node = previous_commands.get(node['name'])
+                if (previous_node is not None and
+                        _own_help(previous_node) == _own_help(node)):
+                    node['subcommands'] = previous_node['subcommands']
+                    continue
+                walked.append(command)
+            level.append((command, node))
+    return tree, walked
+
+
+def main(argv=None):
+    """Parse the arguments, generate the tree and the change report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--output', default='hammer_commands.json',
+        help='where to write the tree, default: %(default)s')
+    parser.add_argument(
+        '--previous',
+        help='a previously generated tree to compare with and copy the '
+             'unchanged commands from')
+    parser.add_argument(
+        '--report',
+        help='where to write the differences with the previous tree')
+    parser.add_argument(
+        '--full', action='store_true',
+        help='walk all the commands even if they did not change')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=20)
+    args = parser.parse_args(argv)
+    if args.report and not args.previous:
+        parser.error('--report requires --previous')
+
+    settings.configure()
+    previous = None
+    if args.previous:
+        with open(args.previous) as handler:
+            previous = json.load(handler)
+    tree, walked = generate_command_tree(
+        None if args.full else previous, args.workers, args.batch_size)
+
+    # Generate the json file in the working directory
+    with open(args.output, 'w') as handler:
+        handler.write(json.dumps(tree, indent=2, sort_keys=True))
+
+    if previous is not None:
+        differences = hammer.diff_command_trees(previous, tree)
+        print('Walked {0} top level command(s), {1} command(s) changed'.format(
+            len(walked), len(differences)))
+        if args.report:
+            with open(args.report, 'w') as handler:
+                handler.write(json.dumps(
+                    {'walked': walked, 'changes': differences},
+                    indent=2,
+                    sort_keys=True,
+                ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
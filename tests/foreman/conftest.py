@@ -1,8 +1,12 @@
 # coding: utf-8
 """Configurations for py.test runner"""
 import datetime
+import os
 import pytest
+from robottelo import metrics
 from robottelo.bz_helpers import get_deselect_bug_ids, group_by_key
+from robottelo.config import settings
+from robottelo.decorators import OBJECT_CACHE, fixture_store
 from robottelo.helpers import get_func_name
 
 
@@ -32,6 +36,31 @@ def worker_id(request):
         return 'master'
 
 
+def pytest_configure(config):
+    """Called after command line options have been parsed.
+
+    Sets up the store of the resources shared by the xdist workers. The
+    master process creates its directory and hands it to the workers.
+    """
+    if hasattr(config, 'slaveinput'):
+        fixture_store.configure(
+            config.slaveinput['robottelo_fixture_store'],
+            config.slaveinput['slaveid'],
+        )
+    else:
+        fixture_store.get_store()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Called by xdist before a worker is started.
+
+    Hands the directory of the shared resources store to the worker.
+    """
+    node.slaveinput['robottelo_fixture_store'] = (
+        fixture_store.get_store().path)
+
+
 def pytest_namespace():
     """return dict of name->object to be made globally available in
     the pytest namespace.  This hook is called at plugin registration
@@ -75,3 +104,39 @@ def pytest_collection_modifyitems(items, config):
 
     config.hook.pytest_deselected(items=deselected_items)
     items[:] = [item for item in items if item not in deselected_items]
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_teardown(item, nextitem):
+    """Called after a test teardown.
+
+    Drops the entities cached for the test module when the next test is in
+    another module.
+    """
+    if nextitem is None or nextitem.module is not item.module:
+        OBJECT_CACHE.end_scope('module')
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Called after whole test run finished.
+
+    Drops the cached entities, so they are cleaned up, and releases the
+    shared resources. The xdist controller, or the only pytest process,
+    cleans up the shared resources once all the workers finished. Dumps
+    the ssh and hammer latency metrics to the ``metrics_file`` setting,
+    adding the worker ID before the extension when running with xdist.
+    """
+    OBJECT_CACHE.clear()
+    if hasattr(session.config, 'slaveinput'):
+        fixture_store.get_store().release_all()
+    else:
+        fixture_store.remove_store()
+    if not settings.configured or not settings.metrics_file:
+        return
+    path = settings.metrics_file
+    if hasattr(session.config, 'slaveinput'):
+        root, ext = os.path.splitext(path)
+        path = '{0}.{1}{2}'.format(
+            root, session.config.slaveinput['slaveid'], ext)
+    metrics.registry.dump(path)
+    log("Dumped ssh and hammer metrics to %s" % path)
@@ -0,0 +1,115 @@
+"""Tests for module ``robottelo.decorators.fixture_store``."""
+import os
+import shutil
+import tempfile
+
+from unittest2 import TestCase
+
+from robottelo.decorators.fixture_store import FixtureStore, FixtureStoreError
+
+#: Values of the resources cleaned up by :func:`cleanup`
+CLEANED = []
+
+
+def cleanup(value):
+    """Clean up a resource built by the tests."""
+    CLEANED.append(value)
+
+
+class FixtureStoreTestCase(TestCase):
+    """Tests for :class:`robottelo.decorators.fixture_store.FixtureStore`,
+    each worker is emulated by a store using the same directory.
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.first = FixtureStore(self.path, 'gw0', poll_interval=0)
+        self.second = FixtureStore(self.path, 'gw1', poll_interval=0)
+        self.built = []
+        self.cleaned = CLEANED
+        self.addCleanup(CLEANED.__delitem__, slice(None))
+
+    def setup(self):
+        self.built.append(True)
+        return {'organization-id': len(self.built)}
+
+    def test_built_once(self):
+        """The resource is built by the first worker and reused."""
+        for store in self.first, self.second, self.first:
+            self.assertEqual(
+                store.acquire('org', self.setup, cleanup),
+                {'organization-id': 1},
+            )
+        self.assertEqual(len(self.built), 1)
+
+    def test_controller_cleans_up(self):
+        """Only the controller cleans up the resources, when the session
+        finishes.
+        """
+        self.first.acquire('org', self.setup, cleanup)
+        self.second.acquire('org', self.setup, cleanup)
+        self.first.release_all()
+        self.second.release_all()
+        self.assertEqual(self.cleaned, [])
+        # A resource released by all the workers is still reused
+        self.first.acquire('org', self.setup, cleanup)
+        self.first.release_all()
+        self.assertEqual(len(self.built), 1)
+        FixtureStore(self.path).cleanup_all()
+        self.assertEqual(self.cleaned, [{'organization-id': 1}])
+        self.assertIsNone(self.first._read('org'))
+
+    def test_reference_count(self):
+        """Each use of a resource by a worker is counted."""
+        self.first.acquire('org', self.setup, cleanup)
+        self.first.acquire('org', self.setup, cleanup)
+        self.first.release('org')
+        self.assertEqual(self.first._read('org')['users'], {'gw0': 1})
+        self.first.release('org')
+        self.assertEqual(self.first._read('org')['users'], {})
+
+    def test_cleanup_function(self):
+        """The cleanup must be a module level function."""
+        with self.assertRaises(ValueError):
+            self.first.acquire('org', self.setup, lambda value: None)
+        self.assertEqual(self.built, [])
+
+    def test_failed_setup(self):
+        """Other workers don't build a resource which failed to be built."""
+        def fail():
+            raise ValueError('manifest upload failed')
+
+        with self.assertRaises(ValueError):
+            self.first.acquire('org', fail)
+        with self.assertRaisesRegexp(
+                FixtureStoreError, 'manifest upload failed'):
+            self.second.acquire('org', self.setup)
+        self.assertEqual(self.built, [])
+
+    def test_wait_timeout(self):
+        """Waiting for a resource built by another worker times out."""
+        self.second.timeout = 0
+        self.first._update('org', lambda state: {
+            'status': 'building',
+            'owner': 'gw0',
+            'pid': os.getpid(),
+            'users': {},
+        })
+        with self.assertRaises(FixtureStoreError):
+            self.second.acquire('org', self.setup)
+
+    def test_dead_owner(self):
+        """A resource whose builder died is built again."""
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.first._update('org', lambda state: {
+            'status': 'building',
+            'owner': 'gw0',
+            'pid': pid,
+            'users': {},
+        })
+        self.assertEqual(
+            self.second.acquire('org', self.setup), {'organization-id': 1})
@@ -0,0 +1,100 @@
+"""Unit tests for :mod:`robottelo.api.session`."""
+import requests
+import six
+
+from nailgun import client
+from robottelo.api import session
+from unittest2 import TestCase
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class MakeSessionTestCase(TestCase):
+    """Tests for :func:`robottelo.api.session.make_session`."""
+
+    def test_adapter(self):
+        """The connection pool is sized and 502/503 answers are retried."""
+        adapter = session.make_session(
+            pool_size=4, retries=2).get_adapter('https://satellite')
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(
+            set(adapter.max_retries.status_forcelist), {502, 503})
+
+    def test_no_cookies(self):
+        """Cookies set by the server are not kept."""
+        cookies = session.make_session().cookies
+        request = requests.Request(
+            'GET', 'https://satellite/api/v2/organizations').prepare()
+        cookie = requests.cookies.create_cookie(
+            '_session_id', 'admin', domain='satellite')
+        self.assertFalse(cookies._policy.set_ok(
+            cookie, requests.cookies.MockRequest(request)))
+
+
+class GetSessionTestCase(TestCase):
+    """Tests for :func:`robottelo.api.session.get_session`."""
+
+    def setUp(self):
+        self.addCleanup(
+            session.configure,
+            pool_size=session.POOL_SIZE,
+            retries=session.RETRIES,
+        )
+
+    def test_reused(self):
+        """The same session is returned until it is configured again."""
+        first = session.get_session()
+        self.assertIs(session.get_session(), first)
+        session.configure(pool_size=2)
+        second = session.get_session()
+        self.assertIsNot(second, first)
+        self.assertEqual(
+            second.get_adapter('https://satellite')._pool_maxsize, 2)
+
+    def test_forked(self):
+        """A forked process gets its own session."""
+        first = session.get_session()
+        with mock.patch('robottelo.api.session.os.getpid', return_value=-1):
+            self.assertIsNot(session.get_session(), first)
+
+
+class SessionRequestsTestCase(TestCase):
+    """Tests for :class:`robottelo.api.session.SessionRequests`."""
+
+    def setUp(self):
+        patcher = mock.patch('robottelo.api.session.get_session')
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.requests = session.SessionRequests()
+
+    def test_positional_arguments(self):
+        """The request functions take the ``requests`` module arguments."""
+        self.requests.get('https://satellite', {'per_page': 1}, verify=False)
+        self.session.request.assert_called_once_with(
+            'GET',
+            'https://satellite',
+            params={'per_page': 1},
+            allow_redirects=True,
+            verify=False,
+        )
+        self.session.request.reset_mock()
+        self.requests.post('https://satellite', None, {'name': 'org'})
+        self.session.request.assert_called_once_with(
+            'POST', 'https://satellite', data=None, json={'name': 'org'})
+
+    def test_module_attributes(self):
+        """Other attributes are the ``requests`` module ones."""
+        self.assertIs(self.requests.exceptions, requests.exceptions)
+
+    def test_install_nailgun_session(self):
+        """NailGun sends its requests through the session."""
+        with mock.patch.object(client, 'requests', requests):
+            session.install_nailgun_session()
+            installed = client.requests
+            session.install_nailgun_session()
+            self.assertIsInstance(client.requests, session.SessionRequests)
+            self.assertIs(client.requests, installed)
@@ -0,0 +1,217 @@
+# -*- encoding: utf-8 -*-
+"""Tests for module ``robottelo.cassette``."""
+import json
+import os
+import random
+import shutil
+import six
+import tempfile
+import time
+
+from robottelo import cassette, ssh
+from unittest2 import TestCase
+
+from tests.robottelo.test_ssh import (
+    LocalShellClient,
+    MockSSHClient,
+    MockStreamChannel,
+)
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class NormalizeCommandTestCase(TestCase):
+    """Tests for ``robottelo.cassette.normalize_command``."""
+
+    def test_mask_hammer_password(self):
+        """hammer passwords and whitespaces do not change the command"""
+        self.assertEqual(
+            cassette.normalize_command(
+                b'LANG=en_US.UTF-8  hammer -v -u admin -p changeme '
+                b'organization list\n'),
+            (u'LANG=en_US.UTF-8 hammer -v -u admin -p ******** '
+             u'organization list', [])
+        )
+        self.assertEqual(
+            cassette.normalize_command(u'mkdir -p /tmp/foo')[0],
+            u'mkdir -p /tmp/foo'
+        )
+
+    def test_replace_markers(self):
+        """Markers are replaced by placeholders in order of appearance"""
+        first = u'ROBOTTELO-BATCH-{0}'.format('a' * 32)
+        second = u'ROBOTTELO-{0}'.format('b' * 32)
+        self.assertEqual(
+            cassette.normalize_command(
+                u'echo {0} {1} {0}'.format(second, first)),
+            (u'echo ROBOTTELO-MARKER-0 ROBOTTELO-MARKER-1 '
+             u'ROBOTTELO-MARKER-0', [second, first])
+        )
+
+
+class CassetteTestCase(TestCase):
+    """Tests for recording and replaying commands."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cassette.jsonl')
+        settings_patcher = mock.patch('robottelo.ssh.settings')
+        settings = settings_patcher.start()
+        self.addCleanup(settings_patcher.stop)
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.addCleanup(ssh.close_pooled_connections)
+
+    def test_invalid_mode(self):
+        """Only record and replay modes are accepted"""
+        with self.assertRaises(ValueError):
+            cassette.Cassette(self.path, mode='rewind')
+
+    def test_record_and_replay(self):
+        """Replayed commands get the recorded outputs in order"""
+        client = LocalShellClient()
+        client._hostname = 'example.com'
+        with cassette.use_cassette(self.path, mode=cassette.RECORD):
+            recorded = [
+                ssh.execute_command(cmd, client, output_format='plain')
+                for cmd in ('echo a; echo b >&2; exit 2', 'date +%N',
+                            'date +%N')
+            ]
+        with open(self.path) as handler:
+            interactions = [json.loads(line) for line in handler][1:]
+        self.assertEqual(len(interactions), 3)
+        self.assertIsNone(interactions[0]['host'])
+        self.assertGreaterEqual(
+            interactions[0]['elapsed'], interactions[0]['first_byte'])
+        self.assertIsNone(cassette.current())
+
+        with mock.patch('robottelo.ssh._call_paramiko_sshclient') as client:
+            with cassette.use_cassette(self.path) as replayed_cassette:
+                self.assertEqual(len(replayed_cassette), 2)
+                replayed = [
+                    ssh.command(cmd, output_format='plain')
+                    for cmd in ('echo a;  echo b >&2;  exit 2', 'date +%N',
+                                'date +%N', 'date +%N')
+                ]
+            self.assertFalse(client.called)
+        self.assertEqual(
+            [(result.stdout, result.stderr, result.return_code)
+             for result in replayed[:3]],
+            [(result.stdout, result.stderr, result.return_code)
+             for result in recorded]
+        )
+        self.assertEqual(replayed[3].stdout, replayed[2].stdout)
+
+    def test_record_and_replay_stream(self):
+        """Streamed commands are recorded and replayed like the others"""
+        client = MockSSHClient()
+        client._hostname = 'example.com'
+        channel = MockStreamChannel([b'a\n', b'b'], [b'warning'], ret=1)
+        client.transport.open_session = lambda: channel
+        with cassette.use_cassette(self.path, mode=cassette.RECORD):
+            recorded = ssh.execute_command_stream(
+                'ls', client, output_format='plain')
+            self.assertEqual(list(recorded), [u'a', u'b'])
+        with mock.patch('robottelo.ssh._call_paramiko_sshclient') as client:
+            with cassette.use_cassette(self.path):
+                with ssh.command_stream(
+                        'ls', output_format='plain') as replayed:
+                    self.assertEqual(list(replayed), [u'a', u'b'])
+            self.assertFalse(client.called)
+        self.assertEqual(replayed.stderr, u'warning')
+        self.assertEqual(replayed.return_code, 1)
+
+    def test_replay_random_values(self):
+        """Random values generated while recording are generated again when
+        replaying
+        """
+        client = LocalShellClient()
+        client._hostname = 'example.com'
+        state = random.getstate()
+        with cassette.use_cassette(self.path, mode=cassette.RECORD) as rec:
+            name = u'org-{0}'.format(random.randint(0, 10 ** 9))
+            ssh.execute_command(u'echo {0}'.format(name), client)
+        self.assertEqual(random.getstate(), state)
+        with open(self.path) as handler:
+            self.assertEqual(json.loads(next(handler)), {'seed': rec.seed})
+        with cassette.use_cassette(self.path) as replayed_cassette:
+            self.assertEqual(replayed_cassette.seed, rec.seed)
+            replayed = ssh.command(u'echo org-{0}'.format(
+                random.randint(0, 10 ** 9)))
+        self.assertEqual(replayed.stdout[0], name)
+
+    def test_replay_batch_markers(self):
+        """The markers of a replayed batch are found in its output"""
+        client = LocalShellClient()
+        client._hostname = 'other.example.com'
+        with cassette.use_cassette(self.path, mode=cassette.RECORD):
+            recorded = ssh.execute_batch(['echo a', 'exit 3'], client)
+        with cassette.use_cassette(self.path):
+            replayed = ssh.command_batch(
+                ['echo a', 'exit 3'], hostname='other.example.com')
+        # the batch was not recorded on the default server
+        with cassette.use_cassette(self.path):
+            with self.assertRaises(cassette.CassetteError):
+                ssh.command_batch(['echo a', 'exit 3'])
+        self.assertEqual(
+            [(result.stdout, result.return_code) for result in replayed],
+            [(result.stdout, result.return_code) for result in recorded]
+        )
+
+    def test_replay_unknown_command(self):
+        """Commands which were not recorded can not be replayed"""
+        with cassette.use_cassette(self.path, mode=cassette.RECORD):
+            pass
+        with cassette.use_cassette(self.path):
+            with self.assertRaisesRegexp(cassette.CassetteError, 'uptime'):
+                ssh.command('uptime')
+            with self.assertRaises(cassette.CassetteError):
+                ssh.upload_file('local', 'remote')
+
+    def test_replay_latency(self):
+        """The recorded latency can be simulated"""
+        with open(self.path, 'w') as handler:
+            handler.write(json.dumps({
+                'host': None, 'command': 'uptime', 'stdout': 'up',
+                'stderr': '', 'return_code': 0, 'first_byte': 0.1,
+                'elapsed': 0.2,
+            }) + '\n')
+        with cassette.use_cassette(self.path):
+            start = time.time()
+            self.assertEqual(ssh.command('uptime').stdout, [u'up'])
+            self.assertLess(time.time() - start, 0.2)
+        with cassette.use_cassette(self.path, latency=True):
+            start = time.time()
+            self.assertEqual(ssh.command('uptime').stdout, [u'up'])
+            self.assertGreaterEqual(time.time() - start, 0.2)
+
+    def test_settings_paths(self):
+        """xdist workers record their own file and replay loads them all"""
+        path = os.path.join(self.tmpdir, 'session.jsonl')
+        with mock.patch.dict(os.environ, {'PYTEST_XDIST_WORKER': 'gw1'}):
+            self.assertEqual(
+                cassette._settings_paths(path, cassette.RECORD),
+                os.path.join(self.tmpdir, 'session.gw1.jsonl')
+            )
+        self.assertEqual(
+            cassette._settings_paths(path, cassette.REPLAY), [path])
+        for worker in ('gw0', 'gw1'):
+            open(os.path.join(
+                self.tmpdir, 'session.{0}.jsonl'.format(worker)), 'w').close()
+        self.assertEqual(
+            cassette._settings_paths(path, cassette.REPLAY),
+            [os.path.join(self.tmpdir, 'session.gw0.jsonl'),
+             os.path.join(self.tmpdir, 'session.gw1.jsonl')]
+        )
+        with mock.patch.dict(os.environ, {'PYTEST_XDIST_WORKER': 'gw1'}):
+            self.assertEqual(
+                cassette._settings_paths(path, cassette.REPLAY),
+                [os.path.join(self.tmpdir, 'session.gw1.jsonl'),
+                 os.path.join(self.tmpdir, 'session.gw0.jsonl')]
+            )
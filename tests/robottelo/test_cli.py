@@ -1,20 +1,35 @@
 import six
+import threading
+import time
 import unittest2
 
 from functools import partial
+from robottelo.cli import command_index
 from robottelo.cli.base import (
     Base,
     CLIReturnCodeError,
     CLIError,
     CLIBaseError,
-    CLIDataBaseError
+    CLIDataBaseError,
+    HammerCommand,
+    read_cache,
 )
+from robottelo.cli.contentview import ContentViewFilterRule
+from robottelo.cli.lifecycleenvironment import LifecycleEnvironment
+from robottelo.cli.repository import Repository
+from robottelo.cli.repository_set import RepositorySet
+from robottelo.cli.syncplan import SyncPlan
+from robottelo.cli.task import Task, TaskWaitError
+from robottelo.cli.usergroup import UserGroupExternal
+from robottelo.ssh import SSHCommandResult
 
 if six.PY2:
     import mock
 else:
     from unittest import mock
 
+SINGLE_TRIP_MARKER = u'0123456789abcdef'
+
 
 class CLIClass(Base):
     """Class used for the username and password lookup tests"""
@@ -43,6 +58,83 @@ class BaseCliTestCase(unittest2.TestCase):
         self.assertNotIn(u'--flag-two', command_parts)
         self.assertEqual(len(command_parts), 4)
 
+    def test_construct_command_spec(self):
+        """_construct_command keeps track of command base and subcommand"""
+        Base.command_base = 'basecommand'
+        Base.command_sub = 'subcommand'
+        command = Base._construct_command({u'id': 1}, command_sub='info')
+        self.assertIsInstance(command, HammerCommand)
+        self.assertEqual(command, u'basecommand info --id="1"')
+        self.assertEqual(command.command_base, 'basecommand')
+        self.assertEqual(command.command_sub, 'info')
+        self.assertEqual(Base.command_sub, 'subcommand')
+
+    def test_command_sub_per_thread(self):
+        """command_sub set in a thread is not seen by other threads"""
+        Base.command_sub = 'main'
+        seen = []
+
+        def set_sub():
+            Base.command_sub = 'other'
+            seen.append(Base.command_sub)
+
+        thread = threading.Thread(target=set_sub)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, ['other'])
+        self.assertEqual(Base.command_sub, 'main')
+
+    def test_command_sub_inheritance(self):
+        """command_sub of a subclass falls back to the parent class one"""
+        class Child(CLIClass):
+            pass
+        CLIClass.command_sub = 'parent'
+        self.assertEqual(Child.command_sub, 'parent')
+        Child.command_sub = 'child'
+        self.assertEqual(Child.command_sub, 'child')
+        self.assertEqual(CLIClass.command_sub, 'parent')
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_concurrent_commands(self, execute):
+        """Different subcommands of the same class called from many threads
+        build the right hammer commands
+        """
+        execute.side_effect = lambda command, **kwargs: command
+        methods = {
+            'delete': CLIClass.delete,
+            'dump': CLIClass.dump,
+            'set-parameter': CLIClass.set_parameter,
+            'sc-params': CLIClass.sc_params,
+        }
+        errors = []
+
+        class SlowOptions(dict):
+            """Give other threads the chance to run while the command is
+            being built.
+            """
+            def items(self):
+                time.sleep(0.0001)
+                return super(SlowOptions, self).items()
+
+        def run(command_sub, method):
+            for i in range(100):
+                command = method(SlowOptions({u'id': i}))
+                expected = u'{0} {1} --id="{2}"'.format(
+                    CLIClass.command_base, command_sub, i)
+                if command != expected or command.command_sub != command_sub:
+                    errors.append((expected, command))
+
+        threads = [
+            threading.Thread(target=run, args=item)
+            for item in methods.items()
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
     def test_username_password_parameters_lookup(self):
         """Username and password returned are the parameters"""
         username, password = CLIClass._get_username_password('auser', 'apass')
@@ -112,6 +204,18 @@ class BaseCliTestCase(unittest2.TestCase):
         """
         self.assert_response_error(CLIReturnCodeError)
 
+    def test_handle_response_error_message(self):
+        """Check error message uses the command base and subcommand of the
+        command which got the response
+        """
+        response = mock.Mock()
+        response.return_code = 1
+        response.stderr = [u'some error']
+        command = HammerCommand(u'org info', 'organization', 'info')
+        with self.assertRaises(CLIReturnCodeError) as context:
+            Base._handle_response(response, command=command)
+        self.assertIn(u'Command "organization info"', context.exception.msg)
+
     def test_handle_data_base_response_error(self):
         """Check handle_response raise ``CLIDataBaseError`` when
         return_code is not 0 and error is related to DB error.
@@ -250,6 +354,178 @@ class BaseCliTestCase(unittest2.TestCase):
         construct.called_once_with({})
         execute.called_once_with(construct.return_value, output_format='csv')
 
+    def single_trip_response(self, create_code=0, info_code=0,
+                             create_output=u'Message,Id,Name\nCreated,42,foo',
+                             info_id=u'42'):
+        """Build the response of a create command run in a single trip"""
+        marker = u'ROBOTTELO-{0}'.format(SINGLE_TRIP_MARKER)
+        stdout = u'{0}\n\n{1} {2}\n'.format(
+            create_output, marker, create_code)
+        if create_code == 0:
+            stdout += u'{0}\nId: {0}\nName: foo\n'.format(info_id)
+        stderr = u'create error\n{0}\n'.format(marker)
+        if create_code == 0 and info_code != 0:
+            stderr += u'info error'
+        return SSHCommandResult(
+            stdout, stderr, info_code or create_code, 'plain')
+
+    @mock.patch('robottelo.cli.base.uuid.uuid4')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_create_single_trip(self, settings, command, uuid4):
+        """Check create and info commands run in a single ssh command"""
+        settings.hammer_single_trip_create = True
+        settings.hammer_shell = False
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
+        settings.performance = False
+        settings.locale = 'en_US'
+        uuid4.return_value.hex = SINGLE_TRIP_MARKER
+        command.return_value = self.single_trip_response()
+        Base.command_base = 'basecommand'
+        Base.command_requires_org = True
+        self.assertEqual(
+            Base.create({u'name': u'foo', u'organization-id': 1}),
+            {u'id': u'42', u'name': u'foo'}
+        )
+        self.assertEqual(command.call_count, 1)
+        script = command.call_args[0][0].decode('utf-8')
+        self.assertIn(
+            u'--output=csv basecommand create --name="foo" '
+            u'--organization-id="1"',
+            script
+        )
+        self.assertIn(
+            u'basecommand info --id="$id" --organization-id="1"', script)
+
+    @mock.patch('robottelo.cli.base.uuid.uuid4')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_create_single_trip_errors(self, settings, command, uuid4):
+        """Check errors of the create and info commands are raised"""
+        settings.hammer_single_trip_create = True
+        settings.hammer_shell = False
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
+        settings.performance = False
+        uuid4.return_value.hex = SINGLE_TRIP_MARKER
+        Base.command_requires_org = False
+        command.return_value = self.single_trip_response(create_code=65)
+        with self.assertRaises(CLIReturnCodeError) as context:
+            Base.create({u'name': u'foo'})
+        self.assertIn(u'basecommand create', context.exception.msg)
+        self.assertEqual(context.exception.stderr, u'create error')
+        command.return_value = self.single_trip_response(info_code=70)
+        with self.assertRaises(CLIReturnCodeError) as context:
+            Base.create({u'name': u'foo'})
+        self.assertIn(u'basecommand info', context.exception.msg)
+        self.assertEqual(context.exception.stderr, u'info error')
+
+    @mock.patch('robottelo.cli.base.Base.info')
+    @mock.patch('robottelo.cli.base.uuid.uuid4')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_create_single_trip_quoted_id(
+            self, settings, command, uuid4, info):
+        """Check the record is fetched again when the id read by the script
+        is not the one of the parsed create output
+        """
+        settings.hammer_single_trip_create = True
+        settings.hammer_shell = False
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
+        settings.performance = False
+        uuid4.return_value.hex = SINGLE_TRIP_MARKER
+        Base.command_requires_org = False
+        info.return_value = {u'id': u'42', u'name': u'foo'}
+        command.return_value = self.single_trip_response(
+            create_output=u'Message,Id,Name\n"Created, yes",42,foo',
+            info_id=u' yes"',
+        )
+        self.assertEqual(Base.create({u'name': u'foo'}), info.return_value)
+        info.assert_called_once_with({u'id': u'42'})
+
+    @mock.patch('robottelo.cli.base.Base.info')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_create_single_trip_fallback(self, settings, command, info):
+        """Check create falls back to separated commands when the class
+        does not support it
+        """
+        settings.hammer_single_trip_create = True
+        settings.hammer_shell = False
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
+        settings.performance = False
+        Base.command_requires_org = False
+        command.return_value = SSHCommandResult(
+            [{u'id': u'42'}], u'', 0, None)
+
+        class NoSingleTrip(Base):
+            single_trip_create = False
+
+        NoSingleTrip.create({u'name': u'foo'})
+        self.assertEqual(command.call_count, 1)
+        info.assert_called_once_with({u'id': u'42'})
+
+        class CustomInfo(Base):
+            @classmethod
+            def info(cls, options=None):
+                return {u'id': options[u'id']}
+
+        self.assertEqual(
+            CustomInfo.create({u'name': u'foo'}), {u'id': u'42'})
+        self.assertEqual(command.call_count, 2)
+
+    @mock.patch('robottelo.cli.base.metrics')
+    @mock.patch('robottelo.cli.base.uuid.uuid4')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_create_single_trip_halves_ssh_commands(
+            self, settings, command, uuid4, metrics):
+        """Check creating many entities in a single trip needs half of the
+        ssh commands of creating them with separated create and info
+        """
+        settings.hammer_shell = False
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
+        settings.performance = False
+        uuid4.return_value.hex = SINGLE_TRIP_MARKER
+        Base.command_requires_org = False
+        create_result = SSHCommandResult(
+            [{u'id': u'42', u'name': u'foo'}], u'', 0, None)
+        info_result = SSHCommandResult(
+            [u'Id: 42', u'Name: foo'], u'', 0, None)
+
+        def separated(cmd, output_format=None, timeout=None):
+            return create_result if b' create ' in cmd else info_result
+
+        def single_trip(cmd, output_format=None, timeout=None):
+            return self.single_trip_response()
+
+        calls = {}
+        observed = {}
+        observe = metrics.HAMMER_COMMAND_SECONDS.observe
+        for enabled, side_effect in ((False, separated), (True, single_trip)):
+            settings.hammer_single_trip_create = enabled
+            command.side_effect = side_effect
+            command.reset_mock()
+            observe.reset_mock()
+            for _ in range(10):
+                self.assertEqual(
+                    Base.create({u'name': u'foo'}),
+                    {u'id': u'42', u'name': u'foo'}
+                )
+            calls[enabled] = command.call_count
+            observed[enabled] = sorted(set(
+                call[1]['command'] for call in observe.call_args_list))
+            self.assertEqual(observe.call_count, command.call_count)
+        self.assertEqual(calls, {False: 20, True: 10})
+        self.assertEqual(observed, {
+            False: [u'basecommand create', u'basecommand info'],
+            True: [u'basecommand create+info'],
+        })
+
     def assert_cmd_execution(
             self, construct, execute, base_method, cmd_sub,
             ignore_stderr=False, **base_method_kwargs):
@@ -289,6 +565,9 @@ class BaseCliTestCase(unittest2.TestCase):
     def test_execute_with_raw_response(self, settings, command):
         """Check excuted build ssh method and returns raw response"""
         settings.locale = 'en_US'
+        settings.hammer_shell = False
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
         settings.performance = False
         settings.server.admin_username = 'admin'
         settings.server.admin_password = 'password'
@@ -307,6 +586,9 @@ class BaseCliTestCase(unittest2.TestCase):
     def test_execute_with_performance(self, settings, command, handle_resp):
         """Check excuted build ssh method and delegate response handling"""
         settings.locale = 'en_US'
+        settings.hammer_shell = False
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
         settings.performance.timer_hammer = True
         settings.server.admin_username = 'admin'
         settings.server.admin_password = 'password'
@@ -322,16 +604,81 @@ class BaseCliTestCase(unittest2.TestCase):
         )
         handle_resp.assert_called_once_with(
             command.return_value,
-            ignore_stderr=None
+            ignore_stderr=None,
+            command='some_cmd'
         )
         self.assertIs(response, handle_resp.return_value)
 
+    @mock.patch('robottelo.cli.base.metrics')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_execute_metrics(self, settings, command, metrics):
+        """Check the time of the hammer subcommand is recorded"""
+        settings.locale = 'en_US'
+        settings.hammer_shell = False
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        Base.command_base = 'base'
+        Base.command_sub = 'info'
+        Base.execute(Base._construct_command(), return_raw_response=True)
+        observe = metrics.HAMMER_COMMAND_SECONDS.observe
+        self.assertEqual(observe.call_count, 1)
+        self.assertEqual(observe.call_args[1], {'command': u'base info'})
+
+    @mock.patch('robottelo.cli.base.hammer_shell.command')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_execute_with_hammer_shell(self, settings, command, shell_cmd):
+        """Check command is run by hammer shell when it is enabled"""
+        settings.hammer_shell = True
+        settings.hammer_read_cache = False
+        settings.hammer_validate_options = False
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        response = Base.execute(
+            'some_cmd', output_format='csv', return_raw_response=True)
+        shell_cmd.assert_called_once_with(
+            'some_cmd',
+            'admin',
+            'password',
+            output_format='csv',
+            timeout=None
+        )
+        self.assertFalse(command.called)
+        self.assertIs(response, shell_cmd.return_value)
+
+    @mock.patch('robottelo.cli.base.settings')
+    def test_construct_command_validate_options(self, settings):
+        """_construct_command rejects options unknown to the hammer command
+        when the validation is enabled
+        """
+        settings.hammer_validate_options = True
+        Base.command_base = 'organization'
+        Base.command_sub = 'create'
+        self.assertEqual(
+            Base._construct_command({u'name': u'foo', u'labl': None}),
+            u'organization create --name="foo"'
+        )
+        with self.assertRaisesRegexp(CLIError, u'labl, nme'):
+            Base._construct_command({u'nme': u'foo', u'labl': u'foo'})
+        # commands not in the index are not validated
+        Base.command_base = 'basecommand'
+        Base._construct_command({u'nme': u'foo'})
+        settings.hammer_validate_options = False
+        Base.command_base = 'organization'
+        Base._construct_command({u'nme': u'foo'})
+
     @mock.patch('robottelo.cli.base.Base.list')
     def test_exists_without_option_and_empty_return(self, lst_method):
         """Check exists method without options and empty return"""
         lst_method.return_value = []
         response = Base.exists(search=['id', 1])
-        lst_method.assert_called_once_with({u'search': u'id=\\"1\\"'})
+        lst_method.assert_called_once_with({
+            u'search': u'id=\\"1\\"', u'page': 1, u'per-page': 1})
         self.assertEqual([], response)
 
     @mock.patch('robottelo.cli.base.Base.list')
@@ -340,9 +687,94 @@ class BaseCliTestCase(unittest2.TestCase):
         lst_method.return_value = [1, 2]
         my_options = {u'search': u'foo=bar'}
         response = Base.exists(my_options, search=['id', 1])
-        lst_method.assert_called_once_with(my_options)
+        lst_method.assert_called_once_with(
+            {u'search': u'foo=bar', u'page': 1, u'per-page': 1})
         self.assertEqual(1, response)
 
+    @mock.patch('robottelo.cli.base.Base.list')
+    def test_iter_list(self, lst_method):
+        """Check iter_list fetches pages until a partial page is returned"""
+        lst_method.side_effect = [[1, 2], [3, 4], [5]]
+        options = {u'organization-id': 1}
+        self.assertEqual(
+            list(Base.iter_list(options, page_size=2)), [1, 2, 3, 4, 5])
+        self.assertEqual(
+            [call[0][0] for call in lst_method.call_args_list],
+            [
+                {u'organization-id': 1, u'page': 1, u'per-page': 2},
+                {u'organization-id': 1, u'page': 2, u'per-page': 2},
+                {u'organization-id': 1, u'page': 3, u'per-page': 2},
+            ]
+        )
+        self.assertEqual(options, {u'organization-id': 1})
+
+    @mock.patch('robottelo.cli.base.Base.list')
+    def test_iter_list_empty_page(self, lst_method):
+        """Check iter_list stops on an empty page"""
+        lst_method.side_effect = [[1, 2], []]
+        self.assertEqual(list(Base.iter_list(page_size=2)), [1, 2])
+        self.assertEqual(lst_method.call_count, 2)
+
+    @mock.patch('robottelo.cli.base.Base.list')
+    def test_iter_list_stop_early(self, lst_method):
+        """Check iter_list does not fetch pages which are not consumed"""
+        lst_method.side_effect = [[1, 2], [3, 4]]
+        for item in Base.iter_list(page_size=2):
+            break
+        self.assertEqual(item, 1)
+        self.assertEqual(lst_method.call_count, 1)
+
+    @mock.patch('robottelo.cli.base.Base.list')
+    def test_iter_list_prefetch(self, lst_method):
+        """Check iter_list fetches the next page in the background"""
+        fetched = threading.Event()
+
+        def list_page(options):
+            if options[u'page'] == 2:
+                fetched.set()
+                return [3]
+            return [1, 2]
+
+        lst_method.side_effect = list_page
+        items = Base.iter_list(page_size=2, prefetch=True)
+        self.assertEqual(next(items), 1)
+        self.assertTrue(fetched.wait(5))
+        self.assertEqual(list(items), [2, 3])
+        self.assertEqual(lst_method.call_count, 2)
+
+    @mock.patch('robottelo.cli.lifecycleenvironment.LifecycleEnvironment.list')
+    def test_exists_without_paging(self, lst_method):
+        """Check exists does not page the list when it is not paginated"""
+        lst_method.return_value = [1, 2]
+        options = {u'organization-id': 1}
+        self.assertEqual(LifecycleEnvironment.exists(options), 1)
+        lst_method.assert_called_once_with({u'organization-id': 1})
+
+    @mock.patch('robottelo.cli.lifecycleenvironment.LifecycleEnvironment.list')
+    def test_iter_list_without_paging(self, lst_method):
+        """Check iter_list lists once when the list is not paginated"""
+        lst_method.return_value = [1, 2, 3]
+        options = {u'organization-id': 1}
+        self.assertEqual(
+            list(LifecycleEnvironment.iter_list(options, page_size=2)),
+            [1, 2, 3]
+        )
+        lst_method.assert_called_once_with({u'organization-id': 1})
+
+    def test_paginated_list(self):
+        """Check paginated_list matches the hammer commands index"""
+        index = command_index.get_index()
+        for cls in (
+                ContentViewFilterRule,
+                LifecycleEnvironment,
+                Repository,
+                RepositorySet,
+                SyncPlan,
+                UserGroupExternal):
+            options = index.options(u'{0} list'.format(cls.command_base))
+            self.assertEqual(
+                cls.paginated_list, u'per-page' in options, cls.__name__)
+
     @mock.patch('robottelo.cli.base.Base.command_requires_org')
     def test_info_requires_organization_id(self, _):
         """Check info raises CLIError with organization-id is not present in
@@ -399,6 +831,21 @@ class BaseCliTestCase(unittest2.TestCase):
         construct.called_once_with({'per-page': 1000})
         execute.called_once_with(construct.return_value, output_format='csv')
 
+    @mock.patch('robottelo.cli.base.settings')
+    @mock.patch('robottelo.cli.base.Base.execute')
+    @mock.patch('robottelo.cli.base.Base._construct_command')
+    def test_list_json(self, construct, execute, settings):
+        """Check list reads JSON output when it is enabled"""
+        settings.hammer_read_cache = False
+        for enabled, output_format in ((True, 'json'), (False, 'csv')):
+            settings.hammer_json_list = enabled
+            self.assertEqual(execute.return_value, Base.list())
+            execute.assert_called_with(
+                construct.return_value,
+                output_format=output_format,
+                lazy_json=enabled,
+            )
+
     @mock.patch('robottelo.cli.base.Base.execute')
     @mock.patch('robottelo.cli.base.Base._construct_command')
     def test_list_without_per_page(self, construct, execute):
@@ -471,6 +918,229 @@ class BaseCliTestCase(unittest2.TestCase):
         )
 
 
+class ReadCacheTestCase(unittest2.TestCase):
+    """Tests for the cache of the ``info`` and ``list`` results"""
+
+    def setUp(self):
+        patcher = mock.patch('robottelo.cli.base.settings')
+        settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings.hammer_read_cache = True
+        settings.hammer_read_cache_size = 2
+        settings.hammer_read_cache_ttl = 60
+        settings.hammer_json_list = False
+        settings.hammer_validate_options = False
+        settings.hammer_shell = False
+        settings.performance = False
+        settings.locale = 'en_US'
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        patcher = mock.patch('robottelo.cli.base.ssh.command')
+        self.command = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.command.side_effect = self._command
+        self.settings = settings
+        read_cache.clear()
+        self.addCleanup(read_cache.clear)
+
+        class Organization(Base):
+            command_base = 'organization'
+
+        class Location(Base):
+            command_base = 'location'
+
+        self.org = Organization
+        self.loc = Location
+
+    def _command(self, cmd, output_format=None, timeout=None):
+        if output_format == 'csv':
+            return SSHCommandResult(
+                [{u'id': u'1', u'name': u'foo'}], u'', 0, None)
+        return SSHCommandResult([u'Id: 1', u'Name: foo'], u'', 0, None)
+
+    def test_cached_info(self):
+        """Check info results are cached by normalized options"""
+        result = self.org.info({u'id': 1})
+        self.assertEqual(result, {u'id': u'1', u'name': u'foo'})
+        self.assertEqual(self.org.info({u'id': u'1', u'name': None}), result)
+        self.assertEqual(self.command.call_count, 1)
+        self.assertEqual(
+            read_cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+        self.org.info({u'id': 2})
+        self.assertEqual(self.command.call_count, 2)
+
+    def test_cached_list(self):
+        """Check list results are cached"""
+        self.org.list()
+        self.assertEqual(
+            self.org.list(), [{u'id': u'1', u'name': u'foo'}])
+        self.assertEqual(self.command.call_count, 1)
+
+    def test_cached_copies(self):
+        """Check changing a returned result does not change the cache"""
+        self.org.info({u'id': 1})[u'name'] = u'changed'
+        self.assertEqual(self.org.info({u'id': 1})[u'name'], u'foo')
+
+    def test_invalidate_on_write(self):
+        """Check write commands invalidate the results of their hammer
+        command only
+        """
+        self.org.info({u'id': 1})
+        self.loc.info({u'id': 1})
+        self.org.update({u'id': 1, u'name': u'bar'})
+        self.org.info({u'id': 1})
+        self.loc.info({u'id': 1})
+        self.assertEqual(self.command.call_count, 4)
+        self.org.delete({u'id': 1})
+        self.org.info({u'id': 1})
+        self.assertEqual(self.command.call_count, 6)
+
+    def test_invalidate_on_failed_write(self):
+        """Check a failed write command invalidates the cache too"""
+        self.org.info({u'id': 1})
+        self.command.side_effect = None
+        self.command.return_value = SSHCommandResult(
+            u'', u'error', 65, None)
+        with self.assertRaises(CLIReturnCodeError):
+            self.org.set_parameter({u'id': 1})
+        self.command.side_effect = self._command
+        self.org.info({u'id': 1})
+        self.assertEqual(self.command.call_count, 3)
+
+    def test_cached_per_user(self):
+        """Check results are not shared between users"""
+        self.org.info({u'id': 1})
+        self.org.with_user('other', 'password').info({u'id': 1})
+        self.assertEqual(self.command.call_count, 2)
+
+    def test_size_bound(self):
+        """Check the least recently used results are dropped"""
+        for org_id in (1, 2, 3):
+            self.org.info({u'id': org_id})
+        self.assertEqual(read_cache.stats()['size'], 2)
+        self.org.info({u'id': 1})
+        self.assertEqual(self.command.call_count, 4)
+
+    def test_disabled(self):
+        """Check nothing is cached when the setting is disabled"""
+        self.settings.hammer_read_cache = False
+        self.org.info({u'id': 1})
+        self.org.info({u'id': 1})
+        self.assertEqual(self.command.call_count, 2)
+        self.assertEqual(
+            read_cache.stats(), {'hits': 0, 'misses': 0, 'size': 0})
+
+
+TASK_ID = u'2a8b6a4e-3c45-4ef3-9e2b-6b0bdc3d2f10'
+OTHER_TASK_ID = u'7c1f0f8e-9a37-4b9e-8a1e-0c6f4b0d1e22'
+
+
+class AsyncTaskTestCase(unittest2.TestCase):
+    """Tests for the ``async_`` mode of CLI methods and the task waiter"""
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_start_task(self, execute):
+        """Check the command runs with --async and the task id is returned"""
+        execute.return_value = [{u'id': TASK_ID, u'message': u'running'}]
+        self.assertEqual(
+            Repository.synchronize({u'id': 1}, async_=True), TASK_ID)
+        command = execute.call_args[0][0]
+        self.assertIn(u'repository synchronize', command)
+        self.assertIn(u'--async', command)
+        self.assertIn(u'--id="1"', command)
+        self.assertEqual(execute.call_args[1]['output_format'], 'csv')
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_start_task_id_in_message(self, execute):
+        """Check the task id is found in the command message"""
+        execute.return_value = [
+            {u'message': u'Task {0} running'.format(TASK_ID)}]
+        self.assertEqual(Repository._start_task({u'id': 1}), TASK_ID)
+        execute.return_value = [{u'message': u'Done'}]
+        with self.assertRaises(CLIError):
+            Repository._start_task({u'id': 1})
+
+    @staticmethod
+    def task_row(task_id, state=u'stopped', result=u'success'):
+        """Build a ``hammer task list`` row"""
+        return {
+            u'id': task_id,
+            u'state': state,
+            u'result': result,
+            u'task-errors': u'',
+        }
+
+    @mock.patch('robottelo.cli.task.time.sleep')
+    @mock.patch('robottelo.cli.task.Task.execute')
+    def test_wait_many(self, execute, sleep):
+        """Check running tasks are polled together until they finish"""
+        execute.side_effect = [
+            [self.task_row(TASK_ID), self.task_row(
+                OTHER_TASK_ID, u'running', u'pending')],
+            [self.task_row(OTHER_TASK_ID)],
+        ]
+        tasks = Task.wait_many([OTHER_TASK_ID, TASK_ID, TASK_ID])
+        self.assertEqual(list(tasks), [OTHER_TASK_ID, TASK_ID])
+        self.assertEqual(execute.call_count, 2)
+        first, second = [call[0][0] for call in execute.call_args_list]
+        self.assertIn(
+            u'--search="id = {0} or id = {1}"'.format(OTHER_TASK_ID, TASK_ID),
+            first
+        )
+        self.assertIn(u'--search="id = {0}"'.format(OTHER_TASK_ID), second)
+        sleep.assert_called_once_with(1)
+
+    @mock.patch('robottelo.cli.task.time.sleep')
+    @mock.patch('robottelo.cli.task.Task.execute')
+    def test_wait_many_backoff(self, execute, sleep):
+        """Check the time between polls doubles up to the maximum"""
+        running = [self.task_row(TASK_ID, u'running', u'pending')]
+        execute.side_effect = [running] * 5 + [[self.task_row(TASK_ID)]]
+        Task.wait_many([TASK_ID], max_poll_interval=5)
+        self.assertEqual(
+            [call[0][0] for call in sleep.call_args_list], [1, 2, 4, 5, 5])
+
+    @mock.patch('robottelo.cli.task.Task.execute')
+    def test_wait_many_chunks(self, execute):
+        """Check many tasks are polled in chunks"""
+        execute.side_effect = lambda command, output_format: [
+            self.task_row(task_id) for task_id in (TASK_ID, OTHER_TASK_ID)
+            if task_id in command
+        ]
+        Task.wait_many([TASK_ID, OTHER_TASK_ID], chunk_size=1)
+        self.assertEqual(execute.call_count, 2)
+
+    @mock.patch('robottelo.cli.task.time.time')
+    @mock.patch('robottelo.cli.task.time.sleep')
+    @mock.patch('robottelo.cli.task.Task.execute')
+    def test_wait_many_timeout(self, execute, sleep, now):
+        """Check an error is raised when tasks do not finish in time"""
+        now.side_effect = [0, 5, 11]
+        execute.return_value = [
+            self.task_row(TASK_ID),
+            self.task_row(OTHER_TASK_ID, u'running', u'pending'),
+        ]
+        with self.assertRaises(TaskWaitError) as context:
+            Task.wait_many([TASK_ID, OTHER_TASK_ID], timeout=10)
+        self.assertEqual(context.exception.pending, [OTHER_TASK_ID])
+        self.assertEqual(list(context.exception.tasks), [TASK_ID])
+        sleep.assert_called_once_with(1)
+
+    @mock.patch('robottelo.cli.task.Task.execute')
+    def test_wait_many_failed(self, execute):
+        """Check an error is raised for failed and paused tasks"""
+        execute.return_value = [
+            self.task_row(TASK_ID, result=u'error'),
+            self.task_row(OTHER_TASK_ID, u'paused', u'error'),
+        ]
+        with self.assertRaises(TaskWaitError) as context:
+            Task.wait_many([TASK_ID, OTHER_TASK_ID])
+        self.assertEqual(len(context.exception.tasks), 2)
+        tasks = Task.wait_many(
+            [TASK_ID, OTHER_TASK_ID], raise_on_failure=False)
+        self.assertEqual(tasks[TASK_ID][u'result'], u'error')
+
+
 class CLIErrorTests(unittest2.TestCase):
     """Tests for the CLIError cli class"""
 
@@ -0,0 +1,144 @@
+"""Tests for module ``robottelo.cli.command_index``."""
+import json
+import os
+import shutil
+import six
+import tempfile
+import unittest2
+
+from robottelo.cli import command_index
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+TREE = {
+    'options': [{'name': 'help', 'shortname': 'h'}],
+    'subcommands': [
+        {
+            'name': 'organization',
+            'options': [{'name': 'help', 'shortname': 'h'}],
+            'subcommands': [
+                {
+                    'name': 'create',
+                    'options': [
+                        {'name': 'name', 'shortname': None},
+                        {'name': 'label', 'shortname': None},
+                    ],
+                    'subcommands': [],
+                },
+            ],
+        },
+        {
+            'name': 'content-view',
+            'options': [],
+            'subcommands': [
+                {
+                    'name': 'version',
+                    'options': [],
+                    'subcommands': [
+                        {
+                            'name': 'promote',
+                            'options': [{'name': 'id', 'shortname': None}],
+                            'subcommands': [],
+                        },
+                    ],
+                },
+            ],
+        },
+    ],
+}
+
+
+class CommandIndexTestCase(unittest2.TestCase):
+    """Tests for the ``CommandIndex`` class."""
+
+    def setUp(self):
+        self.index = command_index.CommandIndex(
+            command_index.build_node(TREE))
+
+    def test_options(self):
+        """Options and short names of a command are indexed"""
+        self.assertEqual(
+            self.index.options('organization create'),
+            frozenset(['name', 'label'])
+        )
+        self.assertEqual(self.index.options(''), frozenset(['help', 'h']))
+        self.assertEqual(
+            self.index.options('content-view version promote'),
+            frozenset(['id'])
+        )
+
+    def test_unknown_command(self):
+        """Commands which are not indexed have no options"""
+        self.assertIsNone(self.index.options('organization delete'))
+        self.assertIsNone(self.index.find('architecture'))
+        self.assertEqual(
+            self.index.unknown_options('architecture create', ['bogus']),
+            set()
+        )
+
+    def test_unknown_options(self):
+        """Options not accepted by a command are reported"""
+        self.assertEqual(
+            self.index.unknown_options(
+                'organization create', ['name', 'labl']),
+            {'labl'}
+        )
+        self.assertEqual(
+            self.index.unknown_options(
+                'organization create',
+                {'name': 'foo', 'id': None, 'locations': False, 'lbl': 'x'}
+            ),
+            {'lbl'}
+        )
+
+
+class LoadIndexTestCase(unittest2.TestCase):
+    """Tests for the ``load_index`` function."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.commands_path = os.path.join(self.tmpdir, 'commands.json')
+        with open(self.commands_path, 'w') as handler:
+            json.dump(TREE, handler)
+        patcher = mock.patch(
+            'robottelo.cli.command_index.tempfile.gettempdir',
+            return_value=self.tmpdir
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_index(self):
+        """The index is pickled and loaded from the pickle afterwards"""
+        index = command_index.load_index(self.commands_path)
+        pickles = [
+            name for name in os.listdir(self.tmpdir)
+            if name.endswith('.pickle')
+        ]
+        self.assertEqual(len(pickles), 1)
+        with mock.patch('robottelo.cli.command_index.build_node') as build:
+            cached = command_index.load_index(self.commands_path)
+        self.assertFalse(build.called)
+        self.assertEqual(
+            cached.options('organization create'),
+            index.options('organization create')
+        )
+
+    def test_corrupted_cache(self):
+        """The index is built again if its pickle can not be read"""
+        cache_path = command_index._cache_path(self.commands_path)
+        with open(cache_path, 'wb') as handler:
+            handler.write(b'')
+        index = command_index.load_index(self.commands_path)
+        self.assertEqual(index.options('content-view version promote'), {
+            'id'})
+
+    def test_get_index(self):
+        """The index of the hammer commands file is loaded once"""
+        with mock.patch('robottelo.cli.command_index._index', None):
+            index = command_index.get_index()
+            self.assertIs(index, command_index.get_index())
+            self.assertIn('name', index.options('organization create'))
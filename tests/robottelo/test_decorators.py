@@ -9,6 +9,7 @@ from robottelo.constants import (
     BZ_CLOSED_STATUSES,
     BZ_OPEN_STATUSES
 )
+from robottelo.entity_cache import EntityCache, make_key
 from unittest2 import SkipTest, TestCase
 # (Too many public methods) pylint: disable=R0904
 
@@ -406,12 +407,14 @@ class BzBugIsOpenTestCase(TestCase):
 class CacheableTestCase(TestCase):
     """Tests for :func:`robottelo.decorators.cacheable`."""
     def setUp(self):
-        self.object_cache_patcher = mock.patch.dict(
-            'robottelo.decorators.OBJECT_CACHE')
+        self.object_cache_patcher = mock.patch(
+            'robottelo.decorators.OBJECT_CACHE', EntityCache())
         self.object_cache = self.object_cache_patcher.start()
+        self.created = []
 
         def make_foo(options):
-            return {'id': 42}
+            self.created.append(options)
+            return {'id': len(self.created)}
 
         self.make_foo = decorators.cacheable(make_foo)
 
@@ -421,21 +424,51 @@ class CacheableTestCase(TestCase):
     def test_build_cache(self):
         """Create a new object and add it to the cache."""
         obj = self.make_foo(cached=True)
-        self.assertEqual(decorators.OBJECT_CACHE, {'foo': {'id': 42}})
-        self.assertEqual(id(decorators.OBJECT_CACHE['foo']), id(obj))
+        key = make_key('make_foo')
+        self.assertIn(key, decorators.OBJECT_CACHE)
+        self.assertIs(decorators.OBJECT_CACHE.get(key), obj)
 
     def test_return_from_cache(self):
         """Return an already cached object."""
         cache_obj = {'id': 42}
-        decorators.OBJECT_CACHE['foo'] = cache_obj
+        decorators.OBJECT_CACHE.setdefault(make_key('make_foo'), cache_obj)
         obj = self.make_foo(cached=True)
-        self.assertEqual(id(cache_obj), id(obj))
+        self.assertIs(cache_obj, obj)
+        self.assertEqual(self.created, [])
 
     def test_create_and_not_add_to_cache(self):
         """Create a new object and not add it to the cache."""
         self.make_foo(cached=False)
-        self.assertNotIn('foo', decorators.OBJECT_CACHE)
-        self.assertEqual(decorators.OBJECT_CACHE, {})
+        self.assertEqual(len(decorators.OBJECT_CACHE), 0)
+
+    def test_cache_by_options(self):
+        """Objects created with different options are cached apart."""
+        first = self.make_foo({'name': 'a', 'org': 1}, cached=True)
+        second = self.make_foo({'name': 'b', 'org': 1}, cached=True)
+        self.assertIsNot(first, second)
+        self.assertIs(
+            self.make_foo({'org': 1, 'name': 'a'}, cached=True), first)
+        self.assertEqual(len(self.created), 2)
+
+    def test_scope(self):
+        """Objects cached for a scope are dropped when it ends."""
+        obj = self.make_foo(cached='class')
+        decorators.OBJECT_CACHE.end_scope('module')
+        self.assertIs(self.make_foo(cached='class'), obj)
+        decorators.OBJECT_CACHE.end_scope('class')
+        self.assertIsNot(self.make_foo(cached='class'), obj)
+
+    def test_references(self):
+        """An object created with the id of a cached object refers to it."""
+        org = self.make_foo({'name': 'org'}, cached='class')
+        self.make_foo({'organization-id': org['id']}, cached='module')
+        decorators.OBJECT_CACHE.end_scope('class')
+        self.assertIs(self.make_foo({'name': 'org'}, cached='class'), org)
+
+    def test_unknown_scope(self):
+        """Only the known scopes can be used."""
+        with self.assertRaises(ValueError):
+            self.make_foo(cached='function')
 
 
 class RmBugIsOpenTestCase(TestCase):
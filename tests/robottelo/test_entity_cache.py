@@ -0,0 +1,141 @@
+"""Tests for module ``robottelo.entity_cache``."""
+import unittest2
+
+from robottelo.entity_cache import EntityCache, make_key, option_references
+
+
+class MakeKeyTestCase(unittest2.TestCase):
+    """Tests for :func:`robottelo.entity_cache.make_key`."""
+
+    def test_options_order(self):
+        """The key doesn't depend on the order of the options."""
+        self.assertEqual(
+            make_key('make_org', {'name': 'a', 'label': 'b'}),
+            make_key('make_org', {'label': 'b', 'name': 'a'}),
+        )
+
+    def test_no_options(self):
+        """No options and empty options give the same key."""
+        self.assertEqual(make_key('make_org'), make_key('make_org', {}))
+
+    def test_factory_function(self):
+        """The factory function can be given instead of its name."""
+        def make_org(options=None):
+            pass
+        self.assertEqual(make_key(make_org), make_key('make_org'))
+        self.assertNotEqual(make_key('make_org'), make_key('make_location'))
+
+
+class OptionReferencesTestCase(unittest2.TestCase):
+    """Tests for :func:`robottelo.entity_cache.option_references`."""
+
+    def test_references(self):
+        """The values of the id options are the references."""
+        self.assertEqual(
+            option_references({
+                'organization-id': 1,
+                'location-ids': '2, 3',
+                'lifecycle-environment-ids': [4],
+                'name': '5',
+            }),
+            {'1', '2', '3', '4'}
+        )
+        self.assertEqual(option_references(), frozenset())
+
+
+class EntityCacheTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.entity_cache.EntityCache`."""
+
+    def setUp(self):
+        self.cache = EntityCache(maxsize=2)
+        self.released = []
+        self.cache.register_cleanup(
+            lambda name, entity: self.released.append((name, entity)))
+
+    def test_setdefault(self):
+        """The first cached entity is kept, the other one is forgotten."""
+        key = make_key('make_org')
+        self.assertEqual(self.cache.setdefault(key, {'id': 1}), {'id': 1})
+        self.assertEqual(self.cache.setdefault(key, {'id': 2}), {'id': 1})
+        self.assertEqual(self.released, [])
+
+    def test_lru_eviction(self):
+        """The least recently used entity is forgotten when full."""
+        keys = [make_key('make_org', {'name': name}) for name in 'abc']
+        self.cache.setdefault(keys[0], 'a')
+        self.cache.setdefault(keys[1], 'b')
+        self.cache.get(keys[0])
+        self.cache.setdefault(keys[2], 'c')
+        self.assertNotIn(keys[1], self.cache)
+        self.assertEqual(self.released, [])
+        self.assertEqual(len(self.cache), 2)
+
+    def test_invalidate(self):
+        """Entities can be dropped by factory and options."""
+        self.cache.maxsize = 10
+        self.cache.setdefault(make_key('make_org'), 'org')
+        self.cache.setdefault(make_key('make_product', {'name': 'a'}), 'a')
+        self.cache.setdefault(make_key('make_product', {'name': 'b'}), 'b')
+        self.assertEqual(
+            self.cache.invalidate('make_product', {'name': 'a'}), 1)
+        self.assertEqual(self.cache.invalidate('make_product'), 1)
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertEqual(
+            sorted(entity for _, entity in self.released), ['a', 'b', 'org'])
+
+    def test_end_scope(self):
+        """Only the entities of the finished scope are dropped."""
+        self.cache.maxsize = 10
+        self.cache.setdefault(make_key('make_org'), 'org')
+        self.cache.setdefault(make_key('make_product'), 'product', 'class')
+        self.cache.end_scope('class')
+        self.assertEqual(self.released, [('make_product', 'product')])
+        self.assertEqual(len(self.cache), 1)
+
+    def test_end_scope_referred(self):
+        """An entity referred by a cached entity of another scope is kept
+        until the end of that scope.
+        """
+        self.cache.maxsize = 10
+        org_key = make_key('make_org')
+        self.cache.setdefault(org_key, {'id': 1}, 'class')
+        self.cache.setdefault(
+            make_key('make_product'), {'id': 2}, 'module', frozenset(['1']))
+        self.assertEqual(self.cache.end_scope('class'), 0)
+        self.assertIn(org_key, self.cache)
+        self.cache.end_scope('module')
+        self.assertEqual(
+            self.released,
+            [('make_product', {'id': 2}), ('make_org', {'id': 1})]
+        )
+
+    def test_invalidate_referred(self):
+        """An invalidated entity still referred is not cleaned up."""
+        self.cache.maxsize = 10
+        self.cache.setdefault(make_key('make_org'), {'id': 1})
+        self.cache.setdefault(
+            make_key('make_product'), {'id': 2}, references=frozenset(['1']))
+        self.assertEqual(self.cache.invalidate('make_org'), 1)
+        self.assertEqual(len(self.cache), 1)
+        self.cache.clear()
+        self.assertEqual(self.released, [('make_product', {'id': 2})])
+
+    def test_get_broadens_scope(self):
+        """An entity requested for a broader scope is kept longer."""
+        key = make_key('make_org')
+        self.cache.setdefault(key, 'org', 'class')
+        self.cache.get(key, 'session')
+        self.cache.end_scope('class')
+        self.assertIn(key, self.cache)
+
+    def test_cleanup_failure(self):
+        """A failing cleanup function doesn't stop the others."""
+        def fail(name, entity):
+            raise ValueError('cleanup failed')
+        self.cache.unregister_cleanup(self.cache._cleanups[0])
+        self.cache.register_cleanup(fail)
+        self.cache.register_cleanup(
+            lambda name, entity: self.released.append(entity))
+        self.cache.setdefault(make_key('make_org'), 'org')
+        self.cache.clear()
+        self.assertEqual(self.released, ['org'])
@@ -0,0 +1,344 @@
+"""Tests for module ``robottelo.cli.factory``."""
+import six
+import socket
+import threading
+import unittest2
+
+from robottelo.cli import factory
+from robottelo.cli.base import CLIReturnCodeError
+from robottelo.cli.factory import (
+    CLIFactoryError,
+    MakeManyError,
+    SetupPlan,
+    SetupStepError,
+    make_many,
+)
+from robottelo.ssh import SSHCommandResult
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class CreateObjectTestCase(unittest2.TestCase):
+    """Tests for :func:`robottelo.cli.factory.create_object`."""
+
+    def setUp(self):
+        patcher = mock.patch('robottelo.cli.factory.settings')
+        self.settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('robottelo.cli.factory.command_index.get_index')
+        self.get_index = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cli_object = mock.Mock(command_base='org')
+        self.cli_object.create.return_value = [{'id': u'1'}]
+
+    def test_index_not_used(self):
+        """The hammer commands index is not loaded by default."""
+        self.settings.hammer_validate_options = False
+        self.assertEqual(
+            factory.create_object(
+                self.cli_object, {'name': None}, {'name': 'a'}),
+            {'id': u'1'}
+        )
+        self.assertFalse(self.get_index.called)
+        self.cli_object.create.assert_called_once_with({'name': 'a'})
+
+    def test_index_used(self):
+        """The values are checked against the index when validating the
+        hammer options.
+        """
+        self.settings.hammer_validate_options = True
+        self.get_index.return_value.options.return_value = {'name'}
+        factory.create_object(self.cli_object, {}, {'name': 'a'})
+        self.get_index.return_value.options.assert_called_once_with(
+            u'org create')
+
+
+class SetupPlanTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.cli.factory.SetupPlan`."""
+
+    def test_results(self):
+        """Steps get the results of the steps they require, in order."""
+        plan = SetupPlan(u'plan', max_workers=2)
+        plan.provide('org', 1)
+        plan.add('product', lambda org: org + 1, requires=['org'])
+        plan.add(
+            'repository',
+            lambda product, org: (product, org),
+            requires=['product', 'org'],
+        )
+        self.assertEqual(
+            plan.run(),
+            {'org': 1, 'product': 2, 'repository': (2, 1)},
+        )
+        self.assertEqual(
+            [entry['step'] for entry in plan.trace], ['product', 'repository'])
+        self.assertEqual(
+            set(entry['status'] for entry in plan.trace), {'done'})
+
+    def test_after(self):
+        """Steps listed in ``after`` are done first but not passed."""
+        calls = []
+        plan = SetupPlan(u'plan', max_workers=4)
+        plan.add('sync', lambda: calls.append('sync'))
+        plan.add('publish', lambda: calls.append('publish'), after=['sync'])
+        plan.run()
+        self.assertEqual(calls, ['sync', 'publish'])
+
+    def test_independent_steps_run_concurrently(self):
+        """Steps which don't depend on each other run at the same time."""
+        first, second = threading.Event(), threading.Event()
+
+        def step(mine, other):
+            mine.set()
+            return other.wait(5)
+
+        plan = SetupPlan(u'plan', max_workers=2)
+        plan.add('lce', lambda: step(first, second))
+        plan.add('product', lambda: step(second, first))
+        results = plan.run()
+        self.assertTrue(results['lce'])
+        self.assertTrue(results['product'])
+
+    def test_failure_cancels_dependents(self):
+        """A failed step stops the plan and its dependents are not run."""
+        calls = []
+
+        def fail():
+            raise CLIFactoryError(u'Failed to synchronize repository')
+
+        plan = SetupPlan(u'plan', max_workers=1)
+        plan.add('sync', fail)
+        plan.add('publish', lambda: calls.append('publish'), after=['sync'])
+        plan.add('promote', lambda: calls.append('promote'), after=['publish'])
+        with self.assertRaises(SetupStepError) as context:
+            plan.run()
+        error = context.exception
+        self.assertIsInstance(error, CLIFactoryError)
+        self.assertEqual(error.step, 'sync')
+        self.assertEqual(error.cancelled, ['publish', 'promote'])
+        self.assertIn(u'Failed to synchronize repository', str(error))
+        self.assertEqual(calls, [])
+        self.assertEqual(
+            [(entry['step'], entry['status']) for entry in plan.trace],
+            [('sync', 'failed'), ('publish', 'cancelled'),
+             ('promote', 'cancelled')],
+        )
+
+    def test_base_exception(self):
+        """Exceptions which are not an ``Exception`` are raised as is."""
+        calls = []
+
+        class Skipped(BaseException):
+            """Like the outcome raised by ``pytest.skip``."""
+
+        def skip():
+            raise Skipped(u'Feature not available')
+
+        plan = SetupPlan(u'plan', max_workers=2)
+        plan.add('sync', skip)
+        plan.add('publish', lambda: calls.append('publish'), after=['sync'])
+        with self.assertRaises(Skipped):
+            plan.run()
+        self.assertEqual(calls, [])
+        self.assertEqual(
+            [(entry['step'], entry['status']) for entry in plan.trace],
+            [('sync', 'failed'), ('publish', 'cancelled')],
+        )
+
+    def test_unknown_dependency(self):
+        """Dependencies must be added before the steps depending on them."""
+        plan = SetupPlan(u'plan')
+        with self.assertRaises(ValueError):
+            plan.add('publish', lambda cv: cv, requires=['content-view'])
+
+    def test_duplicated_step(self):
+        """Step names are unique."""
+        plan = SetupPlan(u'plan')
+        plan.provide('org', 1)
+        with self.assertRaises(ValueError):
+            plan.add('org', lambda: 2)
+
+
+class MakeManyTestCase(unittest2.TestCase):
+    """Tests for :func:`robottelo.cli.factory.make_many`."""
+
+    def test_results_order(self):
+        """Entities are returned in the order of their index."""
+        def make_foo(options):
+            return {'name': options['name']}
+
+        self.assertEqual(
+            make_many(make_foo, 20, lambda index: {'name': index}, workers=4),
+            [{'name': index} for index in range(20)],
+        )
+
+    def test_default_options(self):
+        """The factory gets no options without ``options_fn``."""
+        def make_foo(options):
+            return options
+
+        self.assertEqual(make_many(make_foo, 2), [None, None])
+        self.assertEqual(make_many(make_foo, 0), [])
+
+    def test_partial_failure(self):
+        """The failed entities are reported with the created ones."""
+        def make_foo(options):
+            if options['name'] % 2:
+                raise CLIFactoryError(u'odd name')
+            return options['name']
+
+        with self.assertRaises(MakeManyError) as context:
+            make_many(make_foo, 4, lambda index: {'name': index})
+        error = context.exception
+        self.assertEqual(error.results, [0, None, 2, None])
+        self.assertEqual(sorted(error.errors), [1, 3])
+        self.assertIn(u'Failed to create 2 of 4 entities', str(error))
+
+    @mock.patch('robottelo.cli.factory.make_host')
+    def test_fake_host_defaults_resolved_once(self, make_host):
+        """The default entities of fake hosts are resolved once per group of
+        hosts using the same options.
+        """
+        defaults = dict(
+            (key, u'1') for key in factory.FAKE_HOST_DEFAULT_KEYS
+            if key.endswith('-id')
+        )
+        resolve = mock.Mock(side_effect=lambda options: dict(
+            defaults, **options))
+        make_host.side_effect = lambda options: options
+        with mock.patch.dict(
+                'robottelo.cli.factory._MAKE_MANY_SHARED_OPTIONS',
+                {'make_fake_host': (factory.FAKE_HOST_DEFAULT_KEYS, resolve)}):
+            hosts = make_many(
+                factory.make_fake_host,
+                6,
+                lambda index: {
+                    'name': index,
+                    'organization-id': u'1' if index < 4 else u'2',
+                },
+            )
+        self.assertEqual(resolve.call_count, 2)
+        self.assertEqual([host['name'] for host in hosts], list(range(6)))
+        self.assertEqual(hosts[5]['organization-id'], u'2')
+        self.assertEqual(hosts[5]['medium-id'], u'1')
+
+    @mock.patch('robottelo.cli.factory.make_medium')
+    @mock.patch('robottelo.cli.factory.default_entities')
+    def test_fake_host_own_medium(self, default_entities, make_medium):
+        """Each fake host gets its own medium."""
+        default_entities.get.return_value = {'id': u'1'}
+        make_medium.side_effect = [{'id': u'2'}, {'id': u'3'}]
+        self.assertEqual(
+            [factory._fake_host_defaults({})['medium-id'] for _ in range(2)],
+            [u'2', u'3']
+        )
+        self.assertEqual(
+            factory._fake_host_defaults({'medium-id': u'4'})['medium-id'],
+            u'4'
+        )
+        self.assertEqual(make_medium.call_count, 2)
+
+
+class DefaultEntitiesTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.cli.factory.DefaultEntities`."""
+
+    def setUp(self):
+        self.entities = factory.DefaultEntities()
+        for target, value in (
+                ('robottelo.cli.factory.settings', mock.MagicMock()),
+                ('robottelo.cli.base.Base._get_username_password',
+                 mock.Mock(return_value=(u'admin', u'changeme'))),
+                ('robottelo.cli.base.Base._construct_command',
+                 mock.Mock(side_effect=lambda options, command: command))):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('robottelo.cli.factory.ssh.command_batch')
+        self.command_batch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def responses(self, *rows):
+        """Return the responses of the batched look up, one per entity."""
+        return [
+            SSHCommandResult(stdout=entity_rows, stderr=u'')
+            for entity_rows in rows
+        ]
+
+    def test_warm_single_command(self):
+        """The default entities are looked up together, once."""
+        self.command_batch.return_value = self.responses(
+            [{'id': u'1', 'name': u'Default Organization'}],
+            [{'id': u'2', 'name': u'Default Location'}],
+            [{'id': u'3', 'name': u'example.com'}],
+            [{'id': u'4', 'name': u'x86_64'}],
+            [{'id': u'5', 'name': u'RedHat', 'title': u'RedHat 7.3'}],
+        )
+        self.assertEqual(self.entities.get('organization')['id'], u'1')
+        self.assertEqual(self.entities.get('operatingsystem')['id'], u'5')
+        self.assertEqual(self.entities.get('architecture')['id'], u'4')
+        self.assertEqual(self.command_batch.call_count, 1)
+        self.assertEqual(len(self.command_batch.call_args[0][0]), 5)
+
+    @mock.patch('robottelo.cli.factory.make_architecture')
+    def test_missing_entity_created(self, make_architecture):
+        """An entity which is not found is created once."""
+        make_architecture.return_value = {'id': u'9', 'name': u'arch'}
+        self.command_batch.return_value = self.responses(
+            [{'id': u'1'}], [{'id': u'2'}], [{'id': u'3'}], [], [{'id': u'5'}])
+        with mock.patch.object(
+                factory.Architecture, 'info',
+                side_effect=CLIReturnCodeError(1, u'', u'not found')):
+            self.assertEqual(self.entities.get('architecture')['id'], u'9')
+            self.assertEqual(self.entities.get('architecture')['id'], u'9')
+        self.assertEqual(make_architecture.call_count, 1)
+
+    def test_failed_look_up(self):
+        """An entity whose list command failed is looked up alone, the
+        others are kept.
+        """
+        self.command_batch.return_value = self.responses(
+            [{'id': u'1'}], [{'id': u'2'}], [{'id': u'3'}], [{'id': u'4'}],
+            [{'id': u'5'}])
+        self.command_batch.return_value[0].return_code = 70
+        with mock.patch.object(
+                factory.Org, 'info', return_value={'id': u'7'}) as info:
+            self.assertEqual(self.entities.get('organization')['id'], u'7')
+            self.entities.get('organization')
+        self.assertEqual(self.entities.get('location')['id'], u'2')
+        self.assertEqual(info.call_count, 1)
+        self.assertEqual(self.command_batch.call_count, 1)
+
+    def test_failed_warm(self):
+        """ssh errors are raised and the look up is tried again."""
+        self.command_batch.side_effect = socket.timeout()
+        with self.assertRaises(socket.timeout):
+            self.entities.get('organization')
+        self.command_batch.side_effect = None
+        self.command_batch.return_value = self.responses(
+            [{'id': u'1'}], [{'id': u'2'}], [{'id': u'3'}], [{'id': u'4'}],
+            [{'id': u'5'}])
+        self.assertEqual(self.entities.get('organization')['id'], u'1')
+        self.assertEqual(self.command_batch.call_count, 2)
+
+    def test_invalidate(self):
+        """Invalidated entities are looked up again."""
+        self.command_batch.return_value = self.responses(
+            [{'id': u'1'}], [{'id': u'2'}], [{'id': u'3'}], [{'id': u'4'}],
+            [{'id': u'5'}])
+        self.entities.get('organization')
+        with mock.patch.object(
+                factory.Location, 'info', return_value={'id': u'7'}):
+            self.entities.invalidate('location')
+            self.assertEqual(self.entities.get('location')['id'], u'7')
+            self.assertEqual(self.entities.get('organization')['id'], u'1')
+        self.entities.invalidate()
+        self.entities.get('organization')
+        self.assertEqual(self.command_batch.call_count, 2)
+
+    def test_unknown_entity(self):
+        """Only the known default entities can be requested."""
+        with self.assertRaises(ValueError):
+            self.entities.get('subnet')
@@ -1,5 +1,10 @@
 # -*- encoding: utf-8 -*-
 """Tests for Robottelo's hammer helpers"""
+import copy
+import io
+import json
+import os
+import pickle
 import unittest2
 
 from robottelo.cli import hammer
@@ -8,6 +13,21 @@ from robottelo.cli import hammer
 class ParseCSVTestCase(unittest2.TestCase):
     """Tests for parsing CSV hammer output"""
 
+    def test_iter_csv(self):
+        """Rows are yielded before the whole output is read"""
+        read = []
+
+        def lines():
+            for line in (u'Id,Name', u'1,"multi', u'line"', u'2,other'):
+                read.append(line)
+                yield line
+
+        rows = hammer.iter_csv(lines())
+        self.assertEqual(next(rows), {u'id': u'1', u'name': u'multi\nline'})
+        self.assertEqual(len(read), 3)
+        self.assertEqual(list(rows), [{u'id': u'2', u'name': u'other'}])
+        self.assertEqual(list(hammer.iter_csv([])), [])
+
     def test_parse_csv(self):
         output_lines = [
             u'Header,Header 2',
@@ -38,6 +58,44 @@ class ParseCSVTestCase(unittest2.TestCase):
             ]
         )
 
+    def test_parse_csv_compact(self):
+        """Compact rows behave like read-only dictionaries"""
+        rows = hammer.parse_csv(
+            [u'Id,Name,Id', u'1,foo,2', u'3'], compact=True)
+        self.assertTrue(all(isinstance(row, hammer.CSVRow) for row in rows))
+        self.assertEqual(rows, hammer.parse_csv(
+            [u'Id,Name,Id', u'1,foo,2', u'3']))
+        self.assertEqual(rows[0][u'name'], u'foo')
+        self.assertEqual(rows[0][u'id'], u'2')
+        self.assertEqual(list(rows[0]), [u'id', u'name'])
+        self.assertEqual(len(rows[1]), 1)
+        self.assertEqual(rows[1].get(u'name', u'missing'), u'missing')
+        with self.assertRaises(KeyError):
+            rows[1][u'name']
+        with self.assertRaises(TypeError):
+            rows[0][u'name'] = u'bar'
+        self.assertEqual(pickle.loads(pickle.dumps(rows[0])), rows[0])
+
+    def test_keys_are_interned(self):
+        """Header keys are shared between outputs"""
+        first = hammer.parse_csv([u'Some Header', u'1'])[0]
+        second = hammer.parse_csv([u'Some Header', u'2'], compact=True)[0]
+        self.assertIs(list(first)[0], list(second)[0])
+
+    def test_key_caches_are_bounded(self):
+        """Data-dependent JSON keys don't grow the key caches forever"""
+        output = json.dumps(dict(
+            (u'Fact {0}'.format(index), index)
+            for index in range(hammer.KEYS_CACHE_SIZE + 10)
+        ))
+        self.assertEqual(
+            len(hammer.parse_json(output, lazy=True)),
+            hammer.KEYS_CACHE_SIZE + 10,
+        )
+        self.assertLessEqual(len(hammer._KEYS), hammer.KEYS_CACHE_SIZE)
+        self.assertLessEqual(
+            len(hammer._NORMALIZED_KEYS), hammer.KEYS_CACHE_SIZE)
+
 
 class ParseJSONTestCase(unittest2.TestCase):
     """Tests for parsing JSON hammer output"""
@@ -112,6 +170,79 @@ class ParseJSONTestCase(unittest2.TestCase):
             }
         )
 
+    def test_parse_json_lazy_views(self):
+        """Lazy JSON views compare equal to the normalized copies"""
+        output = u"""{
+          "ID": 1,
+          "Name": "Default Organization View",
+          "Label": "Default_Organization_View",
+          "Composite": false,
+          "Description": null,
+          "Content Host Count": 0,
+          "Organization": "Default Organization",
+          "Yum Repositories": {
+          },
+          "Docker Repositories": {
+          },
+          "OSTree Repositories": {
+          },
+          "Puppet Modules": {
+          },
+          "Lifecycle Environments": {
+            "1": {
+              "ID": 1,
+              "Name": "Library"
+            }
+          },
+          "Versions": {
+            "1": {
+              "ID": 1,
+              "Version": "1.0",
+              "Published": "2016-07-05 17:35:33 UTC"
+            }
+          },
+          "Components": {
+          },
+          "Activation Keys": {
+          }
+        }"""
+        expected = hammer.parse_json(output)
+        lazy = hammer.parse_json(output.encode('utf-8'), lazy=True)
+        self.assertIsInstance(lazy, hammer.JSONObject)
+        self.assertEqual(lazy, expected)
+        self.assertEqual(expected, lazy)
+        self.assertEqual(
+            lazy[u'lifecycle-environments'][u'1'][u'id'], u'1')
+
+    def test_parse_json_lazy(self):
+        """Lazy JSON views behave like the normalized copies"""
+        output = u"""[
+          {"ID": 1, "Name": "foo", "Enabled": true, "Errata": [1, "RHSA"]},
+          {"ID": 2, "Name": "bar", "Enabled": false, "Errata": []}
+        ]"""
+        expected = hammer.parse_json(output)
+        lazy = hammer.parse_json(output, lazy=True)
+        self.assertIsInstance(lazy, hammer.JSONArray)
+        self.assertEqual(lazy, expected)
+        self.assertEqual(expected, lazy)
+        self.assertFalse(lazy != expected)
+        self.assertNotEqual(lazy, expected[:1])
+        self.assertEqual(len(lazy), 2)
+        self.assertEqual(lazy[1:], expected[1:])
+        self.assertEqual(lazy[0][u'errata'], [u'1', u'RHSA'])
+        self.assertIs(lazy[0][u'enabled'], True)
+        self.assertIn(u'name', lazy[0])
+        self.assertNotIn(u'Name', lazy[0])
+        self.assertEqual(sorted(lazy[0]), [
+            u'enabled', u'errata', u'id', u'name'])
+        self.assertEqual(repr(lazy[1][u'errata']), repr([]))
+        with self.assertRaises(KeyError):
+            lazy[0][u'Name']
+        with self.assertRaises(TypeError):
+            lazy[0][u'name'] = u'changed'
+        self.assertEqual(copy.deepcopy(lazy), expected)
+        self.assertEqual(pickle.loads(pickle.dumps(lazy)), expected)
+
     def test_parsed_json_match_parsed_csv(self):
         """ Output generated by:
         JSON:
@@ -253,9 +384,97 @@ class ParseHelpTestCase(unittest2.TestCase):
         )
 
 
+class DiffCommandTreesTestCase(unittest2.TestCase):
+    """Tests for comparing hammer command trees"""
+
+    @staticmethod
+    def command(name, options=(), subcommands=()):
+        """Build a command of a hammer command tree"""
+        return {
+            'name': name,
+            'options': [{'name': option} for option in options],
+            'subcommands': list(subcommands),
+        }
+
+    def test_same_trees(self):
+        """Identical trees have no differences"""
+        tree = self.command('hammer', ['help'], [
+            self.command('organization', ['help'], [
+                self.command('create', ['name'])])
+        ])
+        self.assertEqual(hammer.diff_command_trees(tree, tree), {})
+
+    def test_diff_command_trees(self):
+        """Added and removed options and commands are reported"""
+        old = self.command('hammer', ['help'], [
+            self.command('organization', ['help'], [
+                self.command('create', ['name', 'label']),
+                self.command('delete', ['id']),
+            ]),
+        ])
+        new = self.command('hammer', ['help'], [
+            self.command('organization', ['help'], [
+                self.command('create', ['name', 'description']),
+            ]),
+            self.command('location', ['help'], [
+                self.command('list', ['search']),
+            ]),
+        ])
+        self.assertEqual(hammer.diff_command_trees(old, new), {
+            'hammer': {
+                'added_command': False,
+                'removed_command': False,
+                'added_subcommands': ['location'],
+            },
+            'hammer organization': {
+                'added_command': False,
+                'removed_command': False,
+                'removed_subcommands': ['delete'],
+            },
+            'hammer organization create': {
+                'added_command': False,
+                'removed_command': False,
+                'added_options': ['description'],
+                'removed_options': ['label'],
+            },
+            'hammer organization delete': {
+                'added_command': False,
+                'removed_command': True,
+                'removed_options': ['id'],
+            },
+            'hammer location': {
+                'added_command': True,
+                'removed_command': False,
+                'added_options': ['help'],
+                'added_subcommands': ['list'],
+            },
+            'hammer location list': {
+                'added_command': True,
+                'removed_command': False,
+                'added_options': ['search'],
+            },
+        })
+
+
 class ParseInfoTestCase(unittest2.TestCase):
     """Tests for parsing info hammer output"""
 
+    def test_parse_golden_outputs(self):
+        """Parsing the recorded info outputs gives the recorded results"""
+        data_dir = os.path.join(
+            os.path.dirname(__file__), 'data', 'hammer_info')
+        outputs = sorted(
+            name for name in os.listdir(data_dir) if name.endswith('.txt'))
+        self.assertGreater(len(outputs), 0)
+        for name in outputs:
+            output_path = os.path.join(data_dir, name)
+            expected_path = os.path.splitext(output_path)[0] + '.json'
+            with io.open(output_path, encoding='utf-8') as handler:
+                output = handler.read().split(u'\n')
+            with io.open(expected_path, encoding='utf-8') as handler:
+                expected = json.load(handler)
+            self.assertEqual(hammer.parse_info(output), expected, name)
+
     def test_parse_simple(self):
         """Can parse a simple info output"""
         output = [
@@ -0,0 +1,150 @@
+"""Tests for module ``robottelo.cli.hammer_shell``."""
+import re
+import six
+import unittest2
+
+from robottelo.cli import hammer_shell
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class MockShellChannel(object):
+    """Emulates a ``hammer shell`` process with the robottelo preload."""
+    def __init__(self, responses):
+        self.responses = responses
+        self.closed = False
+        self.exited = False
+        self.marker = None
+        self.lines = []
+        self.stdout = b''
+        self.stderr = b''
+
+    def exec_command(self, cmd):
+        self.command = cmd.decode('utf-8')
+        self.marker = re.search(
+            r'ROBOTTELO_HAMMER_MARKER=(\S+)', self.command).group(1)
+        self.stdout += b'Welcome to the hammer interactive shell\n'
+
+    def sendall(self, data):
+        line = data.decode('utf-8').rstrip('\n')
+        self.lines.append(line)
+        if line == 'exit':
+            self.exited = True
+            return
+        stdout, stderr, code = self.responses.get(line, (u'', u'', 0))
+        self.stdout += u'{0}\n{1}\n{2} {3}\n'.format(
+            line, stdout, self.marker, code).encode('utf-8')
+        self.stderr += u'{0}\n{1}\n'.format(
+            stderr, self.marker).encode('utf-8')
+
+    def recv_ready(self):
+        return len(self.stdout) > 0
+
+    def recv(self, size):
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        return len(self.stderr) > 0
+
+    def recv_stderr(self, size):
+        data, self.stderr = self.stderr[:size], self.stderr[size:]
+        return data
+
+    def exit_status_ready(self):
+        return self.exited
+
+    def recv_exit_status(self):
+        return 1
+
+
+class HammerShellTestCase(unittest2.TestCase):
+    """Tests for the ``HammerShell`` class."""
+    def setUp(self):
+        self.channels = []
+        client = mock.Mock()
+        client.get_transport.return_value.open_session.side_effect = (
+            self._open_session)
+        patcher = mock.patch('robottelo.cli.hammer_shell.ssh.get_client')
+        self.get_client = patcher.start()
+        self.get_client.return_value = client
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('robottelo.cli.hammer_shell.settings')
+        patcher.start().locale = 'en_US'
+        self.addCleanup(patcher.stop)
+        self.shell = hammer_shell.HammerShell('admin', 'changeme')
+
+    def _open_session(self):
+        self.channels.append(MockShellChannel({
+            u'--output=csv organization list': (
+                u'Id,Name\n1,Default Organization', u'', 0),
+            u'organization info --id="99"': (
+                u'', u'Could not find organization', 65),
+        }))
+        return self.channels[-1]
+
+    @property
+    def channel(self):
+        return self.channels[-1]
+
+    def test_start(self):
+        """The shell is started with the preload and credentials"""
+        self.shell.run(u'organization list', output_format='csv')
+        self.assertIn(u'RUBYOPT=-r/tmp/robottelo-hammer-shell-', (
+            self.channel.command))
+        self.assertIn(u'hammer -v -u admin -p changeme shell', (
+            self.channel.command))
+        self.assertEqual(self.channel.lines[0], u'--help')
+
+    def test_run_csv(self):
+        """Output of a command is split and parsed as ``ssh.command`` does"""
+        result = self.shell.run(u'organization list', output_format='csv')
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(
+            result.stdout, [{u'id': u'1', u'name': u'Default Organization'}])
+        self.assertEqual(result.stderr, u'')
+
+    def test_run_error(self):
+        """Return code and stderr of a failed command are kept"""
+        result = self.shell.run(u'organization info --id="99"')
+        self.assertEqual(result.return_code, 65)
+        self.assertEqual(result.stderr, u'Could not find organization')
+        self.assertEqual(result.stdout, u'')
+
+    def test_reuse_session(self):
+        """Many commands run on the same shell process"""
+        self.shell.run(u'organization list', output_format='csv')
+        self.shell.run(u'organization info --id="99"')
+        self.assertEqual(self.get_client.call_count, 1)
+        self.assertEqual(len(self.channel.lines), 3)
+
+    def test_restart_after_exit(self):
+        """A new shell is started when the previous one exited"""
+        self.shell.run(u'organization list', output_format='csv')
+        self.channel.exited = True
+        result = self.shell.run(u'organization list', output_format='csv')
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(self.get_client.call_count, 2)
+        self.assertEqual(len(self.channels), 2)
+
+    def test_shell_exited(self):
+        """An error is raised if the shell exits while running a command"""
+        self.shell.run(u'organization list', output_format='csv')
+        self.channel.responses = {}
+        self.channel.sendall = lambda data: setattr(
+            self.channel, 'exited', True)
+        with self.assertRaises(hammer_shell.HammerShellError):
+            self.shell.run(u'organization list')
+        self.assertFalse(self.shell.alive)
+
+    def test_get_hammer_shell(self):
+        """A shell session is shared by the same credentials"""
+        first = hammer_shell.get_hammer_shell('admin', 'changeme')
+        self.assertIs(
+            first, hammer_shell.get_hammer_shell('admin', 'changeme'))
+        self.assertIsNot(
+            first, hammer_shell.get_hammer_shell('other', 'changeme'))
+        hammer_shell.close_hammer_shells()
@@ -0,0 +1,81 @@
+"""Tests for module ``robottelo.metrics``."""
+import json
+import os
+import shutil
+import tempfile
+import unittest2
+
+from robottelo import metrics
+
+
+class HistogramTestCase(unittest2.TestCase):
+    """Tests for the ``Histogram`` class."""
+    def setUp(self):
+        self.histogram = metrics.Histogram(
+            'test_seconds', 'Test histogram', buckets=(0.1, 1))
+
+    def test_observe(self):
+        """Values are counted in their bucket, per set of labels"""
+        self.histogram.observe(0.05, host='a')
+        self.histogram.observe(0.5, host='a')
+        self.histogram.observe(5, host='a')
+        self.histogram.observe(1, host='b')
+        samples = self.histogram.samples()
+        self.assertEqual(
+            [(dict(sample['labels']), sample['counts'], sample['count'])
+             for sample in samples],
+            [({'host': 'a'}, [1, 1, 1], 3), ({'host': 'b'}, [0, 1, 0], 1)]
+        )
+        self.assertAlmostEqual(samples[0]['sum'], 5.55)
+
+    def test_time(self):
+        """The time spent in the block is observed"""
+        with self.histogram.time(command='ls'):
+            pass
+        sample, = self.histogram.samples()
+        self.assertEqual(sample['count'], 1)
+        self.assertEqual(dict(sample['labels']), {'command': 'ls'})
+
+
+class MetricsRegistryTestCase(unittest2.TestCase):
+    """Tests for the ``MetricsRegistry`` class."""
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+        self.histogram = self.registry.histogram(
+            'test_seconds', 'Test histogram', buckets=(0.1, 1))
+        self.histogram.observe(0.5, host='a"b')
+        self.histogram.observe(2, host='a"b')
+
+    def test_histogram_is_shared(self):
+        """A histogram is created once per name"""
+        self.assertIs(
+            self.registry.histogram('test_seconds', 'Other'), self.histogram)
+
+    def test_to_prometheus(self):
+        """Buckets are cumulative and labels escaped"""
+        self.assertEqual(self.registry.to_prometheus(), (
+            u'# HELP test_seconds Test histogram\n'
+            u'# TYPE test_seconds histogram\n'
+            u'test_seconds_bucket{host="a\\"b",le="0.1"} 0\n'
+            u'test_seconds_bucket{host="a\\"b",le="1"} 1\n'
+            u'test_seconds_bucket{host="a\\"b",le="+Inf"} 2\n'
+            u'test_seconds_sum{host="a\\"b"} 2.5\n'
+            u'test_seconds_count{host="a\\"b"} 2\n'
+        ))
+
+    def test_dump(self):
+        """The format of the dump depends on the file extension"""
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.registry.dump(os.path.join(tmpdir, 'metrics.json'))
+        with open(os.path.join(tmpdir, 'metrics.json')) as handler:
+            dumped = json.load(handler)
+        self.assertEqual(dumped['test_seconds']['series'][0]['count'], 2)
+        self.registry.dump(os.path.join(tmpdir, 'metrics.prom'))
+        with open(os.path.join(tmpdir, 'metrics.prom')) as handler:
+            self.assertEqual(handler.read(), self.registry.to_prometheus())
+
+    def test_reset(self):
+        """Reset forgets the observed values"""
+        self.registry.reset()
+        self.assertEqual(self.histogram.samples(), [])
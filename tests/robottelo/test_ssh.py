@@ -2,10 +2,22 @@
 # (too-many-public-methods) pylint: disable=R0904
 import os
 import paramiko
+import shutil
 import six
+import socket
+import subprocess
+import tempfile
+import threading
+import time
 
 from robottelo import ssh
-from unittest2 import TestCase
+from robottelo.cli import hammer
+from unittest2 import TestCase, skipIf
+
+if six.PY2:
+    asyncio = None
+else:
+    import asyncio
 
 if six.PY2:
     import mock
@@ -26,8 +38,24 @@ class MockStdout(object):
         self.cmd = cmd
         self.channel = MockChannel(ret=ret)
 
-    def read(self):
-        return self.cmd
+    def read(self, size=None):
+        if size is None:
+            data, self.cmd = self.cmd, self.cmd[:0]
+        else:
+            data, self.cmd = self.cmd[:size], self.cmd[size:]
+        return data
+
+
+class MockTransport(object):
+    def __init__(self):
+        self.active = True
+        self.keepalive = None
+
+    def is_active(self):
+        return self.active
+
+    def set_keepalive(self, interval):
+        self.keepalive = interval
 
 
 class MockSSHClient(object):
@@ -49,6 +77,7 @@ class MockSSHClient(object):
         self.key_filename = None
         self.password = None
         self.ret_code = 0
+        self.transport = MockTransport()
 
     def set_missing_host_key_policy(self, policy):  # pylint:disable=W0613
         """A no-op stub method."""
@@ -78,6 +107,10 @@ class MockSSHClient(object):
         """A no-op stub method."""
         self.close_ += 1
 
+    def get_transport(self):
+        """Return the mock transport of the connection."""
+        return self.transport
+
     def exec_command(self, cmd, *args, **kwargs):
         return (
             self.ret_code,
@@ -86,8 +119,25 @@ class MockSSHClient(object):
         )
 
 
+class LocalShellClient(object):
+    """A mock ``paramiko.SSHClient`` running the commands in a local shell."""
+    def exec_command(self, cmd, *args, **kwargs):
+        process = subprocess.Popen(
+            ['sh', '-c', cmd], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+        return (
+            process.returncode,
+            MockStdout(stdout, process.returncode),
+            MockStdout(stderr, process.returncode),
+        )
+
+
 class SSHTestCase(TestCase):
     """Tests for module ``robottelo.ssh``."""
+    def tearDown(self):
+        """Do not share pooled mock connections between tests."""
+        ssh.close_pooled_connections()
+
     @mock.patch('robottelo.ssh.settings')
     def test_get_connection_key(self, settings):
         """Test method ``get_connection`` using key file to connect to the
@@ -220,6 +270,26 @@ class SSHTestCase(TestCase):
             self.assertEquals(ret.stdout, [u'ls -la'])
             self.assertIsInstance(ret, ssh.SSHCommandResult)
 
+    @mock.patch('robottelo.ssh.metrics')
+    @mock.patch('robottelo.ssh.settings')
+    def test_execute_command_metrics(self, settings, metrics):
+        """Latency and size of the command are recorded"""
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        with ssh.get_connection() as connection:  # pylint:disable=W0212
+            ssh.execute_command('ls -la', connection)
+        metrics.SSH_CONNECT_SECONDS.time.assert_called_once_with(
+            host='example.com')
+        metrics.SSH_BYTES_SENT.observe.assert_called_once_with(
+            6, host='example.com')
+        metrics.SSH_BYTES_RECEIVED.observe.assert_called_once_with(
+            6, host='example.com')
+        self.assertEqual(metrics.SSH_FIRST_BYTE_SECONDS.observe.call_count, 1)
+        self.assertEqual(metrics.SSH_COMMAND_SECONDS.observe.call_count, 1)
+
     @mock.patch('robottelo.ssh.settings')
     def test_execute_command_plain_output(self, settings):
         ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
@@ -257,6 +327,62 @@ class SSHTestCase(TestCase):
         self.assertEquals(ret.stdout, u'ls -la')
         self.assertIsInstance(ret, ssh.SSHCommandResult)
 
+    def test_execute_batch(self):
+        """Each command of a batch gets its own output and return code"""
+        results = ssh.execute_batch(
+            ['echo a; echo b >&2', 'exit 3', 'printf "x\\ny"'],
+            LocalShellClient(),
+            output_format='plain'
+        )
+        self.assertEqual(
+            [(result.stdout, result.stderr, result.return_code)
+             for result in results],
+            [(u'a\n', u'b\n', 0), (u'', u'', 3), (u'x\ny', u'', 0)]
+        )
+
+    def test_execute_batch_stop_on_failure(self):
+        """Commands after a failed one are not run with stop_on_failure"""
+        results = ssh.execute_batch(
+            ['echo a', 'false', 'echo c'],
+            LocalShellClient(),
+            stop_on_failure=True
+        )
+        self.assertEqual(
+            [(result.stdout, result.return_code) for result in results],
+            [([u'a', u''], 0), (u'', 1)]
+        )
+
+    @mock.patch('robottelo.ssh.command')
+    def test_command_many(self, command):
+        """Results are mapped to the hosts in order, errors get 255"""
+        def run(cmd, hostname, **kwargs):
+            if hostname == 'down.example.com':
+                raise socket.error('Connection refused')
+            time.sleep(0.05 if hostname == 'a.example.com' else 0)
+            return ssh.SSHCommandResult([hostname], u'', 0)
+        command.side_effect = run
+        hosts = ['a.example.com', 'down.example.com', 'c.example.com']
+        results = ssh.command_many(hosts, 'hostname', concurrency=3)
+        self.assertEqual(list(results), hosts)
+        self.assertEqual(results['a.example.com'].stdout, ['a.example.com'])
+        self.assertGreaterEqual(results['a.example.com'].elapsed, 0.05)
+        self.assertEqual(results['down.example.com'].return_code, 255)
+        self.assertEqual(
+            results['down.example.com'].stderr, u'Connection refused')
+        self.assertEqual(results['c.example.com'].return_code, 0)
+
+    @mock.patch('robottelo.ssh.command')
+    def test_command_many_fail_fast(self, command):
+        """Remaining hosts are skipped after a failure with fail_fast"""
+        command.side_effect = lambda cmd, hostname, **kwargs: (
+            ssh.SSHCommandResult([], u'error', 1))
+        results = ssh.command_many(
+            ['a', 'b', 'c'], 'false', concurrency=1, fail_fast=True)
+        self.assertEqual(list(results), ['a'])
+        self.assertEqual(command.call_count, 1)
+        results = ssh.command_many(['a', 'b', 'c'], 'false', concurrency=1)
+        self.assertEqual(list(results), ['a', 'b', 'c'])
+
     @mock.patch('robottelo.ssh.settings')
     def test_parse_csv(self, settings):
         ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
@@ -281,8 +407,569 @@ class SSHTestCase(TestCase):
         self.assertEquals(ret.stdout, {u'a': u'1', u'b': True})
         self.assertIsInstance(ret, ssh.SSHCommandResult)
 
+    def test_build_command_result_json(self):
+        """JSON output is parsed from the raw bytes into dicts, or into
+        lazy views on demand, failed commands keep their decoded output
+        """
+        output = u'{"Some Key": "v\u00e4lue"}'.encode('utf-8')
+        result = ssh.build_command_result(output, b'', 0, 'json')
+        self.assertIs(type(result.stdout), dict)
+        self.assertEqual(result.stdout, {u'some-key': u'v\u00e4lue'})
+        result = ssh.build_command_result(
+            output, b'', 0, 'json', lazy_json=True)
+        self.assertIsInstance(result.stdout, hammer.JSONObject)
+        self.assertEqual(result.stdout, {u'some-key': u'v\u00e4lue'})
+        result = ssh.build_command_result(b'error', b'failed', 70, 'json')
+        self.assertEqual(result.stdout, u'error')
+        self.assertEqual(result.stderr, u'failed')
+
     def test_call_paramiko_client(self):
         self.assertIsInstance(
             ssh._call_paramiko_sshclient(),
             (paramiko.SSHClient, MockSSHClient)
         )
+
+
+class SSHConnectionPoolTestCase(TestCase):
+    """Tests for class ``robottelo.ssh.SSHConnectionPool``."""
+    def setUp(self):
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        self.pool = ssh.SSHConnectionPool(
+            max_per_host=2, idle_timeout=60, checkout_timeout=0)
+        self.params = ('example.com', 'nobody', 'test_password', None)
+
+    def test_reuse_connection(self):
+        """A connection given back to the pool is reused"""
+        with self.pool.connection(*self.params) as first:
+            pass
+        with self.pool.connection(*self.params) as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(first.connect_, 1)
+        self.assertEqual(first.close_, 0)
+        self.assertEqual(first.transport.keepalive, self.pool.keepalive)
+
+    def test_connection_per_key(self):
+        """Connections are not shared between different credentials"""
+        with self.pool.connection(*self.params) as first:
+            pass
+        with self.pool.connection(
+                'example.com', 'root', 'test_password', None) as second:
+            pass
+        self.assertIsNot(first, second)
+        self.assertEqual(second.username, 'root')
+
+    def test_concurrent_checkout(self):
+        """Connections checked out at same time are different ones"""
+        first = self.pool.checkout(*self.params)
+        second = self.pool.checkout(*self.params)
+        self.assertIsNot(first, second)
+        self.pool.checkin(first)
+        self.pool.checkin(second)
+
+    def test_max_per_host(self):
+        """Checkout fails when max_per_host connections are in use"""
+        first = self.pool.checkout(*self.params)
+        second = self.pool.checkout(*self.params)
+        with self.assertRaises(ssh.SSHConnectionPoolTimeout):
+            self.pool.checkout(*self.params)
+        self.pool.checkin(first)
+        self.assertIs(self.pool.checkout(*self.params), first)
+        self.pool.checkin(first)
+        self.pool.checkin(second)
+
+    def test_discard_on_error(self):
+        """A connection is closed when an error happens while in use"""
+        with self.assertRaises(ValueError):
+            with self.pool.connection(*self.params) as first:
+                raise ValueError()
+        self.assertEqual(first.close_, 1)
+        with self.pool.connection(*self.params) as second:
+            pass
+        self.assertIsNot(first, second)
+
+    def test_dead_connection_replaced(self):
+        """An idle connection with an inactive transport is not reused"""
+        with self.pool.connection(*self.params) as first:
+            pass
+        first.transport.active = False
+        with self.pool.connection(*self.params) as second:
+            pass
+        self.assertIsNot(first, second)
+        self.assertEqual(first.close_, 1)
+
+    def test_idle_timeout(self):
+        """Connections idle for more than idle_timeout are closed"""
+        self.pool.idle_timeout = 0
+        with self.pool.connection(*self.params) as first:
+            pass
+        with self.pool.connection(*self.params) as second:
+            pass
+        self.assertIsNot(first, second)
+        self.assertEqual(first.close_, 1)
+
+    def test_close_all(self):
+        """close_all closes idle connections"""
+        with self.pool.connection(*self.params) as first:
+            pass
+        self.pool.close_all()
+        self.assertEqual(first.close_, 1)
+        with self.pool.connection(*self.params) as second:
+            pass
+        self.assertIsNot(first, second)
+
+    @mock.patch('robottelo.ssh.settings')
+    def test_command_reuses_connection(self, settings):
+        """``ssh.command`` runs over pooled connections by default"""
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        with mock.patch('robottelo.ssh.get_client') as get_client:
+            get_client.return_value = MockSSHClient()
+            get_client.return_value._id = '0x1'
+            ssh.command('ls -la')
+            ssh.command('ls -la')
+            ssh.close_pooled_connections()
+        self.assertEqual(get_client.call_count, 1)
+        self.assertEqual(get_client.return_value.close_, 1)
+
+
+class MockStreamChannel(object):
+    """A mock paramiko channel returning the output in chunks."""
+    def __init__(self, stdout_chunks, stderr_chunks, ret=0):
+        self.stdout_chunks = list(stdout_chunks)
+        self.stderr_chunks = list(stderr_chunks)
+        self.ret = ret
+        self.closed = False
+        self.command = None
+
+    def exec_command(self, cmd):
+        self.command = cmd
+
+    def recv_ready(self):
+        return len(self.stdout_chunks) > 0
+
+    def recv(self, size):
+        return self.stdout_chunks.pop(0)
+
+    def recv_stderr_ready(self):
+        return len(self.stderr_chunks) > 0
+
+    def recv_stderr(self, size):
+        return self.stderr_chunks.pop(0)
+
+    def exit_status_ready(self):
+        return not self.stdout_chunks and not self.stderr_chunks
+
+    def recv_exit_status(self):
+        return self.ret
+
+    def close(self):
+        self.closed = True
+
+
+class SSHCommandStreamTestCase(TestCase):
+    """Tests for class ``robottelo.ssh.SSHCommandStream``."""
+    def test_stream_lines(self):
+        """Lines split across chunks are yielded cleaned up"""
+        channel = MockStreamChannel(
+            [b'Id,Na', b'me\n[Rails] log\n1,\x1b[31m""\x1b[0m\n2,ch\xc3',
+             b'\xa5rs'],
+            [b'warn\x1b[0m', b'ing'],
+            ret=3,
+        )
+        stream = ssh.SSHCommandStream(channel, output_format='csv')
+        self.assertEqual(next(stream), u'Id,Name')
+        self.assertIsNone(stream.return_code)
+        self.assertEqual(list(stream), [u'1,', u'2,ch\xe5rs'])
+        self.assertEqual(stream.return_code, 3)
+        self.assertEqual(stream.stderr, u'warning')
+        self.assertTrue(channel.closed)
+
+    def test_stream_plain_output(self):
+        """Lines of plain output are not changed"""
+        channel = MockStreamChannel([b'[x] ""\nlast'], [])
+        stream = ssh.SSHCommandStream(channel, output_format='plain')
+        self.assertEqual(list(stream), [u'[x] ""', u'last'])
+        self.assertEqual(stream.return_code, 0)
+        self.assertEqual(stream.stderr, u'')
+
+    def test_stream_parse_csv(self):
+        """A stream can be consumed by ``hammer.parse_csv``"""
+        channel = MockStreamChannel([b'Id,Name\n1,foo\n', b'2,bar\n'], [])
+        stream = ssh.SSHCommandStream(channel, output_format='csv')
+        self.assertEqual(
+            hammer.parse_csv(stream),
+            [{u'id': u'1', u'name': u'foo'}, {u'id': u'2', u'name': u'bar'}]
+        )
+
+    def test_stream_timeout(self):
+        """socket.timeout is raised when no output arrives in time"""
+        channel = MockStreamChannel([], [])
+        channel.exit_status_ready = lambda: False
+        stream = ssh.SSHCommandStream(channel, timeout=0)
+        with self.assertRaises(socket.timeout):
+            list(stream)
+        self.assertTrue(channel.closed)
+
+    @mock.patch('robottelo.ssh.settings')
+    def test_command_stream(self, settings):
+        """The pooled connection is given back when the stream is closed"""
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        client = MockSSHClient()
+        client._id = '0x1'
+        channel = MockStreamChannel([b'a\nb\nc'], [])
+        client.transport.open_session = lambda: channel
+        with mock.patch('robottelo.ssh.get_client', return_value=client):
+            with ssh.command_stream('ls') as stream:
+                self.assertEqual(next(stream), u'a')
+            self.assertEqual(channel.command, 'ls')
+            self.assertTrue(channel.closed)
+            with ssh.get_pooled_connection() as connection:
+                self.assertIs(connection, client)
+        ssh.close_pooled_connections()
+
+    @mock.patch('robottelo.ssh.metrics')
+    @mock.patch('robottelo.ssh.settings')
+    def test_execute_command_stream_metrics(self, settings, metrics):
+        """Latency and size of a streamed command are recorded once it is
+        read
+        """
+        settings.server.hostname = 'example.com'
+        client = MockSSHClient()
+        client._hostname = 'example.com'
+        channel = MockStreamChannel([b'a\n', b'bc'], [b'err'])
+        client.transport.open_session = lambda: channel
+        stream = ssh.execute_command_stream('ls', client)
+        self.assertEqual(next(stream), u'a')
+        self.assertFalse(metrics.SSH_COMMAND_SECONDS.observe.called)
+        self.assertEqual(list(stream), [u'bc'])
+        metrics.SSH_BYTES_SENT.observe.assert_called_once_with(
+            2, host='example.com')
+        metrics.SSH_BYTES_RECEIVED.observe.assert_called_once_with(
+            7, host='example.com')
+        self.assertEqual(metrics.SSH_FIRST_BYTE_SECONDS.observe.call_count, 1)
+        self.assertEqual(metrics.SSH_COMMAND_SECONDS.observe.call_count, 1)
+
+
+class MockRunningChannel(MockStreamChannel):
+    """A mock channel whose command runs until ``duration`` seconds passed.
+
+    ``duration`` of ``None`` makes the command run until the channel is
+    closed.
+    """
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def __init__(self, duration):
+        super(MockRunningChannel, self).__init__([b'done'], [])
+        self.duration = duration
+        self.started = None
+
+    def exec_command(self, cmd):
+        self.command = cmd
+        self.started = time.time()
+        with self.lock:
+            MockRunningChannel.running += 1
+            MockRunningChannel.max_running = max(
+                MockRunningChannel.max_running, MockRunningChannel.running)
+
+    def _finished(self):
+        return (
+            self.duration is not None and
+            time.time() - self.started >= self.duration
+        )
+
+    def recv_ready(self):
+        return self._finished() and super(
+            MockRunningChannel, self).recv_ready()
+
+    def exit_status_ready(self):
+        if self._finished():
+            with self.lock:
+                if self.duration is not None:
+                    MockRunningChannel.running -= 1
+                    self.duration = 0
+            return True
+        return False
+
+
+@skipIf(asyncio is None, 'asyncio is not available')
+class SSHAsyncTestCase(TestCase):
+    """Tests for the asyncio functions of ``robottelo.ssh``."""
+    def setUp(self):
+        self.channels = []
+        patcher = mock.patch('robottelo.ssh.settings')
+        settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        patcher = mock.patch(
+            'robottelo.ssh.get_client', side_effect=self._get_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(ssh.close_pooled_connections)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        # asyncio objects created without a loop use the current event loop
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.duration = 0
+        MockRunningChannel.running = MockRunningChannel.max_running = 0
+
+    def _get_client(self, *args, **kwargs):
+        client = MockSSHClient()
+        client._id = hex(id(client))
+        client.transport.open_session = self._open_session
+        return client
+
+    def _open_session(self):
+        self.channels.append(MockRunningChannel(self.duration))
+        return self.channels[-1]
+
+    def test_command_async(self):
+        """The future resolves to the command result"""
+        result = self.loop.run_until_complete(
+            ssh.command_async('ls', loop=self.loop))
+        self.assertEqual(result.stdout, [u'done'])
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(self.channels[0].command, 'ls')
+
+    def test_bounded_concurrency(self):
+        """The semaphore bounds the number of running commands"""
+        self.duration = 0.05
+        semaphore = asyncio.Semaphore(2)
+        results = self.loop.run_until_complete(asyncio.gather(
+            *[ssh.command_async('ls', semaphore=semaphore, loop=self.loop)
+              for _ in range(6)]
+        ))
+        self.assertEqual(len(results), 6)
+        self.assertEqual(len(self.channels), 6)
+        self.assertEqual(MockRunningChannel.max_running, 2)
+
+    @mock.patch('robottelo.ssh.metrics')
+    def test_command_async_metrics(self, metrics):
+        """The latency of the command is recorded"""
+        self.loop.run_until_complete(ssh.command_async('ls', loop=self.loop))
+        metrics.SSH_BYTES_SENT.observe.assert_called_once_with(2, host=None)
+        self.assertEqual(metrics.SSH_COMMAND_SECONDS.observe.call_count, 1)
+
+    def test_timeout(self):
+        """The channel is closed when the timeout expires"""
+        self.duration = None
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(
+                ssh.command_async('sleep', timeout=0.05, loop=self.loop))
+        self.assertTrue(self.channels[0].closed)
+
+    def test_cancel(self):
+        """The channel is closed when the future is cancelled"""
+        self.duration = None
+        future = ssh.command_async('sleep', loop=self.loop)
+        self.loop.call_later(0.05, future.cancel)
+        with self.assertRaises(asyncio.CancelledError):
+            self.loop.run_until_complete(future)
+        self.assertTrue(self.channels[0].closed)
+
+    def test_get_connection_async(self):
+        """The pooled connection is given back after the context exits"""
+        manager = ssh.get_connection_async(loop=self.loop)
+        client = self.loop.run_until_complete(manager.__aenter__())
+        self.loop.run_until_complete(manager.__aexit__(None, None, None))
+        with ssh.get_pooled_connection() as connection:
+            self.assertIs(connection, client)
+
+
+class LocalSFTPFile(object):
+    """A mock ``paramiko.SFTPFile`` object for a local file."""
+    def __init__(self, path, mode):
+        self.file = open(path, mode)
+        self.pipelined = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+    def seek(self, offset):
+        self.file.seek(offset)
+
+    def write(self, data):
+        self.file.write(data)
+
+    def truncate(self, size):
+        self.file.truncate(size)
+
+    def set_pipelined(self, pipelined=True):
+        self.pipelined = pipelined
+
+    def readv(self, chunks):
+        for offset, length in chunks:
+            self.file.seek(offset)
+            yield self.file.read(length)
+
+
+class LocalSFTP(object):
+    """A mock ``paramiko.SFTPClient`` object working on local files."""
+    def __init__(self):
+        self.channel = mock.Mock(closed=False)
+
+    def get_channel(self):
+        return self.channel
+
+    def open(self, path, mode='r'):
+        return LocalSFTPFile(path, mode)
+
+    def put(self, local_path, remote_path):
+        shutil.copyfile(local_path, remote_path)
+
+    def putfo(self, local_file, remote_path):
+        with open(remote_path, 'wb') as remote:
+            shutil.copyfileobj(local_file, remote)
+
+    def get(self, remote_path, local_path):
+        shutil.copyfile(remote_path, local_path)
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def utime(self, path, times):
+        os.utime(path, times)
+
+
+class LocalSSHClient(MockSSHClient):
+    """A mock ``paramiko.SSHClient`` working on the local machine."""
+    def __init__(self):
+        super(LocalSSHClient, self).__init__()
+        self._id = hex(id(self))
+        self.open_sftp_ = 0
+
+    def exec_command(self, cmd, *args, **kwargs):
+        return LocalShellClient().exec_command(cmd)
+
+    def open_sftp(self):
+        self.open_sftp_ += 1
+        return LocalSFTP()
+
+
+class SSHTransferTestCase(TestCase):
+    """Tests for the file transfer functions of ``robottelo.ssh``."""
+    def setUp(self):
+        self.clients = []
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        patcher = mock.patch('robottelo.ssh.settings')
+        settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        patcher = mock.patch(
+            'robottelo.ssh.get_client', side_effect=self._get_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(ssh.close_pooled_connections)
+        for name, value in (('TRANSFER_PARALLEL_THRESHOLD', 1024),
+                            ('TRANSFER_BLOCK_SIZE', 100)):
+            patcher = mock.patch.object(ssh, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _get_client(self, *args, **kwargs):
+        self.clients.append(LocalSSHClient())
+        return self.clients[-1]
+
+    def _path(self, *parts):
+        return os.path.join(self.tmpdir, *parts)
+
+    def _write(self, path, content):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(path, 'wb') as handler:
+            handler.write(content)
+
+    def _read(self, path):
+        with open(path, 'rb') as handler:
+            return handler.read()
+
+    def test_reuse_sftp_session(self):
+        """The SFTP session of a pooled connection is reused"""
+        self._write(self._path('local'), b'content')
+        ssh.upload_file(self._path('local'), self._path('remote'))
+        ssh.download_file(self._path('remote'), self._path('copy'))
+        self.assertEqual(self._read(self._path('copy')), b'content')
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(self.clients[0].open_sftp_, 1)
+
+    def test_parallel_transfer(self):
+        """Big files are transferred in parallel chunks"""
+        content = os.urandom(10000)
+        self._write(self._path('local'), content)
+        ssh.upload_file(self._path('local'), self._path('remote'))
+        self.assertEqual(self._read(self._path('remote')), content)
+        self.assertGreater(len(self.clients), 1)
+        ssh.download_file(self._path('remote'), self._path('copy'))
+        self.assertEqual(self._read(self._path('copy')), content)
+
+    @skipIf(asyncio is None, 'asyncio is not available')
+    def test_transfer_async(self):
+        """The asyncio transfers use the pooled SFTP sessions and transfer
+        big files in parallel chunks
+        """
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        self._write(self._path('local'), b'content')
+        loop.run_until_complete(ssh.upload_file_async(
+            self._path('local'), self._path('remote'), loop=loop))
+        loop.run_until_complete(ssh.download_file_async(
+            self._path('remote'), self._path('copy'), loop=loop))
+        self.assertEqual(self._read(self._path('copy')), b'content')
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(self.clients[0].open_sftp_, 1)
+        content = os.urandom(10000)
+        self._write(self._path('local'), content)
+        loop.run_until_complete(ssh.upload_file_async(
+            self._path('local'), self._path('remote'), loop=loop))
+        self.assertEqual(self._read(self._path('remote')), content)
+        self.assertGreater(len(self.clients), 1)
+        loop.run_until_complete(ssh.download_file_async(
+            self._path('remote'), self._path('copy'), loop=loop))
+        self.assertEqual(self._read(self._path('copy')), content)
+
+    def test_sync_directory(self):
+        """Only missing or changed files are uploaded"""
+        local_dir, remote_dir = self._path('local'), self._path('remote')
+        self._write(os.path.join(local_dir, 'a'), b'a')
+        self._write(os.path.join(local_dir, 'sub', 'b'), os.urandom(2000))
+        self.assertEqual(
+            ssh.sync_directory(local_dir, remote_dir),
+            ['a', os.path.join('sub', 'b')]
+        )
+        self.assertEqual(
+            self._read(os.path.join(local_dir, 'sub', 'b')),
+            self._read(os.path.join(remote_dir, 'sub', 'b'))
+        )
+        self.assertEqual(ssh.sync_directory(local_dir, remote_dir), [])
+        self._write(os.path.join(local_dir, 'a'), b'changed')
+        self.assertEqual(ssh.sync_directory(local_dir, remote_dir), ['a'])
+
+    def test_sync_directory_checksum(self):
+        """Files with the same content are skipped when using checksums"""
+        local_dir, remote_dir = self._path('local'), self._path('remote')
+        self._write(os.path.join(local_dir, 'a'), b'a')
+        self.assertEqual(
+            ssh.sync_directory(local_dir, remote_dir, checksum=True), ['a'])
+        os.utime(os.path.join(local_dir, 'a'), (0, 0))
+        self.assertEqual(
+            ssh.sync_directory(local_dir, remote_dir, checksum=True), [])
+        self.assertEqual(ssh.sync_directory(local_dir, remote_dir), ['a'])
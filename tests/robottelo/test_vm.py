@@ -2,6 +2,7 @@
 import six
 import unittest2
 from robottelo import ssh
+from robottelo.constants import DISTRO_RHEL7
 from robottelo.vm import VirtualMachine, VirtualMachineError
 
 if six.PY2:
@@ -80,6 +81,89 @@ class VirtualMachineTestCase(unittest2.TestCase):
         vm.run('ls')
         ssh_command.assert_called_once_with('ls', hostname='192.168.0.1')
 
+    @patch('robottelo.vm.bz_bug_is_open', return_value=False)
+    @patch('robottelo.ssh.command_batch')
+    def test_install_katello_agent(self, command_batch, bz_bug_is_open):
+        """Check if install_katello_agent runs its commands in one batch"""
+        self.configure_provisoning_server()
+        vm = VirtualMachine()
+        vm._created = True
+        vm.ip_addr = '192.168.0.1'
+        command_batch.return_value = [
+            ssh.SSHCommandResult(return_code=0),
+            ssh.SSHCommandResult(return_code=0),
+            ssh.SSHCommandResult(return_code=3),
+        ]
+        with self.assertRaisesRegex(VirtualMachineError, 'not running'):
+            vm.install_katello_agent()
+        command_batch.assert_called_once_with(
+            [
+                'yum install -y katello-agent',
+                'rpm -q katello-agent',
+                'service goferd status',
+            ],
+            hostname='192.168.0.1',
+            stop_on_failure=False
+        )
+
+    @patch('robottelo.ssh.command_batch')
+    @patch('robottelo.ssh.command')
+    def test_configure_puppet(self, ssh_command, command_batch):
+        """Check if configure_puppet runs puppet when echo fails and only
+        stops when puppet can't be installed
+        """
+        self.configure_provisoning_server()
+        vm = VirtualMachine()
+        vm._created = True
+        vm.ip_addr = '192.168.0.1'
+        ssh_command.return_value = ssh.SSHCommandResult(return_code=1)
+        with self.assertRaisesRegex(VirtualMachineError, 'puppet rpm'):
+            vm.configure_puppet('http://example.com/rhel.repo')
+        self.assertFalse(command_batch.called)
+
+        ssh_command.return_value = ssh.SSHCommandResult(return_code=0)
+        command_batch.return_value = [
+            ssh.SSHCommandResult(return_code=1),
+            ssh.SSHCommandResult(return_code=0),
+        ]
+        vm.configure_puppet('http://example.com/rhel.repo')
+        cmds = command_batch.call_args[0][0]
+        self.assertEqual(cmds[-1], u'puppet agent -t')
+        self.assertFalse(command_batch.call_args[1]['stop_on_failure'])
+
+    @patch('robottelo.ssh.command_batch')
+    @patch('robottelo.ssh.command')
+    def test_configure_rhai_client(self, ssh_command, command_batch):
+        """Check if configure_rhai_client ignores a failed wget and tells
+        which step failed
+        """
+        self.configure_provisoning_server()
+        self.settings.rhel7_repo = 'http://example.com/rhel.repo'
+        self.settings.rhai.insights_client_el7repo = (
+            'http://example.com/insights.repo')
+        vm = VirtualMachine()
+        vm._created = True
+        vm.ip_addr = '192.168.0.1'
+        with patch.multiple(
+                vm, install_katello_ca=lambda: None,
+                register_contenthost=lambda *args: None):
+            command_batch.return_value = [
+                ssh.SSHCommandResult(return_code=4),
+                ssh.SSHCommandResult(return_code=0),
+                ssh.SSHCommandResult(return_code=0),
+                ssh.SSHCommandResult(return_code=0),
+            ]
+            vm.configure_rhai_client('ak', 'org', DISTRO_RHEL7)
+            self.assertFalse(command_batch.call_args[1]['stop_on_failure'])
+
+            command_batch.return_value[3].return_code = 1
+            with self.assertRaisesRegex(VirtualMachineError, 'register'):
+                vm.configure_rhai_client('ak', 'org', DISTRO_RHEL7)
+
+            command_batch.return_value[1].return_code = 1
+            with self.assertRaisesRegex(VirtualMachineError, 'install'):
+                vm.configure_rhai_client('ak', 'org', DISTRO_RHEL7)
+
     def test_run_raises_exception(self):
         """Check if run raises an exception if the vm is not created"""
         self.configure_provisoning_server()